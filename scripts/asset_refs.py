@@ -0,0 +1,195 @@
+"""
+asset_refs.py – Grafo de referencias entre los posts y sus figuras.
+
+Cruza las rutas públicas que usan los cuerpos de los posts
+(<Figure src="/images/blog/<post>/<archivo>">, ver FrontmatterIndex.refs())
+con los ficheros de src/assets/images/blog. Figure.astro falla en el build si
+una referencia no existe; un fichero sin referencias se sigue copiando al
+build sin que nadie lo use.
+
+Las variantes de --ladder (<stem>-<ancho>w.<formato>, listadas en el
+ladder.json de cada carpeta) cuentan como referenciadas si lo está su imagen
+base.
+
+rewrite_refs() cambia en los posts una ruta pública por otra: lo usa
+import_image.py --hash-names cuando una imagen sustituye a otra.
+
+post_weights() suma, por post, lo que pesan su portada y sus figuras
+(generate-images.py --weights).
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from frontmatter_index import CONTENT_DIR, POST_SUFFIXES, body_refs
+
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+ASSETS_BLOG_DIR = PROJECT_ROOT / "src" / "assets" / "images" / "blog"
+PUBLIC_PREFIX = "/images/blog/"
+LADDER_MANIFEST = "ladder.json"
+# Las mismas extensiones que recoge el import.meta.glob de Figure.astro
+ASSET_SUFFIXES = {".png", ".jpg", ".jpeg", ".webp", ".avif"}
+
+
+def ladder_variants(assets_dir: str | Path) -> dict[Path, Path]:
+    """{variante: imagen base} según los ladder.json bajo assets_dir."""
+    variants: dict[Path, Path] = {}
+    for manifest in Path(assets_dir).rglob(LADDER_MANIFEST):
+        try:
+            ladders = json.loads(manifest.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        for base, entries in ladders.items():
+            for entry in entries:
+                if entry["file"] != base:
+                    variants[manifest.parent / entry["file"]] = manifest.parent / base
+    return variants
+
+
+class AssetGraph:
+    """Referencias del cuerpo de los posts frente a ficheros en disco."""
+
+    def __init__(self, post_refs: list[tuple[str, list[list]]],
+                 assets_dir: str | Path = ASSETS_BLOG_DIR) -> None:
+        self.assets_dir = Path(assets_dir)
+        # ruta pública -> [(post, línea)]
+        self.refs: dict[str, list[tuple[str, int]]] = {}
+        for post, refs in post_refs:
+            for public, line in refs:
+                self.refs.setdefault(public, []).append((post, line))
+        # ruta pública -> bytes, y variante -> imagen base
+        self.assets: dict[str, int] = {}
+        self.variant_of: dict[str, str] = {}
+        self._scan_assets()
+
+    def _scan_assets(self) -> None:
+        if not self.assets_dir.is_dir():
+            return
+        for path in sorted(self.assets_dir.rglob("*")):
+            if path.is_file() and path.suffix.lower() in ASSET_SUFFIXES:
+                self.assets[self.public_path(path)] = path.stat().st_size
+        for variant, base in ladder_variants(self.assets_dir).items():
+            self.variant_of[self.public_path(variant)] = self.public_path(base)
+
+    def public_path(self, path: Path) -> str:
+        return PUBLIC_PREFIX + path.relative_to(self.assets_dir).as_posix()
+
+    def file_path(self, public: str) -> Path:
+        return self.assets_dir / public[len(PUBLIC_PREFIX):]
+
+    def missing(self) -> list[tuple[str, str, int]]:
+        """[(ruta_pública, post, línea)] de las referencias sin fichero."""
+        return sorted(
+            (public, post, line)
+            for public, uses in self.refs.items()
+            if public not in self.assets
+            for post, line in uses
+        )
+
+    def orphans(self) -> list[str]:
+        """Rutas públicas de los ficheros que ningún post referencia."""
+        return [
+            public for public in self.assets
+            if public not in self.refs and self.variant_of.get(public) not in self.refs
+        ]
+
+
+def post_weights(graph: AssetGraph, covers: dict[str, Path | None]) -> list[dict]:
+    """Peso de las imágenes de cada post de covers, del más pesado al que menos.
+
+    covers es {post: ruta de su portada, o None}. Cada post suma su portada,
+    las figuras que referencia su cuerpo (aunque vivan en la carpeta de otro
+    post) y todo lo que hay en su carpeta <slug>/ de assets_dir, variantes
+    de --ladder incluidas. Devuelve dicts {"post", "bytes", "count",
+    "files": [(ruta, bytes)] de mayor a menor}; la portada va por su nombre.
+    """
+    by_slug: dict[str, dict[str, int]] = {}
+    for public, size in graph.assets.items():
+        slug = public[len(PUBLIC_PREFIX):].split("/", 1)[0]
+        by_slug.setdefault(slug, {})[public] = size
+    referenced: dict[str, dict[str, int]] = {}
+    for public, uses in graph.refs.items():
+        if public in graph.assets:
+            for post, _ in uses:
+                referenced.setdefault(post, {})[public] = graph.assets[public]
+
+    weights = []
+    for post, cover in covers.items():
+        files = {**by_slug.get(Path(post).stem, {}), **referenced.get(post, {})}
+        if cover is not None and cover.is_file():
+            files[cover.name] = cover.stat().st_size
+        weights.append({
+            "post": post,
+            "bytes": sum(files.values()),
+            "count": len(files),
+            "files": sorted(files.items(), key=lambda f: (-f[1], f[0])),
+        })
+    return sorted(weights, key=lambda w: (-w["bytes"], w["post"]))
+
+
+def prune(graph: AssetGraph) -> tuple[list[Path], int]:
+    """Borra las huérfanas del grafo. Devuelve (ficheros borrados, bytes).
+
+    Quita también sus entradas del ladder.json y del placeholders.json, y las
+    carpetas que se quedan vacías.
+    """
+    from placeholders import drop_placeholders
+
+    removed: list[Path] = []
+    freed = 0
+    for public in graph.orphans():
+        path = graph.file_path(public)
+        path.unlink()
+        removed.append(path)
+        freed += graph.assets[public]
+
+    for folder in sorted({p.parent for p in removed}):
+        manifest = folder / LADDER_MANIFEST
+        if manifest.exists():
+            ladders = json.loads(manifest.read_text(encoding="utf-8"))
+            kept = {base: v for base, v in ladders.items() if (folder / base).exists()}
+            if kept:
+                manifest.write_text(
+                    json.dumps(kept, ensure_ascii=False, indent=2) + "\n", encoding="utf-8"
+                )
+            else:
+                manifest.unlink()
+        drop_placeholders(folder, [p.name for p in removed if p.parent == folder])
+        if folder != graph.assets_dir and not any(folder.iterdir()):
+            folder.rmdir()
+    return removed, freed
+
+
+def rewrite_refs(renames: dict[str, str], content_dir: str | Path = CONTENT_DIR) -> list[Path]:
+    """Cambia en los posts cada ruta pública de renames por su nuevo valor.
+
+    Como scan_body_refs, no toca los bloques de código cercados ni el código
+    en línea. Devuelve los posts modificados.
+    """
+    changed: list[Path] = []
+    if not Path(content_dir).is_dir():
+        return changed
+    for path in sorted(Path(content_dir).iterdir()):
+        if path.suffix not in POST_SUFFIXES:
+            continue
+        text = path.read_text(encoding="utf-8")
+        if not any(old in text for old in renames):
+            continue
+        lines = text.splitlines(keepends=True)
+        in_fence = False
+        for i, line in enumerate(lines):
+            if line.lstrip().startswith(("```", "~~~")):
+                in_fence = not in_fence
+            elif not in_fence:
+                for m in reversed(body_refs(line)):
+                    if m.group(0) in renames:
+                        line = line[:m.start()] + renames[m.group(0)] + line[m.end():]
+                lines[i] = line
+        new_text = "".join(lines)
+        if new_text != text:
+            path.write_text(new_text, encoding="utf-8")
+            changed.append(path)
+    return changed
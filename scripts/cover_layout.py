@@ -0,0 +1,101 @@
+"""
+cover_layout.py – Medición y ajuste de texto para las portadas.
+
+En vez de pedir a FreeType un textbbox por cada cadena, se memoriza por
+(fuente, tamaño) el avance y la caja de cada glifo: medir un título es una
+suma de floats. Las fuentes de las portadas son monoespaciadas y sin kerning,
+así que el ancho de tinta calculado coincide con el de ImageDraw.textbbox.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+
+from PIL import ImageFont
+
+ELLIPSIS = "…"
+
+
+class TextMeasurer:
+    """Tablas de avance y caja por glifo para una fuente y tamaño concretos."""
+
+    def __init__(self, font: ImageFont.FreeTypeFont) -> None:
+        self.font = font
+        self._advance: dict[str, float] = {}
+        self._bbox: dict[str, tuple[int, int, int, int]] = {}
+
+    def _glyph(self, ch: str) -> float:
+        adv = self._advance.get(ch)
+        if adv is None:
+            adv = self._advance[ch] = self.font.getlength(ch)
+            self._bbox[ch] = self.font.getbbox(ch)
+        return adv
+
+    def width(self, text: str) -> int:
+        """Ancho de tinta de text, el mismo que daría textbbox (x1 - x0)."""
+        if not text:
+            return 0
+        total = sum(self._glyph(ch) for ch in text[:-1])
+        self._glyph(text[-1])
+        left = self._bbox[text[0]][0]
+        right = self._bbox[text[-1]][2]
+        return round(total + right - left)
+
+    def truncate(self, text: str, max_width: int) -> str:
+        """Recorta text (por palabra si se puede) para que quepa en max_width.
+
+        Añade "…" cuando recorta. Si text ya cabe lo devuelve tal cual.
+        """
+        if self.width(text) <= max_width:
+            return text
+        words = text.split(" ")
+        while len(words) > 1:
+            words.pop()
+            candidate = " ".join(words).rstrip(" ,.;:") + ELLIPSIS
+            if self.width(candidate) <= max_width:
+                return candidate
+        # Una sola palabra demasiado larga: recorte por caracteres
+        chars = text
+        while chars and self.width(chars + ELLIPSIS) > max_width:
+            chars = chars[:-1]
+        return chars + ELLIPSIS
+
+    def wrap(self, text: str, max_width: int, max_lines: int | None = None) -> list[str]:
+        """Parte text en líneas de como mucho max_width píxeles.
+
+        Con max_lines, la última línea se recorta con "…" si sobra texto.
+        """
+        lines: list[str] = []
+        current = ""
+        for word in text.split():
+            candidate = f"{current} {word}" if current else word
+            if current and self.width(candidate) > max_width:
+                lines.append(current)
+                current = word
+            else:
+                current = candidate
+        if current:
+            lines.append(current)
+        lines = [self.truncate(line, max_width) for line in lines]
+        if max_lines is not None and len(lines) > max_lines:
+            rest = " ".join(lines[max_lines - 1:])
+            lines = lines[:max_lines - 1] + [self.truncate(rest, max_width)]
+        return lines
+
+
+@lru_cache(maxsize=None)
+def measurer_for(font_path: str, size: int) -> TextMeasurer:
+    """TextMeasurer (y fuente cargada) memorizado por (fuente, tamaño)."""
+    return TextMeasurer(ImageFont.truetype(font_path, size))
+
+
+def fit_size(text: str, font_path: str, sizes: tuple[int, ...], max_width: int) -> int:
+    """Mayor tamaño de sizes (de mayor a menor) con el que text cabe en max_width.
+
+    Si no cabe con ninguno devuelve el más pequeño; el llamador decide si
+    además recorta.
+    """
+    for size in sizes:
+        if measurer_for(font_path, size).width(text) <= max_width:
+            return size
+    return sizes[-1]
@@ -0,0 +1,277 @@
+"""
+frontmatter_index.py – Índice persistente del frontmatter de los posts.
+
+Lo comparten generate-images.py (--auto, --check) e import_image.py para no
+releer src/content/blog entero en cada ejecución. La caché en disco guarda,
+por fichero, su mtime y tamaño junto al frontmatter ya parseado: solo se
+vuelven a leer los posts que cambiaron, y de cada uno solo las líneas hasta
+el `---` de cierre.
+
+Con refresh(refs=True) el índice guarda además las imágenes del cuerpo
+(/images/blog/...) con su número de línea; eso sí exige leer el post entero,
+así que solo lo pide --check.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from functools import partial
+from pathlib import Path
+
+from timings import STAGES, reset_worker
+
+# ---------------------------------------------------------------------------
+# Constantes de módulo
+# ---------------------------------------------------------------------------
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+CONTENT_DIR = PROJECT_ROOT / "src" / "content" / "blog"
+CACHE_DIR = PROJECT_ROOT / ".cache"
+DEFAULT_CACHE_PATH = CACHE_DIR / "frontmatter-index.json"
+POST_SUFFIXES = (".md", ".mdx")
+# Incrementar si cambia el parser: invalida las cachés existentes.
+INDEX_VERSION = 2
+# Rutas públicas de las figuras del cuerpo, en <Figure src="..."> o ![](...):
+# la ruta empieza justo tras la comilla o el paréntesis. Así no cuenta
+# https://otro.sitio/images/blog/... ni una ruta a mitad de texto.
+BODY_REF_RE = re.compile(r"(?<=[\"'(])/images/blog/[^\s\"'()<>]+")
+# Código en línea (`...`, ``...``): lo de dentro es texto de ejemplo
+INLINE_CODE_RE = re.compile(r"(`+).+?\1")
+# Por debajo de este número de posts a releer, un pool cuesta más que leerlos
+PARALLEL_MIN_POSTS = 32
+
+
+# ---------------------------------------------------------------------------
+# Parseo
+# ---------------------------------------------------------------------------
+
+
+def read_frontmatter_block(filepath: str | Path) -> str | None:
+    """Lee solo el bloque entre los delimitadores `---` del principio.
+
+    Deja de leer en cuanto encuentra el cierre, sin cargar el cuerpo del
+    post. Devuelve None si el fichero no empieza por `---` o no se cierra.
+    """
+    # En binario y línea a línea: el modo texto decodifica por bloques y
+    # acabaría leyendo (y validando) parte del cuerpo.
+    with open(filepath, "rb") as f:
+        first = f.readline()
+        if first.rstrip() != b"---":
+            return None
+        lines = []
+        for line in f:
+            if line.startswith(b"---"):
+                return b"".join(lines).decode("utf-8")
+            lines.append(line)
+    return None
+
+
+def parse_frontmatter_block(block: str) -> dict:
+    """Parsea el YAML sencillo del frontmatter sin depender de PyYAML."""
+    result: dict = {}
+    for line in block.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+
+        # key: value
+        m = re.match(r"^(\w+):\s*(.+)$", line)
+        if not m:
+            continue
+
+        key, val = m.group(1), m.group(2).strip()
+
+        # Quitar comillas
+        if (val.startswith('"') and val.endswith('"')) or (
+            val.startswith("'") and val.endswith("'")
+        ):
+            val = val[1:-1]
+
+        # Tags: parsear lista YAML inline ["tag1", "tag2"]
+        if key == "tags":
+            tags_match = re.findall(r'"([^"]+)"|\'([^\']+)\'', val)
+            result["tags"] = [t[0] or t[1] for t in tags_match]
+            continue
+
+        # Booleanos
+        if val.lower() in ("true", "false"):
+            result[key] = val.lower() == "true"
+            continue
+
+        result[key] = val
+
+    return result
+
+
+def parse_frontmatter(filepath: str | Path) -> dict:
+    """Devuelve el frontmatter de un .md/.mdx como dict (vacío si no tiene)."""
+    block = read_frontmatter_block(filepath)
+    if block is None:
+        return {}
+    return parse_frontmatter_block(block)
+
+
+def body_refs(line: str) -> list[re.Match]:
+    """Coincidencias de BODY_REF_RE en line fuera del código en línea."""
+    code = [m.span() for m in INLINE_CODE_RE.finditer(line)]
+    return [
+        m for m in BODY_REF_RE.finditer(line)
+        if not any(start <= m.start() < end for start, end in code)
+    ]
+
+
+def scan_body_refs(filepath: str | Path) -> list[list]:
+    """Devuelve [[ruta_pública, línea], ...] de las imágenes del cuerpo.
+
+    Ignora los bloques de código cercados (``` o ~~~) y el código en línea,
+    donde una ruta es texto de ejemplo y no una referencia real.
+    """
+    refs: list[list] = []
+    in_fence = False
+    with open(filepath, encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            if line.lstrip().startswith(("```", "~~~")):
+                in_fence = not in_fence
+                continue
+            if in_fence:
+                continue
+            for m in body_refs(line):
+                refs.append([m.group(0), lineno])
+    return refs
+
+
+def scan_post(filepath: str | Path, refs: bool = False) -> dict:
+    """Entrada del índice para un post: {"fm": ...} y, con refs, {"refs": ...}."""
+    entry: dict = {"fm": parse_frontmatter(filepath)}
+    if refs:
+        entry["refs"] = scan_body_refs(filepath)
+    return entry
+
+
+# ---------------------------------------------------------------------------
+# Índice
+# ---------------------------------------------------------------------------
+
+
+class FrontmatterIndex:
+    """Frontmatter de todos los posts de content_dir, con caché incremental.
+
+    Cada entrada se identifica por (nombre, mtime, tamaño): si el fichero no
+    cambió desde la última ejecución se reutiliza lo parseado. Con
+    cache_path=None el índice vive solo en memoria.
+    """
+
+    def __init__(self, content_dir: str | Path = CONTENT_DIR,
+                 cache_path: str | Path | None = None) -> None:
+        self.content_dir = Path(content_dir).resolve()
+        self.cache_path = Path(cache_path) if cache_path is not None else None
+        self._entries: dict[str, dict] = self._load_cache()
+        self.misses = 0  # posts leídos de disco en el último refresh()
+
+    def _load_cache(self) -> dict[str, dict]:
+        if self.cache_path is None:
+            return {}
+        try:
+            data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if (
+            not isinstance(data, dict)
+            or data.get("version") != INDEX_VERSION
+            or data.get("content_dir") != str(self.content_dir)
+        ):
+            return {}
+        return data.get("entries", {})
+
+    def _save_cache(self) -> None:
+        if self.cache_path is None:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": INDEX_VERSION,
+            "content_dir": str(self.content_dir),
+            "entries": self._entries,
+        }
+        tmp = self.cache_path.with_name(f"{self.cache_path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.cache_path)
+
+    def refresh(self, refs: bool = False, jobs: int | None = None) -> FrontmatterIndex:
+        """Sincroniza el índice con el disco; solo relee los posts cambiados.
+
+        Con refs=True también se indexan las imágenes del cuerpo (ver refs());
+        una entrada cacheada sin ellas cuenta como cambiada. Si hay muchos
+        posts que releer se reparten entre jobs procesos.
+        """
+        with STAGES.stage("frontmatter"):
+            return self._refresh(refs, jobs)
+
+    def _refresh(self, refs: bool, jobs: int | None) -> FrontmatterIndex:
+        entries: dict[str, dict] = {}
+        stale: list[tuple[str, str, int, int]] = []
+        with os.scandir(self.content_dir) as it:
+            for entry in it:
+                if not entry.is_file() or not entry.name.endswith(POST_SUFFIXES):
+                    continue
+                st = entry.stat()
+                cached = self._entries.get(entry.name)
+                if (
+                    cached is not None
+                    and cached["mtime_ns"] == st.st_mtime_ns
+                    and cached["size"] == st.st_size
+                    and (not refs or "refs" in cached)
+                ):
+                    entries[entry.name] = cached
+                    continue
+                stale.append((entry.name, entry.path, st.st_mtime_ns, st.st_size))
+
+        self.misses = len(stale)
+        scanned = self._scan([path for _, path, _, _ in stale], refs, jobs)
+        for (name, _, mtime_ns, size), scan in zip(stale, scanned):
+            entries[name] = {"mtime_ns": mtime_ns, "size": size, **scan}
+
+        if stale or entries.keys() != self._entries.keys():
+            self._entries = entries
+            self._save_cache()
+        return self
+
+    @staticmethod
+    def _scan(paths: list[str], refs: bool, jobs: int | None) -> list[dict]:
+        if jobs == 1 or len(paths) < PARALLEL_MIN_POSTS:
+            results = []
+            for path in paths:
+                with STAGES.stage("frontmatter.parse"):
+                    results.append(scan_post(path, refs))
+            return results
+        # Importado aquí: cuesta más que leer unas decenas de posts
+        from concurrent.futures import ProcessPoolExecutor
+
+        with STAGES.stage("frontmatter.scan"):
+            with ProcessPoolExecutor(max_workers=jobs, initializer=reset_worker) as pool:
+                return list(pool.map(partial(scan_post, refs=refs), paths, chunksize=16))
+
+    def posts(self) -> list[tuple[str, dict]]:
+        """Devuelve [(nombre_fichero, frontmatter)] ordenado por nombre."""
+        return [(name, self._entries[name]["fm"]) for name in sorted(self._entries)]
+
+    def refs(self) -> list[tuple[str, list[list]]]:
+        """Devuelve [(nombre_fichero, [[ruta_pública, línea], ...])] de los
+        posts indexados con refresh(refs=True), ordenado por nombre."""
+        return [
+            (name, self._entries[name]["refs"])
+            for name in sorted(self._entries)
+            if "refs" in self._entries[name]
+        ]
+
+    def slugs(self) -> list[str]:
+        """Devuelve los nombres de los posts sin extensión, ordenados."""
+        return sorted(Path(name).stem for name in self._entries)
+
+
+def load_index(content_dir: str | Path = CONTENT_DIR,
+               cache_path: str | Path | None = DEFAULT_CACHE_PATH,
+               refs: bool = False, jobs: int | None = None) -> FrontmatterIndex:
+    """Atajo: crea el índice y lo sincroniza con el disco."""
+    return FrontmatterIndex(content_dir, cache_path).refresh(refs, jobs)
@@ -7,20 +7,42 @@ Uso:
   python3 scripts/generate-images.py fail2ban.jpg             # Genera solo una
   python3 scripts/generate-images.py --auto                   # Auto-genera desde frontmatter
   python3 scripts/generate-images.py --auto --force           # Regenera todas
+  python3 scripts/generate-images.py --watch                  # Regenera al guardar
+  python3 scripts/generate-images.py --serve                  # Vista previa en el navegador
+  python3 scripts/generate-images.py --og                     # Tarjetas OG en .cache/og
   python3 scripts/generate-images.py --new                    # Modo interactivo
   python3 scripts/generate-images.py --check                  # Detecta huérfanas/faltantes
+  python3 scripts/generate-images.py --weights --budget 1024  # Peso de imágenes por post
   python3 scripts/generate-images.py --list                   # Lista el catálogo
   python3 scripts/generate-images.py --category Seguridad     # Filtra por categoría
+  python3 scripts/generate-images.py --auto --changed         # Solo las que cambiaron
+  python3 scripts/generate-images.py --auto --force --jobs 4  # Renderiza en 4 procesos
+  python3 scripts/generate-images.py --auto --force --max-kb 40  # Portadas de ≤ 40 KB
+  python3 scripts/generate-images.py --auto --formats avif,webp,jpg  # Varios formatos
 
 Requisitos:
-  pip install Pillow
+  pip install Pillow   (solo para generar; --list, --check y --weights funcionan sin él)
 """
 
 import argparse
+import hashlib
+import json
 import os
 import re
 import sys
-from PIL import Image, ImageDraw, ImageFont
+import time
+from collections import OrderedDict
+from functools import partial
+from pathlib import Path
+
+# Pillow (y cover_layout e image_codec, que dependen de él) se importa dentro
+# de las funciones que dibujan o codifican: --list, --check y un --auto sin
+# nada que regenerar arrancan sin cargarlo, y funcionan sin Pillow instalado.
+from asset_refs import AssetGraph, post_weights, prune
+from frontmatter_index import (  # noqa: F401
+    CACHE_DIR, DEFAULT_CACHE_PATH, load_index, parse_frontmatter,
+)
+from timings import STAGES, reset_worker, run_instrumented
 
 # --- Configuración -----------------------------------------------------------
 
@@ -28,8 +50,32 @@ SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.join(SCRIPT_DIR, "..")
 OUT_DIR = os.path.join(PROJECT_ROOT, "src", "assets", "images")
 CONTENT_DIR = os.path.join(PROJECT_ROOT, "src", "content", "blog")
+# Caché del índice de frontmatter (None = solo en memoria)
+FRONTMATTER_CACHE = DEFAULT_CACHE_PATH
+# Ficheros más pesados que --weights lista bajo cada post
+WEIGHT_TOP_FILES = 3
 WIDTH, HEIGHT = 800, 500
 
+# Manifiesto incremental: fichero -> hash de las entradas del render.
+# Incrementa RENDERER_VERSION cuando cambie el dibujo de las portadas para
+# que --changed las regenere todas. Es estado local, como el resto de .cache.
+COVERS_MANIFEST = os.path.join(CACHE_DIR, "covers-manifest.json")
+RENDERER_VERSION = 2
+
+# Calidad JPEG de las portadas (techo de la búsqueda con --max-kb)
+JPEG_QUALITY = 90
+
+# Formatos de salida: extensión -> (formato de Pillow, parámetros). Todos se
+# codifican desde el mismo lienzo en memoria, sin pasar por un JPEG. Las
+# portadas son colores planos y texto: el WebP sin pérdida pesa menos que el
+# JPEG q90 y que el propio WebP con pérdida.
+COVER_FORMATS = {
+    "jpg": ("JPEG", {"quality": JPEG_QUALITY}),
+    "webp": ("WEBP", {"lossless": True, "method": 4}),
+    "avif": ("AVIF", {"quality": 70, "speed": 8}),
+}
+DEFAULT_FORMATS = ("jpg",)
+
 # Fuentes (monospace del sistema)
 FONT_PATH = "/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf"
 FONT_BOLD_PATH = "/usr/share/fonts/truetype/dejavu/DejaVuSansMono-Bold.ttf"
@@ -173,51 +219,8 @@ _CATALOG_INDEX = {a[0]: a for a in ARTICLES}
 
 
 # --- Parseo de frontmatter ---------------------------------------------------
-
-def parse_frontmatter(filepath):
-    """Parsea frontmatter YAML de un .md sin depender de PyYAML."""
-    result = {}
-    with open(filepath, "r", encoding="utf-8") as f:
-        content = f.read()
-
-    # Extraer bloque entre --- delimiters
-    match = re.match(r"^---\s*\n(.*?)\n---", content, re.DOTALL)
-    if not match:
-        return result
-
-    block = match.group(1)
-    for line in block.splitlines():
-        line = line.strip()
-        if not line or line.startswith("#"):
-            continue
-
-        # key: value
-        m = re.match(r'^(\w+):\s*(.+)$', line)
-        if not m:
-            continue
-
-        key, val = m.group(1), m.group(2).strip()
-
-        # Quitar comillas
-        if (val.startswith('"') and val.endswith('"')) or \
-           (val.startswith("'") and val.endswith("'")):
-            val = val[1:-1]
-
-        # Tags: parsear lista YAML inline ["tag1", "tag2"]
-        if key == "tags":
-            tags_match = re.findall(r'"([^"]+)"|\'([^\']+)\'', val)
-            result["tags"] = [t[0] or t[1] for t in tags_match]
-            continue
-
-        # Booleanos
-        if val.lower() in ("true", "false"):
-            result[key] = val.lower() == "true"
-            continue
-
-        result[key] = val
-
-    return result
-
+# El parseo y la caché incremental viven en frontmatter_index.py (compartido
+# con import_image.py); parse_frontmatter se reexporta aquí por comodidad.
 
 def extract_title_from_frontmatter(title):
     """Extrae palabras significativas del título para usar como título de imagen."""
@@ -228,14 +231,6 @@ def extract_title_from_frontmatter(title):
     return " ".join(result).upper()
 
 
-def truncate_subtitle(text, max_len=45):
-    """Trunca texto a max_len chars, cortando por palabra."""
-    if len(text) <= max_len:
-        return text
-    truncated = text[:max_len].rsplit(" ", 1)[0]
-    return truncated + "…"
-
-
 def tags_to_tree(tags):
     """Convierte lista de tags a formato tree."""
     if not tags:
@@ -260,7 +255,8 @@ def article_from_frontmatter(fm, filepath):
         return _CATALOG_INDEX[filename]
 
     title = extract_title_from_frontmatter(fm.get("title", "SIN TÍTULO"))
-    subtitle = truncate_subtitle(fm.get("description", ""))
+    # El subtítulo se recorta al dibujar, por píxeles (ver cover_layout)
+    subtitle = " ".join(fm.get("description", "").split())
     category = fm.get("category", "Linux")
     tags = fm.get("tags", [])
     tree_items = tags_to_tree(tags)
@@ -270,66 +266,339 @@ def article_from_frontmatter(fm, filepath):
 
 # --- Generación --------------------------------------------------------------
 
-def generate_image(filename, title, subtitle, category, tree_items):
-    font_regular = ImageFont.truetype(FONT_PATH, 16)
-    font_title = ImageFont.truetype(FONT_BOLD_PATH, 36)
-    font_subtitle = ImageFont.truetype(FONT_PATH, 18)
-    font_tree = ImageFont.truetype(FONT_PATH, 15)
+# Geometría de la ventana de terminal (compartida por base y texto)
+TERM_X, TERM_Y = 50, 45
+TERM_W, TERM_H = WIDTH - 100, HEIGHT - 90
+BAR_H = 32
+PROMPT_Y = TERM_Y + BAR_H + 20
+
+# Tipografía: el título prueba de mayor a menor hasta que cabe en el ancho
+# útil de la terminal; el subtítulo se recorta por píxeles a ese mismo ancho.
+TITLE_SIZES = (36, 34, 32, 30, 28, 26, 24)
+SUBTITLE_SIZE = 18
+TEXT_MAX_WIDTH = TERM_W - 40
+
+
+class CoverRenderer:
+    """Renderizador reutilizable de portadas.
+
+    Carga las fuentes una sola vez y guarda una imagen base por color de
+    acento con todo lo que no depende del artículo (borde, ventana, barra de
+    título, semáforo y prompt). Cada portada copia esa base y solo dibuja
+    título, subtítulo y árbol.
+    """
+
+    def __init__(self):
+        from PIL import ImageFont
+        from cover_layout import measurer_for
+
+        with STAGES.stage("fonts"):
+            self.font_regular = ImageFont.truetype(FONT_PATH, 16)
+            self.font_tree = ImageFont.truetype(FONT_PATH, 15)
+            self.subtitle_metrics = measurer_for(FONT_PATH, SUBTITLE_SIZE)
+            for size in TITLE_SIZES:
+                measurer_for(FONT_BOLD_PATH, size)
+        self._bases = {}  # accent -> Image
+
+    def base(self, accent):
+        """Devuelve (y cachea) el fondo pre-dibujado para un color de acento."""
+        img = self._bases.get(accent)
+        if img is None:
+            with STAGES.stage("chrome"):
+                img = self._draw_base(accent)
+            self._bases[accent] = img
+        return img
+
+    def _draw_base(self, accent):
+        from PIL import Image, ImageDraw
+
+        img = Image.new("RGB", (WIDTH, HEIGHT), BG)
+        draw = ImageDraw.Draw(img)
+
+        # Borde exterior con color de acento
+        draw.rectangle([20, 20, WIDTH - 21, HEIGHT - 21], outline=accent, width=2)
+
+        # Ventana de terminal
+        draw.rectangle([TERM_X, TERM_Y, TERM_X + TERM_W, TERM_Y + TERM_H],
+                        fill=TERMINAL_BG, outline=BORDER, width=1)
+
+        # Barra de título
+        draw.rectangle([TERM_X, TERM_Y, TERM_X + TERM_W, TERM_Y + BAR_H],
+                        fill="#1C2128", outline=BORDER, width=1)
+
+        # Dots (semáforo macOS)
+        dot_y = TERM_Y + BAR_H // 2
+        draw.ellipse([TERM_X + 14, dot_y - 5, TERM_X + 24, dot_y + 5], fill=DOT_RED)
+        draw.ellipse([TERM_X + 32, dot_y - 5, TERM_X + 42, dot_y + 5], fill=DOT_YELLOW)
+        draw.ellipse([TERM_X + 50, dot_y - 5, TERM_X + 60, dot_y + 5], fill=DOT_GREEN)
+
+        # Prompt
+        draw.text((TERM_X + 20, PROMPT_Y), "root@tengoping:~$ _",
+                  fill=MUTED, font=self.font_regular)
+        return img
+
+    def render(self, title, subtitle, category, tree_items):
+        """Devuelve la portada como Image (RGB, WIDTH x HEIGHT)."""
+        from PIL import ImageDraw
+        from cover_layout import fit_size, measurer_for
+
+        accent = CAT_COLORS.get(category, GREEN)
+        base = self.base(accent)
+
+        with STAGES.stage("measure"):
+            # Título: el mayor tamaño que cabe; subtítulo: recortado por píxeles
+            title_size = fit_size(title, FONT_BOLD_PATH, TITLE_SIZES, TEXT_MAX_WIDTH)
+            title_metrics = measurer_for(FONT_BOLD_PATH, title_size)
+            title = title_metrics.truncate(title, TEXT_MAX_WIDTH)
+            title_w = title_metrics.width(title)
+            subtitle = self.subtitle_metrics.truncate(subtitle, TEXT_MAX_WIDTH)
+            sub_w = self.subtitle_metrics.width(subtitle)
+
+        with STAGES.stage("draw"):
+            img = base.copy()
+            draw = ImageDraw.Draw(img)
+
+            # Título centrado (más pequeño → centrado también en vertical)
+            title_y = PROMPT_Y + 50
+            title_x = (WIDTH - title_w) // 2
+            draw.text((title_x, title_y + (TITLE_SIZES[0] - title_size) // 2), title,
+                      fill=accent, font=title_metrics.font)
+
+            # Subtítulo centrado
+            sub_y = title_y + 52
+            sub_x = (WIDTH - sub_w) // 2
+            draw.text((sub_x, sub_y), subtitle, fill=TEXT, font=self.subtitle_metrics.font)
+
+            # Árbol de ficheros
+            tree_y = sub_y + 50
+            for i, item in enumerate(tree_items):
+                color = GREEN if "└" in item else MUTED
+                draw.text((TERM_X + 60, tree_y + i * 24), item, fill=color, font=self.font_tree)
+
+        return img
+
+
+_renderer = None
+
+
+def get_renderer():
+    """Devuelve el CoverRenderer del proceso (uno por worker del pool)."""
+    global _renderer
+    if _renderer is None:
+        _renderer = CoverRenderer()
+    return _renderer
+
+
+def encode_cover(img, max_kb=None, fmt="jpg"):
+    """Codifica la portada en uno de COVER_FORMATS. Devuelve (bytes, calidad).
+
+    Con max_kb los formatos con pérdida buscan la mayor calidad (hasta la de
+    COVER_FORMATS) que cabe en ese presupuesto. El WebP sin pérdida no tiene
+    calidad que ajustar: se informa como 100.
+    """
+    from image_codec import encode, encode_to_budget
+
+    pil_format, params = COVER_FORMATS[fmt]
+    params = dict(params)
+    with STAGES.stage(f"encode.{fmt}"):
+        if params.get("lossless"):
+            return encode(img, pil_format, **params), 100
+        quality = params.pop("quality")
+        if max_kb:
+            return encode_to_budget(img, pil_format, max_kb, quality_max=quality, **params)
+        return encode(img, pil_format, quality=quality, **params), quality
+
+
+def cover_filename(filename, fmt):
+    """Nombre de la portada filename (<nombre>.jpg) en el formato fmt."""
+    return os.path.splitext(filename)[0] + "." + fmt
+
+
+def save_cover(img, filename, max_kb=None, formats=DEFAULT_FORMATS):
+    """Codifica la portada en cada formato y la escribe de forma atómica en OUT_DIR.
+
+    Un fichero que ya tiene esos mismos bytes no se reescribe (conserva su
+    mtime). Devuelve {"path", "quality", "bytes", "written"} del primer
+    formato y, en "files", un dict así por formato.
+    """
+    from image_codec import write_if_changed
+
+    files = []
+    for fmt in formats:
+        data, quality = encode_cover(img, max_kb, fmt)
+        path = os.path.join(OUT_DIR, cover_filename(filename, fmt))
+        with STAGES.stage("write"):
+            written = write_if_changed(path, data)
+        if written:
+            STAGES.add_bytes(len(data))
+        files.append({"path": path, "format": fmt, "quality": quality, "bytes": len(data),
+                      "written": written})
+    return {**files[0], "files": files}
+
+
+def render_cover_bytes(article, max_kb=None, fmt="jpg"):
+    """Renderiza y codifica la portada de article sin tocar el disco.
+
+    Devuelve {"data", "quality", "bytes"}; data son los mismos bytes que
+    escribiría save_cover para ese formato.
+    """
+    _, title, subtitle, category, tree_items = article
+    img = get_renderer().render(title, subtitle, category, tree_items)
+    data, quality = encode_cover(img, max_kb, fmt)
+    return {"data": data, "quality": quality, "bytes": len(data)}
+
+
+def generate_image(filename, title, subtitle, category, tree_items, max_kb=None):
+    img = get_renderer().render(title, subtitle, category, tree_items)
+    return save_cover(img, filename, max_kb)["path"]
+
+
+def _render_article(article, max_kb=None, formats=DEFAULT_FORMATS):
+    """Adaptador para el pool: recibe la tupla del artículo completa.
+
+    Devuelve el resultado de save_cover, con el marcador de posición (ver
+    placeholders.py) de cada fichero escrito en su entrada de "files", y las
+    muestras de tiempo del worker, que render_many suma a las del proceso
+    principal. El marcador sale del fichero y no del lienzo, igual que en
+    `optimize_images.py placeholders`: si no, cada uno escribiría el suyo.
+    """
+    from placeholders import file_placeholder
+
+    filename, title, subtitle, category, tree_items = article
+    img = get_renderer().render(title, subtitle, category, tree_items)
+    result = save_cover(img, filename, max_kb, formats)
+    with STAGES.stage("placeholder"):
+        for f in result["files"]:
+            f["placeholder"] = file_placeholder(f["path"])
+    result["timings"] = STAGES.drain()
+    return result
 
-    accent = CAT_COLORS.get(category, GREEN)
 
-    img = Image.new("RGB", (WIDTH, HEIGHT), BG)
-    draw = ImageDraw.Draw(img)
+def render_many(articles, jobs=None, max_kb=None, formats=DEFAULT_FORMATS):
+    """Genera las portadas de articles y devuelve un resultado por cada una.
 
-    # Borde exterior con color de acento
-    draw.rectangle([20, 20, WIDTH - 21, HEIGHT - 21], outline=accent, width=2)
+    Cada resultado es el dict de save_cover, en el mismo orden que articles.
+    Cada portada se dibuja una vez y se codifica en todos los formatos. Con
+    jobs > 1 reparte el render y la codificación entre procesos; el
+    resultado es idéntico al de la ejecución en serie. Registra el hash de
+    cada portada generada en el manifiesto, y el marcador de posición de
+    cada fichero en el placeholders.json de OUT_DIR.
+    """
+    if not articles:
+        return []
+    render = partial(_render_article, max_kb=max_kb, formats=formats)
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(articles) < 2:
+        results = [render(a) for a in articles]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=min(jobs, len(articles)),
+                                 initializer=reset_worker) as pool:
+            results = list(pool.map(render, articles))
+    for result in results:
+        STAGES.merge(result.pop("timings"))
+
+    manifest = load_manifest()
+    manifest.update({a[0]: render_hash(a, max_kb, formats) for a in articles})
+    save_manifest(manifest)
+
+    from placeholders import update_placeholders
+
+    update_placeholders(OUT_DIR, {
+        os.path.basename(f["path"]): f["placeholder"]
+        for result in results for f in result["files"]
+    })
+    return results
+
+
+def format_result(result):
+    """' (q85, 42 KB)': calidad y peso finales de una portada.
+
+    Con varios formatos, uno por formato: ' (avif q70 7 KB, jpg q90 35 KB)'.
+    """
+    files = result.get("files", [result])
+    if len(files) == 1:
+        quality = f" (q{result['quality']}, {max(1, result['bytes'] // 1024)} KB)"
+    else:
+        quality = " (" + ", ".join(
+            f"{f['format']} q{f['quality']} {max(1, f['bytes'] // 1024)} KB" for f in files
+        ) + ")"
+    return quality + format_unchanged(result)
+
+
+def format_unchanged(result):
+    """' (sin cambios)' si ningún fichero de la portada se reescribió."""
+    files = result.get("files", [result])
+    return "" if any(f.get("written", True) for f in files) else " (sin cambios)"
+
+
+# --- Manifiesto incremental --------------------------------------------------
+
+def _theme():
+    """Constantes que afectan al render (si cambian, cambian todas las portadas)."""
+    return {
+        "size": [WIDTH, HEIGHT],
+        "fonts": [FONT_PATH, FONT_BOLD_PATH],
+        "colors": [BG, TERMINAL_BG, BORDER, TEXT, GREEN, MUTED,
+                   DOT_RED, DOT_YELLOW, DOT_GREEN],
+        "categories": CAT_COLORS,
+    }
+
+
+def render_hash(article, max_kb=None, formats=DEFAULT_FORMATS):
+    """Hash de las entradas del render: tupla del artículo, tema, codificación y versión."""
+    payload = json.dumps(
+        {"article": list(article), "theme": _theme(), "version": RENDERER_VERSION,
+         "encoding": {"formats": {fmt: COVER_FORMATS[fmt] for fmt in formats},
+                      "max_kb": max_kb}},
+        ensure_ascii=False, sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
 
-    # Ventana de terminal
-    term_x, term_y = 50, 45
-    term_w, term_h = WIDTH - 100, HEIGHT - 90
-    draw.rectangle([term_x, term_y, term_x + term_w, term_y + term_h],
-                    fill=TERMINAL_BG, outline=BORDER, width=1)
 
-    # Barra de título
-    bar_h = 32
-    draw.rectangle([term_x, term_y, term_x + term_w, term_y + bar_h],
-                    fill="#1C2128", outline=BORDER, width=1)
+def load_manifest():
+    """Devuelve el manifiesto {fichero: hash}; vacío si no existe o está roto."""
+    try:
+        with open(COVERS_MANIFEST, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
 
-    # Dots (semáforo macOS)
-    dot_y = term_y + bar_h // 2
-    draw.ellipse([term_x + 14, dot_y - 5, term_x + 24, dot_y + 5], fill=DOT_RED)
-    draw.ellipse([term_x + 32, dot_y - 5, term_x + 42, dot_y + 5], fill=DOT_YELLOW)
-    draw.ellipse([term_x + 50, dot_y - 5, term_x + 60, dot_y + 5], fill=DOT_GREEN)
 
-    # Prompt
-    prompt_y = term_y + bar_h + 20
-    draw.text((term_x + 20, prompt_y), "root@tengoping:~$ _", fill=MUTED, font=font_regular)
+def save_manifest(manifest):
+    path = COVERS_MANIFEST
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(dict(sorted(manifest.items())), f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    os.replace(tmp, path)
 
-    # Título centrado
-    title_y = prompt_y + 50
-    bbox = draw.textbbox((0, 0), title, font=font_title)
-    title_x = (WIDTH - (bbox[2] - bbox[0])) // 2
-    draw.text((title_x, title_y), title, fill=accent, font=font_title)
 
-    # Subtítulo centrado
-    sub_y = title_y + 52
-    bbox = draw.textbbox((0, 0), subtitle, font=font_subtitle)
-    sub_x = (WIDTH - (bbox[2] - bbox[0])) // 2
-    draw.text((sub_x, sub_y), subtitle, fill=TEXT, font=font_subtitle)
+def covers_exist(filename, formats=DEFAULT_FORMATS):
+    """True si la portada existe en todos los formatos."""
+    return all(os.path.exists(os.path.join(OUT_DIR, cover_filename(filename, fmt)))
+               for fmt in formats)
 
-    # Árbol de ficheros
-    tree_y = sub_y + 50
-    for i, item in enumerate(tree_items):
-        color = GREEN if "└" in item else MUTED
-        draw.text((term_x + 60, tree_y + i * 24), item, fill=color, font=font_tree)
 
-    path = os.path.join(OUT_DIR, filename)
-    img.save(path, "JPEG", quality=90)
-    return path
+def is_stale(article, manifest, max_kb=None, formats=DEFAULT_FORMATS):
+    """True si falta algún formato de la portada o su hash no coincide con el
+    del manifiesto."""
+    filename = article[0]
+    if not covers_exist(filename, formats):
+        return True
+    return manifest.get(filename) != render_hash(article, max_kb, formats)
 
 
 # --- Comandos ----------------------------------------------------------------
 
+def show_quality(args):
+    """¿Se imprime calidad y peso de cada portada? Con --max-kb o varios formatos."""
+    return bool(args.max_kb) or args.formats != DEFAULT_FORMATS
+
+
 def cmd_list(args):
     """Lista las entradas del catálogo."""
     articles = ARTICLES
@@ -344,32 +613,33 @@ def cmd_list(args):
 
 
 def cmd_check(args):
-    """Detecta imágenes huérfanas y faltantes."""
+    """Detecta imágenes huérfanas y faltantes (portadas y figuras del cuerpo)."""
+    index = load_index(CONTENT_DIR, FRONTMATTER_CACHE, refs=True, jobs=args.jobs)
+
     # Recopilar imágenes referenciadas en frontmatter
     referenced = {}  # filename -> post filepath
     posts_sin_image = []
 
-    for fname in sorted(os.listdir(CONTENT_DIR)):
-        if not fname.endswith((".md", ".mdx")):
-            continue
-        fpath = os.path.join(CONTENT_DIR, fname)
-        fm = parse_frontmatter(fpath)
+    for fname, fm in index.posts():
         image = fm.get("image", "")
         if image:
             referenced[os.path.basename(image)] = fname
         else:
             posts_sin_image.append(fname)
 
-    # Imágenes existentes en disco (solo .jpg generadas por este script)
+    # Imágenes existentes en disco (solo las de los formatos de este script)
     existing = set()
     if os.path.isdir(OUT_DIR):
-        existing = {f for f in os.listdir(OUT_DIR) if f.endswith(".jpg")}
+        suffixes = tuple("." + fmt for fmt in COVER_FORMATS)
+        existing = {f for f in os.listdir(OUT_DIR) if f.endswith(suffixes)}
 
     # Faltantes: referenciadas pero no existen
     missing = {f: post for f, post in referenced.items() if f not in existing}
 
-    # Huérfanas: existen pero no referenciadas (solo las .jpg que parecen generadas)
-    orphans = existing - set(referenced.keys())
+    # Huérfanas: existen pero no referenciadas. Los otros formatos de una
+    # portada referenciada (x.avif junto a x.jpg) no cuentan como huérfanas.
+    referenced_stems = {os.path.splitext(f)[0] for f in referenced}
+    orphans = {f for f in existing if os.path.splitext(f)[0] not in referenced_stems}
 
     print("=== Comprobación de imágenes ===\n")
 
@@ -396,15 +666,106 @@ def cmd_check(args):
     else:
         print("POSTS SIN IMAGEN: ninguno ✓")
 
+    check_body_images(index, prune_orphans=args.prune)
 
-def cmd_auto(args):
-    """Auto-genera imágenes desde frontmatter de los .md/.mdx."""
+
+def check_body_images(index, prune_orphans=False):
+    """Cruza las figuras del cuerpo de los posts con src/assets/images/blog."""
+    graph = AssetGraph(index.refs(), os.path.join(OUT_DIR, "blog"))
+    missing = graph.missing()
+    orphans = graph.orphans()
+
+    print("\n=== Imágenes del cuerpo (/images/blog) ===\n")
+    if missing:
+        print(f"FALTANTES ({len(missing)}):")
+        for public, post, line in missing:
+            print(f"  ✗ {post}:{line}  {public}")
+    else:
+        print("FALTANTES: ninguna ✓")
+
+    print()
+    if orphans:
+        total = sum(graph.assets[p] for p in orphans)
+        print(f"HUÉRFANAS ({len(orphans)}, {total / 1024:.0f} KB):")
+        for public in orphans:
+            print(f"  ? {public}  ({graph.assets[public] / 1024:.0f} KB)")
+    else:
+        print("HUÉRFANAS: ninguna ✓")
+
+    if prune_orphans and orphans:
+        removed, freed = prune(graph)
+        print(f"\nBorradas {len(removed)} huérfanas ({freed / 1024:.0f} KB)")
+
+
+def select_weight_posts(paths, graph, covers):
+    """Posts a los que afectan paths (para --weights desde lint-staged).
+
+    Un post (.md/.mdx) se afecta a sí mismo; una figura de blog/<slug>/, a
+    ese post y a los que la referencian; una portada, a los posts que la
+    usan en su frontmatter.
+    """
+    by_stem = {os.path.splitext(post)[0]: post for post in covers}
+    blog_dir = os.path.realpath(graph.assets_dir)
+    selected = set()
+    for raw in paths:
+        path = os.path.realpath(raw)
+        name = os.path.basename(path)
+        if name.endswith((".md", ".mdx")):
+            if name in covers:
+                selected.add(name)
+        elif path.startswith(blog_dir + os.sep):
+            rel = os.path.relpath(path, blog_dir)
+            slug = rel.split(os.sep)[0]
+            if slug in by_stem:
+                selected.add(by_stem[slug])
+            public = graph.public_path(graph.assets_dir / rel)
+            selected.update(post for post, _ in graph.refs.get(public, []))
+        else:
+            selected.update(post for post, cover in covers.items()
+                            if cover is not None and cover.name == name)
+    return selected
+
+
+def cmd_weights(args):
+    """Peso de las imágenes de cada post (portada y figuras), del más pesado
+    al más ligero. Con --budget sale con 1 si algún post lo supera."""
+    index = load_index(CONTENT_DIR, FRONTMATTER_CACHE, refs=True, jobs=args.jobs)
+    covers = {
+        fname: Path(OUT_DIR) / os.path.basename(fm["image"]) if fm.get("image") else None
+        for fname, fm in index.posts()
+    }
+    graph = AssetGraph(index.refs(), os.path.join(OUT_DIR, "blog"))
+    if args.files:
+        selected = select_weight_posts(args.files, graph, covers)
+        covers = {post: cover for post, cover in covers.items() if post in selected}
+        if not covers:
+            return
+    weights = post_weights(graph, covers)
+    budget = args.budget * 1024 if args.budget else None
+
+    print("=== Peso de las imágenes por post ===\n")
+    for row in weights:
+        over = budget is not None and row["bytes"] > budget
+        mark = f"  ✗ supera {args.budget} KB" if over else ""
+        print(f"  {row['bytes'] / 1024:>7.0f} KB {row['count']:>3} imgs  {row['post']}{mark}")
+        for name, size in row["files"][:WEIGHT_TOP_FILES]:
+            print(f"  {'':>7}    {size / 1024:>6.0f} KB  {name}")
+
+    total = sum(row["bytes"] for row in weights)
+    print(f"\nTotal: {len(weights)} posts, {total / 1024:.0f} KB")
+    if budget is not None:
+        heavy = [row for row in weights if row["bytes"] > budget]
+        if heavy:
+            print(f"✗ {len(heavy)} post(s) superan el presupuesto de {args.budget} KB")
+            sys.exit(1)
+        print(f"Todos dentro del presupuesto de {args.budget} KB ✓")
+
+
+def collect_articles(index, category=None):
+    """Tuplas de artículo de los posts publicados del índice, en orden."""
     articles = []
-    for fname in sorted(os.listdir(CONTENT_DIR)):
-        if not fname.endswith((".md", ".mdx")):
-            continue
+    for fname, fm in index.posts():
         fpath = os.path.join(CONTENT_DIR, fname)
-        fm = parse_frontmatter(fpath)
 
         if fm.get("draft", False):
             continue
@@ -415,27 +776,289 @@ def cmd_auto(args):
 
         articles.append(article)
 
-    if args.category:
-        articles = [a for a in articles if a[3] == args.category]
+    if category:
+        articles = [a for a in articles if a[3] == category]
+    return articles
+
+
+def cmd_auto(args):
+    """Auto-genera imágenes desde frontmatter de los .md/.mdx."""
+    articles = collect_articles(load_index(CONTENT_DIR, FRONTMATTER_CACHE), args.category)
 
     if not articles:
         print("No se encontraron artículos para generar.")
         return
 
     os.makedirs(OUT_DIR, exist_ok=True)
-    generated = 0
-    skipped = 0
 
-    for filename, title, subtitle, category, tree_items in articles:
-        path = os.path.join(OUT_DIR, filename)
-        if os.path.exists(path) and not args.force:
-            skipped += 1
+    # Si dos posts comparten imagen, gana el último (como en una pasada en
+    # serie); así dos workers nunca escriben el mismo fichero a la vez.
+    unique = list({a[0]: a for a in articles}.values())
+    if args.force:
+        pending = unique
+    elif args.changed:
+        manifest = load_manifest()
+        pending = [a for a in unique if is_stale(a, manifest, args.max_kb, args.formats)]
+    else:
+        pending = [a for a in unique if not covers_exist(a[0], args.formats)]
+    skipped = len(articles) - len(pending)
+
+    results = render_many(pending, args.jobs, args.max_kb, args.formats)
+    for (filename, title, subtitle, category, tree_items), result in zip(pending, results):
+        extra = format_result(result) if show_quality(args) else format_unchanged(result)
+        print(f"  OK {filename:<30} [{category}] {title}{extra}")
+
+    print(f"\nGeneradas: {len(pending)}  Omitidas: {skipped}  Total: {len(articles)}")
+
+
+def snapshot_content():
+    """{fichero: (mtime_ns, tamaño)} de los posts: barato de comparar en cada sondeo."""
+    snap = {}
+    with os.scandir(CONTENT_DIR) as it:
+        for entry in it:
+            if entry.is_file() and entry.name.endswith((".md", ".mdx")):
+                st = entry.stat()
+                snap[entry.name] = (st.st_mtime_ns, st.st_size)
+    return snap
+
+
+def render_stale(index, args):
+    """Relee solo los posts cambiados y regenera las portadas cuyo hash cambió."""
+    index.refresh()
+    articles = collect_articles(index, args.category)
+    manifest = load_manifest()
+    stale = [a for a in {a[0]: a for a in articles}.values()
+             if is_stale(a, manifest, args.max_kb, args.formats)]
+    # En serie: el renderer de este proceso ya tiene fuentes y bases cargadas
+    results = render_many(stale, jobs=1, max_kb=args.max_kb, formats=args.formats)
+    for (filename, title, subtitle, category, tree_items), result in zip(stale, results):
+        extra = format_result(result) if show_quality(args) else format_unchanged(result)
+        print(f"  OK {filename:<30} [{category}] {title}{extra}", flush=True)
+    return len(stale)
+
+
+def cmd_watch(args, max_polls=None, sleep=time.sleep, clock=time.monotonic):
+    """Vigila CONTENT_DIR y regenera las portadas afectadas al guardar.
+
+    Sondea mtime/tamaño cada args.interval segundos. Un cambio se procesa
+    cuando los posts llevan args.debounce segundos sin moverse, así una
+    ráfaga de guardados del editor produce un solo render. max_polls, sleep
+    y clock existen para los tests.
+    """
+    os.makedirs(OUT_DIR, exist_ok=True)
+    index = load_index(CONTENT_DIR, FRONTMATTER_CACHE)
+    get_renderer()  # fuentes cargadas antes del primer cambio
+    generated = render_stale(index, args)
+    print(f"Vigilando {os.path.normpath(CONTENT_DIR)} "
+          f"({generated} portadas al día). Ctrl+C para salir.", flush=True)
+
+    last = snapshot_content()
+    changed_at = None
+    polls = 0
+    try:
+        while max_polls is None or polls < max_polls:
+            sleep(args.interval)
+            polls += 1
+            snap = snapshot_content()
+            now = clock()
+            if snap != last:
+                last, changed_at = snap, now
+                continue
+            if changed_at is not None and now - changed_at >= args.debounce:
+                changed_at = None
+                if not render_stale(index, args):
+                    print("  (sin cambios en las portadas)", flush=True)
+    except KeyboardInterrupt:
+        print("\nFin de la vigilancia.")
+
+
+def collect_og_cards(index, category=None):
+    """(id, título, categoría) de los posts publicados, como las rutas de
+    src/pages/og/[...id].png.ts."""
+    cards = []
+    for fname, fm in index.posts():
+        if fm.get("draft", False):
+            continue
+        cat = fm.get("category", "Linux")
+        if category and cat != category:
             continue
-        generate_image(filename, title, subtitle, category, tree_items)
-        print(f"  OK {filename:<30} [{category}] {title}")
-        generated += 1
+        cards.append((os.path.splitext(fname)[0], fm.get("title", "SIN TÍTULO"), cat))
+    return cards
+
+
+def cmd_og(args):
+    """Pre-renderiza las tarjetas Open Graph (1200x630) en .cache/og."""
+    from og_cards import OG_DIR, render_cards
+
+    cards = collect_og_cards(load_index(CONTENT_DIR, FRONTMATTER_CACHE), args.category)
+    # Con --category no se conoce el resto de posts: no se borra nada
+    results, removed = render_cards(cards, OG_DIR, jobs=args.jobs, force=args.force,
+                                    prune=not args.category)
+    titles = {card[0]: (card[1], card[2]) for card in cards}
+    for result in results:
+        title, category = titles[result["id"]]
+        print(f"  OK {result['id'] + '.png':<45} [{category}] {title}")
+    for card_id in removed:
+        print(f"  -- {card_id}.png")
+
+    print(f"\nGeneradas: {len(results)}  Omitidas: {len(cards) - len(results)}  "
+          f"Borradas: {len(removed)}  ({os.path.relpath(OG_DIR)})")
+
+
+# --- Vista previa ------------------------------------------------------------
+
+PREVIEW_HOST = "127.0.0.1"
+PREVIEW_PORT = 8765
+# Portadas codificadas que guarda el servidor en memoria (~40 KB cada una)
+PREVIEW_CACHE_SIZE = 128
+PREVIEW_COVER_RE = re.compile(r"/cover/([\w.-]+)\.jpg")
+
+
+class CoverPreview:
+    """Portadas de los posts renderizadas en memoria, con caché LRU.
+
+    Los JPEG se guardan por render_hash: dos posts con las mismas entradas
+    comparten entrada y un cambio de tema o de RENDERER_VERSION nunca sirve
+    bytes viejos. De cada post se recuerda su mtime; mientras no cambie no se
+    relee el frontmatter, y si cambia junto con el hash se descarta la
+    portada anterior. Nada se escribe en OUT_DIR.
+    """
+
+    def __init__(self, content_dir=None, max_kb=None, capacity=PREVIEW_CACHE_SIZE):
+        self.content_dir = content_dir or CONTENT_DIR
+        self.max_kb = max_kb
+        self.capacity = capacity
+        self._posts = {}  # slug -> (mtime_ns, article, hash)
+        self._covers = OrderedDict()  # hash -> JPEG, del menos al más reciente
+        self.hits = 0
+        self.misses = 0
+
+    def slugs(self):
+        """Slugs de los posts de content_dir, ordenados."""
+        return sorted(os.path.splitext(f)[0] for f in os.listdir(self.content_dir)
+                      if f.endswith((".md", ".mdx")))
+
+    def _post_path(self, slug):
+        for ext in (".mdx", ".md"):
+            path = os.path.join(self.content_dir, slug + ext)
+            if os.path.isfile(path):
+                return path
+        return None
 
-    print(f"\nGeneradas: {generated}  Omitidas: {skipped}  Total: {len(articles)}")
+    def article(self, slug):
+        """(tupla de artículo, render_hash) del post, o None si no existe."""
+        path = self._post_path(slug)
+        cached = self._posts.get(slug)
+        if path is None:
+            if cached is not None:
+                del self._posts[slug]
+                self._covers.pop(cached[2], None)
+            return None
+        mtime = os.stat(path).st_mtime_ns
+        if cached is not None and cached[0] == mtime:
+            return cached[1], cached[2]
+
+        fm = parse_frontmatter(path)
+        # Un post que aún no declara image también tiene vista previa
+        fm = {**fm, "image": fm.get("image") or f"{slug}.jpg"}
+        article = article_from_frontmatter(fm, path)
+        key = render_hash(article, self.max_kb)
+        if cached is not None and cached[2] != key:
+            self._covers.pop(cached[2], None)
+        self._posts[slug] = (mtime, article, key)
+        return article, key
+
+    def cover(self, slug):
+        """(render_hash, JPEG) de la portada del post, o None si no existe."""
+        found = self.article(slug)
+        if found is None:
+            return None
+        article, key = found
+        data = self._covers.get(key)
+        if data is not None:
+            self._covers.move_to_end(key)
+            self.hits += 1
+            return key, data
+
+        self.misses += 1
+        data = render_cover_bytes(article, self.max_kb)["data"]
+        self._covers[key] = data
+        if len(self._covers) > self.capacity:
+            self._covers.popitem(last=False)
+        return key, data
+
+
+def preview_index_html(preview):
+    """Página de inicio del servidor: un enlace por post."""
+    import html
+
+    items = "\n".join(
+        f'<li><a href="/cover/{html.escape(slug)}.jpg">{html.escape(slug)}</a></li>'
+        for slug in preview.slugs()
+    )
+    return ("<!doctype html><meta charset=\"utf-8\"><title>Portadas</title>"
+            f"<h1>Portadas</h1><ul>\n{items}\n</ul>\n")
+
+
+def make_preview_handler(preview):
+    """Clase de handler HTTP que sirve las portadas de preview."""
+    from http.server import BaseHTTPRequestHandler
+    from urllib.parse import unquote, urlsplit
+
+    class PreviewHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = unquote(urlsplit(self.path).path)
+            if path in ("/", "/index.html"):
+                self._send(preview_index_html(preview).encode("utf-8"),
+                           "text/html; charset=utf-8")
+                return
+            match = PREVIEW_COVER_RE.fullmatch(path)
+            found = preview.article(match.group(1)) if match else None
+            if found is None:
+                self.send_error(404, "Post no encontrado")
+                return
+            # El navegador revalida en cada recarga: si el hash no cambió,
+            # 304 sin renderizar ni codificar nada.
+            etag = f'"{found[1]}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            _, data = preview.cover(match.group(1))
+            self._send(data, "image/jpeg", etag)
+
+        def _send(self, body, content_type, etag=None):
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-cache")
+            if etag:
+                self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+    return PreviewHandler
+
+
+def cmd_serve(args):
+    """Servidor local que renderiza /cover/<slug>.jpg al vuelo, sin escribir nada."""
+    from http.server import HTTPServer
+
+    preview = CoverPreview(max_kb=args.max_kb)
+    get_renderer()  # fuentes cargadas antes de la primera petición
+    # Un solo hilo: el renderer y su caché de bases no se comparten entre hilos
+    server = HTTPServer((PREVIEW_HOST, args.port), make_preview_handler(preview))
+    host, port = server.server_address[:2]
+    print(f"Vista previa en http://{host}:{port}/  (/cover/<slug>.jpg). "
+          "Ctrl+C para salir.", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\nFin de la vista previa ({preview.misses} renders, "
+              f"{preview.hits} desde caché).")
+    finally:
+        server.server_close()
 
 
 def cmd_new(args):
@@ -487,8 +1110,10 @@ def cmd_new(args):
         tree_items = ["└── ..."]
 
     os.makedirs(OUT_DIR, exist_ok=True)
-    path = generate_image(filename, title, subtitle, category, tree_items)
-    print(f"\n  OK {path}")
+    [result] = render_many([(filename, title, subtitle, category, tree_items)], jobs=1,
+                           max_kb=args.max_kb, formats=args.formats)
+    extra = format_result(result) if show_quality(args) else format_unchanged(result)
+    print(f"\n  OK {result['path']}{extra}")
 
 
 def cmd_catalog(args):
@@ -507,15 +1132,27 @@ def cmd_catalog(args):
             sys.exit(1)
 
     os.makedirs(OUT_DIR, exist_ok=True)
-    for filename, title, subtitle, category, tree_items in articles:
-        path = generate_image(filename, title, subtitle, category, tree_items)
-        print(f"  OK {path}")
+    for result in render_many(articles, args.jobs, args.max_kb, args.formats):
+        extra = format_result(result) if show_quality(args) else format_unchanged(result)
+        print(f"  OK {result['path']}{extra}")
 
     print(f"\nGeneradas {len(articles)} imágenes en {OUT_DIR}")
 
 
 # --- CLI ---------------------------------------------------------------------
 
+def parse_formats(value):
+    """'avif,webp,jpg' -> ('avif', 'webp', 'jpg'), validando cada formato."""
+    formats = tuple(dict.fromkeys(f.strip().lower().lstrip(".") for f in value.split(",")
+                                  if f.strip()))
+    unknown = [f for f in formats if f not in COVER_FORMATS]
+    if unknown or not formats:
+        raise argparse.ArgumentTypeError(
+            f"formato no soportado: {', '.join(unknown) or value!r} "
+            f"(usa {', '.join(COVER_FORMATS)})")
+    return formats
+
+
 def build_parser():
     parser = argparse.ArgumentParser(
         description="Genera imágenes de portada con estética terminal para el blog.",
@@ -527,8 +1164,17 @@ Ejemplos:
   %(prog)s --auto                   Auto-genera desde frontmatter
   %(prog)s --auto --force           Regenera todas (sobreescribe)
   %(prog)s --auto --category Linux  Auto-genera solo las de Linux
+  %(prog)s --auto --changed         Regenera solo las que cambiaron
+  %(prog)s --auto --force --jobs 4  Regenera todas en 4 procesos
+  %(prog)s --auto --formats avif,webp,jpg  Cada portada en AVIF, WebP y JPEG
+  %(prog)s --watch                  Regenera al guardar los posts
+  %(prog)s --serve                  Vista previa en http://127.0.0.1:8765/
+  %(prog)s --og                     Tarjetas OG de los posts (solo las que cambiaron)
   %(prog)s --new                    Modo interactivo
   %(prog)s --check                  Comprueba huérfanas/faltantes
+  %(prog)s --check --prune          Borra las figuras huérfanas
+  %(prog)s --weights                Peso de las imágenes de cada post
+  %(prog)s --weights --budget 1024 post.mdx  Falla si el post pasa de 1024 KB
   %(prog)s --list                   Lista el catálogo
         """,
     )
@@ -536,19 +1182,57 @@ Ejemplos:
     mode = parser.add_mutually_exclusive_group()
     mode.add_argument("--auto", action="store_true",
                       help="auto-genera desde frontmatter de los .md/.mdx")
+    mode.add_argument("--watch", action="store_true",
+                      help="vigila los posts y regenera las portadas que cambien")
+    mode.add_argument("--serve", action="store_true",
+                      help="servidor local de vista previa: /cover/<slug>.jpg se "
+                           "renderiza en memoria desde el frontmatter")
+    mode.add_argument("--og", action="store_true",
+                      help="pre-renderiza las tarjetas Open Graph 1200x630 en .cache/og")
     mode.add_argument("--new", action="store_true",
                       help="modo interactivo para crear una imagen nueva")
     mode.add_argument("--check", action="store_true",
-                      help="detecta imágenes huérfanas y faltantes")
+                      help="detecta portadas y figuras del cuerpo huérfanas y faltantes")
+    mode.add_argument("--weights", action="store_true",
+                      help="peso de las imágenes de cada post (portada y figuras), "
+                           "del más pesado al más ligero")
     mode.add_argument("--list", action="store_true",
                       help="lista las entradas del catálogo")
 
     parser.add_argument("--category", type=str, default=None,
                         help="filtra por categoría")
     parser.add_argument("--force", action="store_true",
-                        help="sobreescribe imágenes existentes (con --auto)")
+                        help="sobreescribe imágenes existentes (con --auto y --og)")
+    parser.add_argument("--changed", action="store_true",
+                        help="regenera solo las portadas cuyo frontmatter o tema "
+                             "cambió según el manifiesto (con --auto)")
+    parser.add_argument("--prune", action="store_true",
+                        help="borra las imágenes del cuerpo huérfanas (con --check)")
+    parser.add_argument("--budget", type=int, default=None, metavar="KB",
+                        help="con --weights, sale con error si algún post pasa de KB")
+    parser.add_argument("--max-kb", type=int, default=None, metavar="KB",
+                        help="ajusta la calidad (JPEG y AVIF) para que cada portada no pase de KB")
+    parser.add_argument("--formats", type=parse_formats, default=DEFAULT_FORMATS,
+                        metavar="F1,F2",
+                        help="formatos de las portadas, separados por comas: "
+                             f"{', '.join(COVER_FORMATS)} (por defecto: jpg)")
+    parser.add_argument("--jobs", "-j", type=int, default=None, metavar="N",
+                        help="procesos para renderizar o escanear posts (por defecto: núcleos de la CPU)")
+    parser.add_argument("--interval", type=float, default=0.5, metavar="SEG",
+                        help="segundos entre sondeos (con --watch, por defecto 0.5)")
+    parser.add_argument("--debounce", type=float, default=0.3, metavar="SEG",
+                        help="segundos de calma antes de regenerar (con --watch, por defecto 0.3)")
+    parser.add_argument("--port", type=int, default=PREVIEW_PORT, metavar="PUERTO",
+                        help=f"puerto del servidor (con --serve, por defecto {PREVIEW_PORT})")
+    parser.add_argument("--timings", action="store_true",
+                        help="muestra el tiempo por etapa (total, media, p95) y lo "
+                             "guarda en .cache/timings/generate-images.json")
+    parser.add_argument("--profile", default=None, metavar="FICHERO.prof",
+                        help="ejecuta bajo cProfile y guarda las estadísticas "
+                             "(usa -j 1 para incluir el render)")
     parser.add_argument("files", nargs="*", metavar="fichero.jpg",
-                        help="ficheros específicos del catálogo a generar")
+                        help="ficheros específicos del catálogo a generar (con --weights: "
+                             "posts o imágenes; solo se miran los posts afectados)")
 
     return parser
 
@@ -556,17 +1240,32 @@ Ejemplos:
 def main():
     parser = build_parser()
     args = parser.parse_args()
+    if "avif" in args.formats:
+        from PIL import features
+
+        if not features.check("avif"):
+            parser.error("--formats avif requiere Pillow con soporte AVIF (11.3 o posterior)")
 
     if args.auto:
-        cmd_auto(args)
+        command = cmd_auto
+    elif args.watch:
+        command = cmd_watch
+    elif args.serve:
+        command = cmd_serve
+    elif args.og:
+        command = cmd_og
     elif args.new:
-        cmd_new(args)
+        command = cmd_new
     elif args.check:
-        cmd_check(args)
+        command = cmd_check
+    elif args.weights:
+        command = cmd_weights
     elif args.list:
-        cmd_list(args)
+        command = cmd_list
     else:
-        cmd_catalog(args)
+        command = cmd_catalog
+    run_instrumented(partial(command, args), "generate-images",
+                     timings=args.timings, profile=args.profile)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,361 @@
+"""
+image_codec.py – Codificación de imágenes compartida por los scripts.
+
+Lo usan generate-images.py (portadas), import_image.py (figuras) y
+optimize_images.py: normalizar (orientación, sRGB, sin metadatos), codificar
+en memoria, ajustar la calidad a un presupuesto de KB, elegir entre WebP sin
+pérdida, con paleta o con pérdida según el contenido, comparar dos versiones
+de una imagen (PSNR, SSIM) y escribir el resultado de forma atómica.
+
+La salida es reproducible: mismos píxeles dan los mismos bytes en cualquier
+máquina con la misma versión de Pillow (y de libwebp/libavif). encode() fija
+los parámetros del codificador y no incrusta metadatos salvo que se pidan, y
+write_if_changed() no reescribe un fichero cuyo contenido ya es ese.
+"""
+
+from __future__ import annotations
+
+import io
+import math
+import os
+from pathlib import Path
+
+from PIL import ExifTags, Image, ImageChops, ImageFilter, ImageMath, ImageOps
+
+try:
+    from PIL import ImageCms
+except ImportError:  # Pillow compilado sin LittleCMS
+    ImageCms = None
+
+# Calidad mínima que acepta la búsqueda por presupuesto: por debajo los
+# artefactos se notan demasiado en capturas con texto.
+QUALITY_FLOOR = 40
+# Lado de los bloques sobre los que se calcula la SSIM
+SSIM_BLOCK = 8
+# Claves de img.info que normalize() descarta (y cuenta como metadatos)
+METADATA_KEYS = ("exif", "icc_profile", "xmp", "XML:com.adobe.xmp", "photoshop",
+                 "comment", "iptc")
+# Orientaciones EXIF que giran 90°: intercambian ancho y alto
+ROTATING_ORIENTATIONS = {5, 6, 7, 8}
+
+# Clasificación para choose_webp. Con hasta PALETTE_COLORS colores exactos la
+# imagen ya es su propia paleta: WebP sin pérdida. Hasta SCREENSHOT_COLORS y
+# con bordes nítidos es una captura (texto, UI): cuantizada a PALETTE_COLORS
+# conserva el texto y pesa menos que con pérdida. El resto, con pérdida.
+PALETTE_COLORS = 256
+SCREENSHOT_COLORS = 4096
+# Lado de la miniatura en la que se mide la densidad de bordes
+ANALYSIS_SIZE = 512
+# Un píxel es borde si FIND_EDGES da al menos EDGE_LEVEL; una captura tiene al
+# menos SCREENSHOT_EDGES de sus píxeles en bordes.
+EDGE_LEVEL = 64
+SCREENSHOT_EDGES = 0.02
+# Red de seguridad: si sin pérdida o con paleta pesa más de LOSSLESS_MAX_RATIO
+# veces lo que pesa con pérdida, la clasificación falló y gana la con pérdida.
+LOSSLESS_MAX_RATIO = 1.5
+WEBP_ENCODINGS = ("lossless", "palette", "lossy")
+
+# Parámetros que encode() pasa siempre explícitos en vez de fiarse de los
+# valores por defecto de Pillow y los códecs, que cambian entre versiones.
+# Son los valores por defecto actuales: no cambian ningún byte. El AVIF va en
+# un solo hilo: con varios (Pillow usa tantos como núcleos) los bytes
+# dependen de la máquina que codifica.
+PINNED_PARAMS = {
+    "JPEG": {"subsampling": "4:2:0", "optimize": False, "progressive": False},
+    "WEBP": {"method": 4, "exact": False},
+    "AVIF": {"speed": 6, "subsampling": "4:2:0", "max_threads": 1},
+    "PNG": {"optimize": False},
+}
+# PNG y AVIF copian por defecto el ICC y el EXIF de img.info en la salida
+NO_METADATA = {"icc_profile": None, "exif": b""}
+
+
+def orientation(img: Image.Image) -> int:
+    """Orientación EXIF (1 = normal) leída sin decodificar los píxeles."""
+    return img.getexif().get(ExifTags.Base.Orientation, 1)
+
+
+def metadata_bytes(img: Image.Image) -> int:
+    """Bytes de metadatos (EXIF, ICC, XMP...) que trae img.info."""
+    return sum(len(img.info[key]) for key in METADATA_KEYS
+               if isinstance(img.info.get(key), (bytes, str)))
+
+
+def _to_srgb(img: Image.Image) -> Image.Image:
+    icc = img.info.get("icc_profile")
+    if not icc or ImageCms is None or img.mode not in ("RGB", "RGBA", "CMYK"):
+        return img.convert("RGB") if img.mode == "CMYK" else img
+    try:
+        profile = ImageCms.ImageCmsProfile(io.BytesIO(icc))
+        if "sRGB" in ImageCms.getProfileDescription(profile):
+            return img
+        mode = "RGBA" if img.mode == "RGBA" else "RGB"
+        return ImageCms.profileToProfile(img, profile, ImageCms.createProfile("sRGB"),
+                                         outputMode=mode)
+    except (ImageCms.PyCMSError, OSError):
+        # Perfil corrupto: mejor los píxeles tal cual que abortar la importación
+        return img.convert("RGB") if img.mode == "CMYK" else img
+
+
+def normalize(img: Image.Image) -> tuple[Image.Image, dict]:
+    """Orienta img según su EXIF, la pasa a sRGB y descarta los metadatos.
+
+    Devuelve (imagen, informe) con "metadata_bytes" (lo descartado),
+    "transposed" y "converted" (si se aplicó el perfil ICC). Solo se
+    conserva la transparencia de img.info. Sin ImageCms la conversión de
+    color se omite y el perfil simplemente se descarta. Si no hay nada que
+    girar ni convertir se devuelve la misma img, con su info ya limpio.
+    """
+    report = {
+        "metadata_bytes": metadata_bytes(img),
+        "transposed": orientation(img) != 1,
+        "converted": False,
+    }
+    info = img.info
+    img = ImageOps.exif_transpose(img) if report["transposed"] else img
+    converted = _to_srgb(img)
+    report["converted"] = converted is not img and bool(info.get("icc_profile"))
+    img = converted
+    img.info = {key: info[key] for key in ("transparency",) if key in info}
+    return img, report
+
+
+def encode(img: Image.Image, fmt: str, **params) -> bytes:
+    """Codifica img en memoria y devuelve los bytes.
+
+    Lo que no venga en params toma el valor de PINNED_PARAMS, y no se
+    incrusta ningún metadato salvo que se pase (icc_profile=, exif=).
+    """
+    params = {**NO_METADATA, **PINNED_PARAMS.get(fmt.upper(), {}), **params}
+    buf = io.BytesIO()
+    img.save(buf, fmt, **params)
+    return buf.getvalue()
+
+
+def encode_to_budget(
+    img: Image.Image,
+    fmt: str,
+    max_kb: int,
+    quality_max: int,
+    quality_floor: int = QUALITY_FLOOR,
+    **params,
+) -> tuple[bytes, int]:
+    """Busca la mayor calidad cuyo resultado cabe en max_kb.
+
+    Búsqueda binaria sobre quality en [quality_floor, quality_max], todo en
+    memoria. Si ni siquiera quality_floor cabe, devuelve ese resultado (el
+    suelo manda sobre el presupuesto). Devuelve (bytes, calidad elegida).
+    """
+    budget = max_kb * 1024
+    best = encode(img, fmt, quality=quality_max, **params)
+    if len(best) <= budget:
+        return best, quality_max
+
+    lo, hi = quality_floor, quality_max - 1
+    best_q = None
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        data = encode(img, fmt, quality=mid, **params)
+        if len(data) <= budget:
+            best, best_q = data, mid
+            lo = mid + 1
+        else:
+            hi = mid - 1
+
+    if best_q is None:
+        return encode(img, fmt, quality=quality_floor, **params), quality_floor
+    return best, best_q
+
+
+def count_colors(img: Image.Image) -> int | None:
+    """Colores distintos de img, o None si pasa de SCREENSHOT_COLORS.
+
+    En P, L, RGB y RGBA cuenta sobre los propios píxeles, sin convertir: no
+    hace falta otra copia de una imagen grande para contarlos.
+    """
+    if img.mode not in ("P", "L", "RGB", "RGBA"):
+        img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+    colors = img.getcolors(maxcolors=SCREENSHOT_COLORS)
+    return len(colors) if colors else None
+
+
+def analyze(img: Image.Image, colors: int | None = None) -> dict:
+    """Rasgos baratos de img para elegir codificador.
+
+    Devuelve {"colors": número de colores distintos (None si pasa de
+    SCREENSHOT_COLORS), "edges": fracción de píxeles de borde en una
+    miniatura de ANALYSIS_SIZE, "alpha": si hay algún píxel no opaco}.
+    Con colors (de count_colors sobre la imagen antes de redimensionarla)
+    no se vuelven a contar.
+    """
+    alpha = False
+    if img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info:
+        img = img.convert("RGBA")
+        alpha = img.getchannel("A").getextrema()[0] < 255
+    elif img.mode != "RGB":
+        img = img.convert("RGB")
+    if colors is None:
+        colors = count_colors(img)
+
+    small = img.convert("L")
+    small.thumbnail((ANALYSIS_SIZE, ANALYSIS_SIZE))
+    width, height = small.size
+    # FIND_EDGES marca siempre el marco de 1 px: se recorta
+    found = small.filter(ImageFilter.FIND_EDGES).crop((1, 1, width - 1, height - 1))
+    histogram = found.histogram()
+    edges = sum(histogram[EDGE_LEVEL:]) / max(1, sum(histogram))
+    return {"colors": colors, "edges": round(edges, 4), "alpha": alpha}
+
+
+def _encode_webp(img: Image.Image, encoding: str, quality: int, **params) -> bytes:
+    if encoding == "lossy":
+        return encode(img, "WEBP", quality=quality, **params)
+    if encoding == "palette":
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+        # FASTOCTREE es el único método que cuantiza también el alfa
+        img = img.quantize(PALETTE_COLORS, method=Image.Quantize.FASTOCTREE)
+    return encode(img, "WEBP", lossless=True, method=4, **params)
+
+
+def choose_webp(img: Image.Image, features: dict, quality: int,
+                max_kb: int | None = None, exact: bool = True,
+                explain: bool = False, **params) -> tuple[bytes, dict]:
+    """Codifica img en WebP sin pérdida, con paleta o con pérdida según features.
+
+    features es el resultado de analyze(). Con exact=False (la imagen se
+    redimensionó después de analizarla y ya no tiene los colores contados),
+    lo que sería sin pérdida pasa a paleta. Si lo elegido pesa más de
+    LOSSLESS_MAX_RATIO veces la versión con pérdida, o no cabe en max_kb, se
+    vuelve a con pérdida (con max_kb, buscando la calidad que cabe).
+
+    Devuelve (bytes, informe) con "encoding", "quality" (None sin pérdida),
+    "reason" y "candidates" {codificación: bytes}; con explain se codifican
+    todas las candidatas para poder compararlas. params (icc_profile=,
+    exif=...) van a cada codificación.
+    """
+    colors, edges = features["colors"], features["edges"]
+    if colors is not None and colors <= PALETTE_COLORS:
+        encoding = "lossless" if exact else "palette"
+        reason = f"{colors} color{'es' if colors != 1 else ''}"
+    elif colors is not None and edges >= SCREENSHOT_EDGES:
+        encoding = "palette"
+        reason = f"captura: {colors} colores, {edges:.0%} de bordes"
+    elif colors is None:
+        encoding = "lossy"
+        reason = f"foto: más de {SCREENSHOT_COLORS} colores"
+    else:
+        encoding = "lossy"
+        reason = f"{colors} colores pero solo {edges:.0%} de bordes"
+    if features["alpha"]:
+        reason += ", con alfa"
+
+    candidates: dict[str, bytes] = {}
+
+    def candidate(name: str) -> bytes:
+        if name not in candidates:
+            candidates[name] = _encode_webp(img, name, quality, **params)
+        return candidates[name]
+
+    chosen_quality = None
+    if encoding != "lossy":
+        data = candidate(encoding)
+        ratio = len(data) / len(candidate("lossy"))
+        if ratio > LOSSLESS_MAX_RATIO:
+            reason += f"; pesa {ratio:.1f}x lo que con pérdida"
+            encoding = "lossy"
+        elif max_kb and len(data) > max_kb * 1024:
+            reason += f"; no cabe en {max_kb} KB"
+            encoding = "lossy"
+    if encoding == "lossy":
+        if max_kb:
+            data, chosen_quality = encode_to_budget(img, "WEBP", max_kb, quality_max=quality,
+                                                    **params)
+        else:
+            data, chosen_quality = candidate("lossy"), quality
+
+    if explain:
+        for name in WEBP_ENCODINGS:
+            candidate(name)
+    return data, {
+        "encoding": encoding,
+        "quality": chosen_quality,
+        "reason": reason,
+        "candidates": {name: len(candidates[name]) for name in WEBP_ENCODINGS
+                       if name in candidates},
+    }
+
+
+def psnr(a: Image.Image, b: Image.Image) -> float:
+    """PSNR en dB entre dos imágenes del mismo tamaño (inf si son idénticas)."""
+    diff = ImageChops.difference(a.convert("RGB"), b.convert("RGB"))
+    hist = diff.histogram()
+    squares = sum(count * (i % 256) ** 2 for i, count in enumerate(hist))
+    mse = squares / (a.width * a.height * 3)
+    if mse == 0:
+        return math.inf
+    return 10 * math.log10(255 ** 2 / mse)
+
+
+def _eval(expression: str, **operands) -> Image.Image:
+    # ImageMath.eval pasó a llamarse unsafe_eval en Pillow 11; las
+    # expresiones son constantes de este módulo, no entrada del usuario.
+    evaluate = getattr(ImageMath, "unsafe_eval", None) or ImageMath.eval
+    return evaluate(expression, **operands)
+
+
+def ssim(a: Image.Image, b: Image.Image, block: int = SSIM_BLOCK) -> float:
+    """SSIM media de la luminancia, por bloques de block x block sin solape.
+
+    Variante sin numpy de la SSIM clásica (que usa ventanas gaussianas
+    deslizantes): las medias por bloque salen de reduce() sobre imágenes
+    en coma flotante. 1.0 si son idénticas.
+    """
+    x = a.convert("L").convert("F")
+    y = b.convert("L").convert("F")
+    mx, my = x.reduce(block), y.reduce(block)
+    exx = _eval("x * x", x=x).reduce(block)
+    eyy = _eval("y * y", y=y).reduce(block)
+    exy = _eval("x * y", x=x, y=y).reduce(block)
+    score = _eval(
+        "((2 * mx * my + c1) * (2 * (exy - mx * my) + c2))"
+        " / ((mx * mx + my * my + c1) * (exx - mx * mx + eyy - my * my + c2))",
+        mx=mx, my=my, exx=exx, eyy=eyy, exy=exy,
+        c1=(0.01 * 255) ** 2, c2=(0.03 * 255) ** 2,
+    )
+    return score.reduce(score.size).getpixel((0, 0))
+
+
+def write_atomic(path: str | Path, data: bytes) -> None:
+    """Escribe data en path vía fichero temporal + rename.
+
+    Un proceso interrumpido a mitad de escritura nunca deja un fichero a
+    medias: o queda el anterior, o el nuevo completo.
+    """
+    path = str(path)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def write_if_changed(path: str | Path, data: bytes) -> bool:
+    """Escribe data en path (con write_atomic) solo si el contenido cambia.
+
+    Devuelve True si escribió. Un fichero idéntico conserva su mtime: ni git,
+    ni rsync, ni la caché de Astro lo ven como modificado.
+    """
+    try:
+        if os.path.getsize(path) == len(data):
+            with open(path, "rb") as f:
+                if f.read() == data:
+                    return False
+    except OSError:
+        pass
+    write_atomic(path, data)
+    return True
@@ -0,0 +1,297 @@
+"""
+image_hashes.py – Índice de hashes perceptuales de las figuras del blog.
+
+Una captura importada dos veces (con otro nombre o en otro post) pesa lo
+mismo en el build que dos capturas distintas. Este índice guarda el dHash de
+256 bits y las dimensiones de cada imagen de src/assets/images/blog para que
+import_image.py detecte casi-duplicados antes de escribir otro WebP, y para
+el informe --dedupe-report.
+
+El hash solo propone candidatos: una captura oscura de terminal apenas tiene
+bits a 1 y se parece a cualquier otra. Los hashes con poca información no
+casan con nada, y todo candidato se confirma comparando miniaturas (SSIM)
+antes de darlo por duplicado.
+
+La caché en disco (.cache/image-hashes.json) sigue el esquema del índice de
+frontmatter: cada entrada se identifica por (ruta, mtime, tamaño) y solo se
+vuelven a hashear las imágenes que cambiaron. Las variantes de --ladder no se
+indexan: son copias de su imagen base a propósito.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+from PIL import Image, ImageOps, ImageStat
+
+from asset_refs import ASSET_SUFFIXES, ASSETS_BLOG_DIR, PUBLIC_PREFIX, ladder_variants
+from frontmatter_index import CACHE_DIR
+from image_codec import ROTATING_ORIENTATIONS, orientation, ssim
+from timings import STAGES
+
+DEFAULT_HASH_CACHE = CACHE_DIR / "image-hashes.json"
+# Incrementar si cambia el algoritmo: invalida las cachés existentes.
+HASH_INDEX_VERSION = 2
+# dHash de HASH_SIZE x HASH_SIZE bits (256 con 16)
+HASH_SIZE = 16
+# Bits distintos (de 256) por debajo de los cuales dos imágenes son candidatas
+# a ser la misma: absorbe recompresión, reescalado y pequeños recortes de borde.
+MAX_DISTANCE = 24
+# Un hash con menos bits a 1 no distingue nada (fondo oscuro con texto fino,
+# degradado liso): no se compara con ninguno.
+MIN_HASH_BITS = 32
+# Desviación típica (0-255) de la miniatura por debajo de la cual la imagen se
+# considera plana y su hash es 0. Se mira antes de estirar el contraste, que
+# convertiría el ruido de compresión en bits.
+FLAT_STDDEV = 2.0
+# Confirmación: SSIM mínima entre miniaturas en grises de CONFIRM_WIDTH px
+CONFIRM_WIDTH = 64
+CONFIRM_SSIM = 0.9
+# Diferencia relativa de proporción tolerada entre dos duplicados
+ASPECT_TOLERANCE = 0.02
+
+
+def dhash(img: Image.Image, size: int = HASH_SIZE) -> int:
+    """Hash de diferencias: compara cada píxel con su vecino derecho en una
+    miniatura en grises de (size + 1) x size con el contraste estirado.
+
+    Una miniatura casi plana da 0, que informative() descarta.
+    """
+    if img.mode not in ("L", "RGB"):
+        img = img.convert("RGB")
+    small = img.resize((size + 1, size), Image.BILINEAR, reducing_gap=2.0).convert("L")
+    if ImageStat.Stat(small).stddev[0] < FLAT_STDDEV:
+        return 0
+    px = ImageOps.autocontrast(small).tobytes()
+    bits = 0
+    for y in range(size):
+        row = px[y * (size + 1):(y + 1) * (size + 1)]
+        for x in range(size):
+            bits = (bits << 1) | (row[x] < row[x + 1])
+    return bits
+
+
+def hash_file(path: str | Path) -> tuple[int, int, int]:
+    """(dhash, ancho, alto) de una imagen, decodificándola lo mínimo posible.
+
+    Se aplica la orientación EXIF, igual que hace import_image al importar:
+    una foto girada y su WebP ya importado dan el mismo hash.
+    """
+    with Image.open(path) as img:
+        rotated = orientation(img) in ROTATING_ORIENTATIONS
+        width, height = img.size[::-1] if rotated else img.size
+        # En JPEG draft() decodifica ya reducido por DCT: el hash solo
+        # necesita una miniatura.
+        img.draft("RGB", (HASH_SIZE * 16, HASH_SIZE * 16))
+        return dhash(ImageOps.exif_transpose(img)), width, height
+
+
+def hash_hex(h: int) -> str:
+    """Hash en hexadecimal de ancho fijo, como se guarda en el índice."""
+    return f"{h:0{HASH_SIZE * HASH_SIZE // 4}x}"
+
+
+def distance(a: int, b: int) -> int:
+    """Distancia de Hamming entre dos hashes."""
+    return bin(a ^ b).count("1")
+
+
+def informative(h: int) -> bool:
+    """Si el hash tiene bits suficientes para distinguir una imagen de otra."""
+    return bin(h).count("1") >= MIN_HASH_BITS
+
+
+def similar(a: dict, b: dict, max_distance: int = MAX_DISTANCE) -> bool:
+    """¿Son a y b (dicts con hash, width, height) candidatos a casi-duplicados?
+
+    Solo mira hashes y proporción: confirm() decide con los píxeles.
+    """
+    hash_a, hash_b = int(a["hash"], 16), int(b["hash"], 16)
+    if not informative(hash_a) or not informative(hash_b):
+        return False
+    aspect_a = a["width"] / a["height"]
+    aspect_b = b["width"] / b["height"]
+    if abs(aspect_a - aspect_b) > ASPECT_TOLERANCE * max(aspect_a, aspect_b):
+        return False
+    return distance(hash_a, hash_b) <= max_distance
+
+
+def _thumbnail(path: str | Path, size: tuple[int, int] | None = None) -> Image.Image:
+    """Miniatura en grises de CONFIRM_WIDTH px de ancho (o de size)."""
+    with Image.open(path) as img:
+        img.draft("L", (CONFIRM_WIDTH * 4, CONFIRM_WIDTH * 4))
+        img = ImageOps.exif_transpose(img).convert("L")
+        if size is None:
+            size = (CONFIRM_WIDTH, max(1, round(CONFIRM_WIDTH * img.height / img.width)))
+        return img.resize(size, Image.BOX)
+
+
+def confirm(a: str | Path, b: str | Path, min_ssim: float = CONFIRM_SSIM) -> bool:
+    """¿Son los ficheros a y b la misma imagen? Compara sus miniaturas.
+
+    Es la comprobación que va después de similar(): dos capturas distintas
+    pueden tener hashes parecidos, pero no las mismas miniaturas.
+    """
+    try:
+        thumb_a = _thumbnail(a)
+        thumb_b = _thumbnail(b, thumb_a.size)
+    except OSError:
+        return False
+    with STAGES.stage("dhash.confirm"):
+        return ssim(thumb_a, thumb_b) >= min_ssim
+
+
+class HashIndex:
+    """dHash y dimensiones de las imágenes de assets_dir, con caché incremental.
+
+    Las claves son rutas relativas a assets_dir (<post>/<archivo>). Con
+    cache_path=None el índice vive solo en memoria.
+    """
+
+    def __init__(self, assets_dir: str | Path = ASSETS_BLOG_DIR,
+                 cache_path: str | Path | None = None) -> None:
+        self.assets_dir = Path(assets_dir).resolve()
+        self.cache_path = Path(cache_path) if cache_path is not None else None
+        self._entries: dict[str, dict] = self._load_cache()
+        self.misses = 0  # imágenes hasheadas en el último refresh()
+
+    def _load_cache(self) -> dict[str, dict]:
+        if self.cache_path is None:
+            return {}
+        try:
+            data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if (
+            not isinstance(data, dict)
+            or data.get("version") != HASH_INDEX_VERSION
+            or data.get("assets_dir") != str(self.assets_dir)
+        ):
+            return {}
+        return data.get("entries", {})
+
+    def _save_cache(self) -> None:
+        if self.cache_path is None:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": HASH_INDEX_VERSION,
+            "assets_dir": str(self.assets_dir),
+            "entries": self._entries,
+        }
+        tmp = self.cache_path.with_name(f"{self.cache_path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp, self.cache_path)
+
+    def refresh(self) -> HashIndex:
+        """Sincroniza el índice con el disco; solo hashea lo que cambió."""
+        with STAGES.stage("dhash.index"):
+            return self._refresh()
+
+    def _refresh(self) -> HashIndex:
+        entries: dict[str, dict] = {}
+        self.misses = 0
+        if self.assets_dir.is_dir():
+            variants = ladder_variants(self.assets_dir)
+            for path in sorted(self.assets_dir.rglob("*")):
+                if (
+                    not path.is_file()
+                    or path.suffix.lower() not in ASSET_SUFFIXES
+                    or path in variants
+                ):
+                    continue
+                key = path.relative_to(self.assets_dir).as_posix()
+                st = path.stat()
+                cached = self._entries.get(key)
+                if (
+                    cached is not None
+                    and cached["mtime_ns"] == st.st_mtime_ns
+                    and cached["size"] == st.st_size
+                ):
+                    entries[key] = cached
+                    continue
+                try:
+                    with STAGES.stage("dhash"):
+                        h, width, height = hash_file(path)
+                except OSError:
+                    continue  # no es una imagen legible: no se indexa
+                entries[key] = {
+                    "mtime_ns": st.st_mtime_ns,
+                    "size": st.st_size,
+                    "hash": hash_hex(h),
+                    "width": width,
+                    "height": height,
+                }
+                self.misses += 1
+
+        if self.misses or entries.keys() != self._entries.keys():
+            self._entries = entries
+            self._save_cache()
+        return self
+
+    def entries(self) -> dict[str, dict]:
+        return self._entries
+
+    def path(self, key: str) -> Path:
+        """Fichero de una entrada, por clave o por ruta pública."""
+        return self.assets_dir / key.removeprefix(PUBLIC_PREFIX)
+
+    def find(self, h: int, width: int, height: int,
+             max_distance: int = MAX_DISTANCE) -> list[tuple[int, str]]:
+        """[(distancia, ruta_pública)] de las imágenes candidatas, de más a
+        menos parecida. Sin confirmar: ver confirm()."""
+        probe = {"hash": hash_hex(h), "width": width, "height": height}
+        matches = [
+            (distance(h, int(entry["hash"], 16)), PUBLIC_PREFIX + key)
+            for key, entry in self._entries.items()
+            if similar(probe, entry, max_distance)
+        ]
+        return sorted(matches)
+
+    def clusters(self, max_distance: int = MAX_DISTANCE) -> list[dict]:
+        """Grupos de casi-duplicados de todo el árbol.
+
+        Cada grupo es {"keep": clave, "copies": [claves], "saved": bytes}:
+        se conserva la de mayor resolución (a igualdad, la más ligera) y
+        saved es lo que pesan las demás. Ordenados por bytes recuperables.
+        """
+        keys = sorted(self._entries)
+        parent = {key: key for key in keys}
+
+        def root(key: str) -> str:
+            while parent[key] != key:
+                parent[key] = parent[parent[key]]
+                key = parent[key]
+            return key
+
+        for i, a in enumerate(keys):
+            for b in keys[i + 1:]:
+                if (
+                    root(a) != root(b)
+                    and similar(self._entries[a], self._entries[b], max_distance)
+                    and confirm(self.path(a), self.path(b))
+                ):
+                    parent[root(b)] = root(a)
+
+        groups: dict[str, list[str]] = {}
+        for key in keys:
+            groups.setdefault(root(key), []).append(key)
+
+        result = []
+        for members in groups.values():
+            if len(members) < 2:
+                continue
+            members.sort(key=lambda k: (
+                -self._entries[k]["width"] * self._entries[k]["height"],
+                self._entries[k]["size"],
+                k,
+            ))
+            keep, copies = members[0], members[1:]
+            result.append({
+                "keep": keep,
+                "copies": copies,
+                "saved": sum(self._entries[k]["size"] for k in copies),
+            })
+        return sorted(result, key=lambda g: (-g["saved"], g["keep"]))
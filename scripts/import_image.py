@@ -3,15 +3,36 @@ import_image.py – Funciones puras para el script de importación de imágenes.
 
 Uso del CLI: scripts/import-image.py  (archivo con guión, para el CLI)
 Import Python: import import_image    (este archivo, con guión bajo)
+
+Modo lote (sin preguntas):
+  python3 scripts/import_image.py --post <slug> <carpeta|glob|fichero>...
 """
 
 from __future__ import annotations
 
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
 import sys
+import time
 import unicodedata
+from functools import partial
 from pathlib import Path
+from typing import TYPE_CHECKING, Collection
+
+from frontmatter_index import DEFAULT_CACHE_PATH, FrontmatterIndex
+from timings import STAGES, reset_worker, run_instrumented
+
+# Pillow (y image_codec e image_hashes, que dependen de él) se importa dentro
+# de las funciones que tocan píxeles: get_posts y build_snippet, que usan
+# los hooks y el editor, no lo cargan y funcionan sin Pillow instalado.
+if TYPE_CHECKING:
+    from PIL import Image
 
-from PIL import Image
+    from image_hashes import HashIndex
 
 # ---------------------------------------------------------------------------
 # Constantes de módulo
@@ -24,24 +45,85 @@ CONTENT_DIR = PROJECT_ROOT / "src" / "content" / "blog"
 # que las resuelve a partir de la ruta pública "/images/blog/...".
 ASSETS_IMAGES_DIR = PROJECT_ROOT / "src" / "assets" / "images" / "blog"
 MAX_WIDTH = 1600
+# Calidad WebP por defecto de Pillow; techo de la búsqueda con --max-kb
+WEBP_QUALITY = 80
+# Para fuentes no JPEG, resize() reduce primero por un factor entero hasta
+# quedar a REDUCING_GAP veces el tamaño final y solo entonces aplica LANCZOS:
+# mismo resultado visual, una fracción del tiempo y de los buffers intermedios.
+REDUCING_GAP = 3.0
+# Escalera de tamaños responsive (--ladder): anchos y formatos que se generan
+# a partir de la imagen ya decodificada, cada peldaño desde el anterior.
+LADDER_WIDTHS = (480, 750, 1200, 1600)
+LADDER_FORMATS = ("webp", "avif")
+# Parámetros de las variantes de la escalera (los valores por defecto de
+# Pillow, fijados para que no cambien con él)
+LADDER_PARAMS = {"webp": {"quality": WEBP_QUALITY}, "avif": {"quality": 75}}
+# Manifiesto de la escalera, uno por carpeta de post en ASSETS_IMAGES_DIR
+LADDER_MANIFEST = "ladder.json"
+# Extensiones que se recogen al importar una carpeta entera en modo lote
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".bmp", ".tif", ".tiff", ".avif"}
+CONFLICT_POLICIES = ("skip", "overwrite", "suffix")
+# Qué hacer con una imagen casi idéntica a otra ya importada (ver image_hashes)
+DUPLICATE_POLICIES = ("import", "reuse")
+# --hash-names: <stem>.<hash>.webp con los HASH_NAME_LEN primeros dígitos
+# hex del sha256 del WebP. La ruta pública cambia si y solo si cambia el
+# contenido, así que puede servirse con caché immutable.
+HASH_NAME_LEN = 8
 
 
-def get_posts(content_dir: str) -> list[str]:
+def get_posts(content_dir: str, cache_path: str | Path | None = None) -> list[str]:
     """Devuelve slugs de posts ordenados (sin extensión) desde content_dir.
 
     Lee *.md y *.mdx de content_dir y devuelve los stems ordenados
-    alfabéticamente.
+    alfabéticamente. Con cache_path reutiliza el índice persistente de
+    frontmatter_index (el mismo que usa generate-images.py).
     """
-    base = Path(content_dir)
-    stems = [
-        p.stem
-        for p in base.iterdir()
-        if p.is_file() and p.suffix in {".md", ".mdx"}
-    ]
-    return sorted(stems)
+    return FrontmatterIndex(content_dir, cache_path).refresh().slugs()
+
+
+def _reset_peak_rss() -> bool:
+    """Pone a cero el pico de memoria residente (VmHWM) del proceso.
+
+    Solo en Linux; sin ello el pico de un worker del pool sería el de la
+    imagen más grande que ya procesó. Devuelve False si no se puede.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        return False
+    return True
+
+
+def _peak_rss_mb() -> float | None:
+    """Pico de memoria residente en MB desde el último _reset_peak_rss (o
+    desde que arrancó el proceso). None si no se puede medir."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo da en KB, macOS en bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
 
 
-def convert_and_save(src_path: str, dest_path: str, max_width: int = MAX_WIDTH) -> int:
+def convert_and_save(
+    src_path: str,
+    dest_path: str,
+    max_width: int = MAX_WIDTH,
+    stats: dict | None = None,
+    ladder: tuple[int, ...] | None = None,
+    max_kb: int | None = None,
+    explain: bool = False,
+    hash_name: bool = False,
+) -> int:
     """Convierte src_path a WebP, redimensiona si supera max_width.
 
     Crea carpetas intermedias. Devuelve el tamaño del archivo resultante
@@ -51,28 +133,253 @@ def convert_and_save(src_path: str, dest_path: str, max_width: int = MAX_WIDTH)
     a propósito: el <img> en línea siempre se ve limitado por CSS al ancho de
     columna, pero el lightbox (ver ImageLightbox.astro) necesita píxeles de
     sobra en el archivo para poder ampliar la imagen de verdad.
+
+    Los JPEG más anchos que max_width se decodifican ya reducidos (escalado
+    DCT a 1/2, 1/4 o 1/8, nunca por debajo del tamaño final), así que una
+    foto de 50 Mpx no llega a ocupar su tamaño completo en memoria. Si se pasa
+    stats, se rellena con el tamaño de origen, el decodificado, los segundos
+    empleados y el pico de memoria: el de esta imagen en Linux
+    (peak_rss_scope "imagen"), el del proceso hasta ahora en el resto
+    ("proceso").
+
+    Con ladder (lista de anchos) genera además la escalera responsive a
+    partir de la imagen ya decodificada (ver save_ladder); sus variantes
+    quedan en stats["ladder"] para que el llamador actualice el manifiesto.
+
+    El WebP se codifica sin pérdida, con paleta o con pérdida según el
+    contenido (ver image_codec.choose_webp): las capturas de terminal o de UI
+    no emborronan el texto y pesan menos. La clasificación se hace sobre la
+    imagen ya redimensionada, salvo los colores, que se cuentan antes (sin
+    copiar la imagen); stats recibe colors, edges, alpha,
+    encoding, reason y candidates (bytes de cada codificación probada; con
+    explain, de las tres).
+
+    Con max_kb se busca la mayor calidad WebP (hasta WEBP_QUALITY) cuyo
+    resultado cabe en ese presupuesto; la elegida queda en stats["quality"]
+    (None si la imagen va sin pérdida o con paleta).
+
+    Antes de redimensionar la imagen se normaliza (ver image_codec.normalize):
+    se gira según su EXIF, se pasa a sRGB y se descartan EXIF, XMP y perfil
+    ICC (GPS incluido). stats recibe metadata_bytes, transposed y converted.
+
+    stats["placeholder"] recibe el marcador de posición (ver placeholders.py),
+    calculado sobre la imagen ya redimensionada; el llamador lo registra en
+    el placeholders.json de la carpeta, como la escalera.
+
+    Con hash_name el fichero no se llama dest_path sino <stem>.<hash>.webp
+    (ver hashed_name), y las variantes de la escalera toman ese nombre como
+    base. La ruta escrita queda siempre en stats["dest"].
     """
+    from PIL import Image
+
+    from image_codec import (
+        ROTATING_ORIENTATIONS, analyze, choose_webp, count_colors, normalize, orientation,
+        write_if_changed,
+    )
+    from placeholders import placeholder
+
     src = Path(src_path)
     dest = Path(dest_path)
+    per_image = stats is not None and _reset_peak_rss()
+    start = time.perf_counter()
 
     # Crear directorios intermedios si no existen
     dest.parent.mkdir(parents=True, exist_ok=True)
 
-    img = Image.open(src)
+    with STAGES.stage("decode"):
+        img = Image.open(src)
+        # Los tamaños se razonan ya orientados: una foto vertical de móvil
+        # llega apaisada con Orientation=6 y se gira en normalize().
+        rotated = orientation(img) in ROTATING_ORIENTATIONS
+        src_size = img.size[::-1] if rotated else img.size
+        # Redimensionar solo si la imagen es más ancha que max_width
+        target = None
+        if src_size[0] > max_width:
+            ratio = max_width / src_size[0]
+            target = (max_width, int(src_size[1] * ratio))
+            if img.format == "JPEG":
+                img.draft(img.mode, target[::-1] if rotated else target)
+        decoded_size = img.size[::-1] if rotated else img.size
+        img.load()
+
+    with STAGES.stage("normalize"):
+        img, normalized = normalize(img)
+
+    # Los colores, antes de redimensionar: LANCZOS inventa colores
+    # intermedios y una captura de 200 colores dejaría de parecerlo. El
+    # resto del análisis, sobre la imagen reducida, que es la que se codifica.
+    colors = None
+    if target is not None:
+        with STAGES.stage("classify"):
+            colors = count_colors(img)
+        with STAGES.stage("resize"):
+            img = img.resize(target, Image.LANCZOS, reducing_gap=REDUCING_GAP)
+
+    with STAGES.stage("classify"):
+        features = analyze(img, colors)
 
-    # Redimensionar solo si la imagen es más ancha que max_width
-    if img.width > max_width:
-        ratio = max_width / img.width
-        new_height = int(img.height * ratio)
-        img = img.resize((max_width, new_height), Image.LANCZOS)
+    with STAGES.stage("encode"):
+        data, choice = choose_webp(img, features, WEBP_QUALITY, max_kb,
+                                   exact=target is None, explain=explain)
+    with STAGES.stage("placeholder"):
+        preview = placeholder(img)
+    if hash_name:
+        dest = hashed_name(dest, data)
+    with STAGES.stage("write"):
+        written = write_if_changed(dest, data)
+    if written:
+        STAGES.add_bytes(len(data))
 
-    img.save(dest, "WEBP")
+    variants = None
+    if ladder:
+        with STAGES.stage("ladder"):
+            variants = save_ladder(img, dest, ladder)
+        STAGES.add_bytes(sum(v["bytes"] for v in variants
+                             if v["file"] != dest.name and v["written"]))
 
-    size_bytes = dest.stat().st_size
-    kb = max(1, size_bytes // 1024)
+    kb = max(1, len(data) // 1024)
+    if stats is not None:
+        stats.update(
+            src_size=list(src_size),
+            decoded_size=list(decoded_size),
+            seconds=round(time.perf_counter() - start, 3),
+            peak_rss_mb=_peak_rss_mb(),
+            peak_rss_scope="imagen" if per_image else "proceso",
+            **features,
+            **choice,
+            **normalized,
+            dest=str(dest),
+            written=written,
+            placeholder=preview,
+        )
+        if variants is not None:
+            stats["ladder"] = variants
     return kb
 
 
+def save_ladder(
+    img: Image.Image,
+    dest: Path,
+    widths: tuple[int, ...] = LADDER_WIDTHS,
+    formats: tuple[str, ...] = LADDER_FORMATS,
+) -> list[dict]:
+    """Escribe la escalera de anchos de img junto a dest, en cada formato.
+
+    img es la imagen ya redimensionada que se guardó en dest: el peldaño
+    superior es su propio ancho (el WebP de ese peldaño es dest) y cada
+    peldaño menor se reduce desde el anterior, no desde el original. Los
+    anchos mayores que img se ignoran. Las variantes se llaman
+    <stem>-<ancho>w.<formato>, y las que ya tienen esos bytes no se reescriben.
+    Devuelve una lista de dicts con file, width, height, format, bytes y
+    written, de mayor a menor.
+    """
+    from PIL import Image
+
+    from image_codec import encode, write_if_changed
+
+    rungs = sorted({w for w in widths if w < img.width} | {img.width}, reverse=True)
+    variants: list[dict] = []
+    current = img
+    for width in rungs:
+        if width != current.width:
+            height = max(1, round(current.height * width / current.width))
+            current = current.resize((width, height), Image.LANCZOS)
+        for fmt in formats:
+            if fmt == "webp" and width == img.width:
+                path, size, written = dest, dest.stat().st_size, False
+            else:
+                path = dest.with_name(f"{dest.stem}-{width}w.{fmt}")
+                data = encode(current, fmt.upper(), **LADDER_PARAMS[fmt])
+                size, written = len(data), write_if_changed(path, data)
+            variants.append({
+                "file": path.name,
+                "width": current.width,
+                "height": current.height,
+                "format": fmt,
+                "bytes": size,
+                "written": written,
+            })
+    return variants
+
+
+def update_ladder_manifest(post_dir: Path, ladders: dict[str, list[dict]]) -> Path:
+    """Fusiona {imagen.webp: variantes} en el ladder.json de la carpeta del post.
+
+    De cada variante se guarda lo que describe el fichero, no si esta pasada
+    lo escribió: reimportar lo mismo deja el manifiesto intacto.
+    """
+    from image_codec import write_if_changed
+
+    manifest_path = post_dir / LADDER_MANIFEST
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        manifest = {}
+    manifest.update({
+        base: [{k: v for k, v in entry.items() if k != "written"} for entry in entries]
+        for base, entries in ladders.items()
+    })
+    text = json.dumps(dict(sorted(manifest.items())), ensure_ascii=False, indent=2) + "\n"
+    write_if_changed(manifest_path, text.encode("utf-8"))
+    return manifest_path
+
+
+def format_stats(stats: dict) -> str:
+    """Resumen de una línea de las métricas que rellena convert_and_save."""
+    src_w, src_h = stats["src_size"]
+    dec_w, dec_h = stats["decoded_size"]
+    decoded = f"{dec_w}x{dec_h}"
+    if dec_w < src_w:
+        decoded += f" (1/{round(src_w / dec_w)})"
+    line = f"origen {src_w}x{src_h}, decodificada {decoded}, {stats['seconds'] * 1000:.0f} ms"
+    if stats.get("peak_rss_mb") is not None:
+        scope = "" if stats.get("peak_rss_scope") == "imagen" else " del proceso"
+        line += f", pico{scope} {stats['peak_rss_mb']} MB"
+    return line
+
+
+ENCODING_LABELS = {"lossless": "sin pérdida", "palette": "paleta", "lossy": "con pérdida"}
+
+
+def format_encoding(stats: dict) -> str:
+    """'calidad 80', 'sin pérdida' o 'paleta': cómo se codificó la imagen."""
+    if stats.get("quality") is not None:
+        return f"calidad {stats['quality']}"
+    return ENCODING_LABELS[stats["encoding"]]
+
+
+def format_explain(stats: dict) -> str:
+    """Por qué se eligió la codificación y cuánto pesaba cada candidata."""
+    sizes = " · ".join(
+        f"{ENCODING_LABELS[name]} {size / 1024:.0f} KB"
+        + (" ←" if name == stats["encoding"] else "")
+        for name, size in stats["candidates"].items()
+    )
+    return f"{ENCODING_LABELS[stats['encoding']]} ({stats['reason']}): {sizes}"
+
+
+def format_normalized(stats: dict) -> str | None:
+    """Resumen de lo que cambió normalize(), o None si la imagen ya era limpia."""
+    parts = []
+    if stats.get("metadata_bytes"):
+        parts.append(f"-{stats['metadata_bytes'] / 1024:.1f} KB de metadatos")
+    if stats.get("transposed"):
+        parts.append("girada según EXIF")
+    if stats.get("converted"):
+        parts.append("convertida a sRGB")
+    return ", ".join(parts) or None
+
+
+def format_replaced(result: dict) -> str | None:
+    """'sustituye a X; referencias actualizadas en a.mdx' (ver replace_versions)."""
+    if not result.get("replaced"):
+        return None
+    line = f"↻ sustituye a {', '.join(result['replaced'])}"
+    if result["rewritten"]:
+        line += f"; referencias actualizadas en {', '.join(result['rewritten'])}"
+    return line
+
+
 def build_snippet(
     image_public_path: str,
     alt: str,
@@ -124,13 +431,16 @@ def _slug_from_filename(filename: str) -> str:
     return ascii_stem.replace(" ", "-").replace("_", "-").lower()
 
 
-def _resolve_conflict(dest: Path, project_root: Path) -> Path | None:
+def _resolve_conflict(dest: Path, project_root: Path, hashed: bool = False) -> Path | None:
     """
     Gestiona conflicto de nombre. Devuelve la ruta final o None si se cancela.
+
+    Con hashed, dest es el nombre sin hash y hay conflicto si existe alguna
+    de sus versiones (ver versions); sobreescribir la sustituye.
     """
-    while dest.exists():
+    while existing := versions(dest, hashed):
         choice = _ask_choice(
-            f"⚠  Ya existe: {dest.relative_to(project_root)}",
+            f"⚠  Ya existe: {existing[-1].relative_to(project_root)}",
             ["sobreescribir", "cambiar nombre", "cancelar"],
         )
         if choice == 0:  # sobreescribir
@@ -150,12 +460,524 @@ def _resolve_conflict(dest: Path, project_root: Path) -> Path | None:
     return dest
 
 
-def main() -> None:
-    if len(sys.argv) != 2:
+# ---------------------------------------------------------------------------
+# Nombres con hash (--hash-names)
+# ---------------------------------------------------------------------------
+
+
+def hashed_name(dest: Path, data: bytes) -> Path:
+    """dest con el hash del contenido antes de la extensión: <stem>.<hash>.webp."""
+    digest = hashlib.sha256(data).hexdigest()[:HASH_NAME_LEN]
+    return dest.with_name(f"{dest.stem}.{digest}{dest.suffix}")
+
+
+def is_hashed(path: Path) -> bool:
+    """Si path tiene nombre de --hash-names (<stem>.<hash>.webp).
+
+    Esos ficheros no pueden reescribirse en su sitio: el nombre dejaría de
+    corresponder a los bytes. Solo cuenta si el sufijo es de verdad el hash
+    del contenido: foto.20240115.webp es un nombre como otro cualquiera.
+    """
+    match = re.search(rf"\.([0-9a-f]{{{HASH_NAME_LEN}}})$", path.stem)
+    if match is None:
+        return False
+    try:
+        data = path.read_bytes()
+    except OSError:
+        return False
+    return hashlib.sha256(data).hexdigest()[:HASH_NAME_LEN] == match.group(1)
+
+
+def versions(dest: Path, hashed: bool = False) -> list[Path]:
+    """Ficheros en disco que son dest: el propio dest y, con hashed, sus
+    versiones <stem>.<hash><suffix> (ver is_hashed). Las variantes de la
+    escalera no cuentan."""
+    found = [dest] if dest.exists() else []
+    if hashed and dest.parent.is_dir():
+        pattern = re.compile(
+            re.escape(dest.stem) + rf"\.[0-9a-f]{{{HASH_NAME_LEN}}}" + re.escape(dest.suffix)
+        )
+        found += sorted(
+            (p for p in dest.parent.iterdir() if pattern.fullmatch(p.name) and is_hashed(p)),
+            key=lambda p: p.stat().st_mtime_ns,
+        )
+    return found
+
+
+def replace_versions(
+    dest: Path,
+    logical: Path,
+    assets_dir: Path = ASSETS_IMAGES_DIR,
+    content_dir: Path = CONTENT_DIR,
+) -> dict:
+    """Sustituye las versiones anteriores de logical (sin hash) por dest.
+
+    Las referencias de los posts a cada versión anterior pasan a apuntar a
+    dest, y sus ficheros se borran con sus variantes de la escalera y sus
+    entradas del ladder.json y del placeholders.json. Devuelve {"replaced": [rutas públicas],
+    "rewritten": [posts modificados]}.
+    """
+    from asset_refs import PUBLIC_PREFIX, rewrite_refs
+    from placeholders import drop_placeholders
+
+    old = [p for p in versions(logical, hashed=True) if p != dest]
+    if not old:
+        return {"replaced": [], "rewritten": []}
+
+    def public(path: Path) -> str:
+        return PUBLIC_PREFIX + path.relative_to(assets_dir).as_posix()
+
+    rewritten = rewrite_refs({public(p): public(dest) for p in old}, content_dir)
+
+    manifest_path = dest.parent / LADDER_MANIFEST
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        manifest = {}
+    for path in old:
+        for entry in manifest.pop(path.name, []):
+            if entry["file"] != path.name:
+                (dest.parent / entry["file"]).unlink(missing_ok=True)
+        path.unlink()
+    if manifest_path.exists():
+        if manifest:
+            manifest_path.write_text(
+                json.dumps(dict(sorted(manifest.items())), ensure_ascii=False, indent=2) + "\n",
+                encoding="utf-8",
+            )
+        else:
+            manifest_path.unlink()
+    drop_placeholders(dest.parent, [p.name for p in old])
+    return {
+        "replaced": [public(p) for p in old],
+        "rewritten": [str(p.relative_to(content_dir)) for p in rewritten],
+    }
+
+
+# ---------------------------------------------------------------------------
+# Modo lote (no interactivo)
+# ---------------------------------------------------------------------------
+
+
+def expand_sources(sources: list[str]) -> list[Path]:
+    """Expande carpetas, globs y ficheros a una lista de imágenes sin repetir.
+
+    Las carpetas aportan sus imágenes (IMAGE_SUFFIXES, sin recursión) en orden
+    alfabético; los globs se expanden también ordenados.
+    """
+    found: list[Path] = []
+    for raw in sources:
+        path = Path(raw).expanduser()
+        if path.is_dir():
+            found.extend(
+                p for p in sorted(path.iterdir())
+                if p.is_file() and p.suffix.lower() in IMAGE_SUFFIXES
+            )
+        elif glob.has_magic(raw):
+            found.extend(Path(p) for p in sorted(glob.glob(os.path.expanduser(raw))))
+        else:
+            found.append(path)
+    return list(dict.fromkeys(found))
+
+
+def plan_destination(dest: Path, policy: str, taken: set[Path],
+                     hashed: bool = False) -> Path | None:
+    """Aplica la política de conflictos sin preguntar.
+
+    policy='skip'      → None si ya existe (o ya lo usa otra imagen del lote)
+    policy='overwrite' → dest tal cual
+    policy='suffix'    → dest con -2, -3... hasta encontrar un nombre libre
+    taken son los destinos ya asignados en este mismo lote. Con hashed, dest
+    es el nombre sin hash y existe si existe alguna de sus versiones.
+    """
+    if policy not in CONFLICT_POLICIES:
+        raise ValueError(f"política desconocida: {policy!r}. Usa {', '.join(CONFLICT_POLICIES)}.")
+    if policy == "overwrite" and dest not in taken:
+        return dest
+    candidate = dest
+    n = 2
+    while versions(candidate, hashed) or candidate in taken:
+        if policy != "suffix":
+            return None
+        candidate = dest.with_name(f"{dest.stem}-{n}{dest.suffix}")
+        n += 1
+    return candidate
+
+
+def _format_template(template: str, src: Path, index: int, post_slug: str) -> str:
+    """Rellena {name}, {stem}, {n} y {post} en las plantillas de alt/caption."""
+    stem = _slug_from_filename(src.name) or src.stem
+    return template.format(name=stem.replace("-", " "), stem=stem, n=index, post=post_slug)
+
+
+def _convert_job(job: dict) -> tuple[int, dict, dict]:
+    """Adaptador para el pool: kwargs de convert_and_save → (KB, métricas, tiempos).
+
+    Los tiempos son las muestras del worker (ver timings.py), que el proceso
+    principal suma a las suyas.
+    """
+    stats: dict = {}
+    kb = convert_and_save(**job, stats=stats)
+    return kb, stats, STAGES.drain()
+
+
+def _run_jobs(fn, work: list, jobs: int | None) -> list:
+    """Aplica fn a cada elemento de work, en un pool si compensa.
+
+    Devuelve los resultados en orden; una excepción de un elemento se
+    devuelve en su posición en vez de abortar el resto.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    outcomes: list = []
+    if jobs == 1 or len(work) < 2:
+        for job in work:
+            try:
+                outcomes.append(fn(job))
+            except Exception as e:
+                outcomes.append(e)
+        return outcomes
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=min(jobs, len(work)),
+                             initializer=reset_worker) as pool:
+        futures = [pool.submit(fn, job) for job in work]
+        for fut in futures:
+            try:
+                outcomes.append(fut.result())
+            except Exception as e:
+                outcomes.append(e)
+    return outcomes
+
+
+def _hash_job(src_path: str) -> dict:
+    """Adaptador para el pool: hash_file → dict comparable con el índice."""
+    from image_hashes import hash_file, hash_hex
+
+    h, width, height = hash_file(src_path)
+    return {"hash": hash_hex(h), "width": width, "height": height, "path": src_path}
+
+
+def find_duplicate(probe: dict, index: HashIndex, batch: list[dict],
+                   exclude: Collection[str] = ()) -> str | None:
+    """Ruta pública de una imagen casi idéntica a probe, o None.
+
+    Busca en el índice del árbol y en las imágenes anteriores del mismo lote
+    (batch: dicts como los de _hash_job, más public_path). exclude son las
+    rutas que la propia imagen va a sustituir (con --on-conflict overwrite).
+    Cada candidato del hash se confirma comparando miniaturas.
+    """
+    from image_hashes import confirm, similar
+
+    matches = index.find(int(probe["hash"], 16), probe["width"], probe["height"])
+    for _, public_path in matches:
+        if public_path not in exclude and confirm(probe["path"], index.path(public_path)):
+            return public_path
+    for other in batch:
+        if similar(probe, other) and confirm(probe["path"], other["path"]):
+            return other["public_path"]
+    return None
+
+
+def import_batch(
+    sources: list[Path],
+    post_slug: str,
+    alt_template: str = "{name}",
+    caption_template: str | None = None,
+    policy: str = "skip",
+    jobs: int | None = None,
+    assets_dir: Path = ASSETS_IMAGES_DIR,
+    ladder: tuple[int, ...] | None = None,
+    max_kb: int | None = None,
+    on_duplicate: str = "import",
+    hash_cache: Path | None = None,
+    explain: bool = False,
+    hash_names: bool = False,
+    content_dir: Path = CONTENT_DIR,
+) -> list[dict]:
+    """Importa varias imágenes a un post sin interacción.
+
+    Convierte en paralelo (un proceso por núcleo salvo que se indique jobs)
+    y devuelve un dict por imagen con source, dest, public_path, kb, snippet
+    y status ('imported', 'skipped', 'reused' o 'error', con 'error' si
+    falló). Las importadas llevan además 'stats' (ver convert_and_save). Con
+    ladder se genera la escalera de cada imagen y se registra en el
+    ladder.json del post; max_kb y explain se aplican a cada imagen como en
+    convert_and_save. Los marcadores de posición van al placeholders.json
+    del post.
+
+    Cada imagen se compara antes con el índice de hashes de assets_dir (y con
+    las anteriores del lote): si es casi idéntica a otra, 'duplicate_of' lleva
+    la ruta pública de esa otra. Con on_duplicate='reuse' no se escribe nada y
+    el snippet apunta a la existente (status 'reused').
+
+    Con hash_names cada imagen se guarda como <stem>.<hash>.webp (ver
+    hashed_name) y la política de conflictos mira las versiones de <stem>:
+    con 'overwrite' la nueva sustituye a las anteriores, y las referencias
+    de los posts de content_dir pasan a la nueva (ver replace_versions). Lo
+    sustituido queda en 'replaced' y los posts cambiados en 'rewritten'.
+    """
+    from image_hashes import HashIndex
+
+    if on_duplicate not in DUPLICATE_POLICIES:
+        raise ValueError(
+            f"política desconocida: {on_duplicate!r}. Usa {', '.join(DUPLICATE_POLICIES)}."
+        )
+    index = HashIndex(assets_dir, hash_cache).refresh()
+    with STAGES.stage("dhash.sources"):
+        probes = _run_jobs(_hash_job, [str(src) for src in sources], jobs)
+
+    results: list[dict] = []
+    pending: list[dict] = []
+    batch: list[dict] = []
+    taken: set[Path] = set()
+    for n, (src, probe) in enumerate(zip(sources, probes), 1):
+        stem = _slug_from_filename(src.name) or src.stem
+        dest = plan_destination(assets_dir / post_slug / f"{stem}.webp", policy, taken,
+                                hashed=hash_names)
+        item = {"source": str(src), "dest": None, "public_path": None,
+                "kb": None, "snippet": None, "status": "skipped", "duplicate_of": None}
+        results.append(item)
+        if dest is None:
+            continue
+        public_path = "/images/blog/" + dest.relative_to(assets_dir).as_posix()
+        alt = _format_template(alt_template, src, n, post_slug)
+        caption = (
+            _format_template(caption_template, src, n, post_slug)
+            if caption_template else None
+        )
+        replaces = [public_path] + [
+            "/images/blog/" + p.relative_to(assets_dir).as_posix()
+            for p in versions(dest, hash_names)
+        ]
+        if not isinstance(probe, Exception):
+            item["duplicate_of"] = find_duplicate(probe, index, batch, exclude=replaces)
+        if item["duplicate_of"] and on_duplicate == "reuse":
+            item.update(status="reused", public_path=item["duplicate_of"],
+                        snippet=build_snippet(item["duplicate_of"], alt, "figure", caption))
+            continue
+        taken.add(dest)
+        item.update(dest=str(dest), public_path=public_path,
+                    snippet=build_snippet(public_path, alt, "figure", caption))
+        pending.append(item)
+        if not isinstance(probe, Exception):
+            batch.append({**probe, "public_path": public_path})
+
+    work = [
+        {"src_path": item["source"], "dest_path": item["dest"], "ladder": ladder,
+         "max_kb": max_kb, "explain": explain, "hash_name": hash_names}
+        for item in pending
+    ]
+    outcomes = _run_jobs(_convert_job, work, jobs)
+
+    # Con hash_names la ruta definitiva solo se conoce tras codificar: se
+    # corrigen la de cada imagen y las que la citan como duplicada.
+    planned = [Path(item["dest"]) for item in pending]
+    final: dict[str, str] = {}
+    for item, outcome in zip(pending, outcomes):
+        if isinstance(outcome, Exception):
+            item.update(status="error", error=str(outcome), snippet=None)
+        else:
+            kb, stats, samples = outcome
+            STAGES.merge(samples)
+            item.update(status="imported", kb=kb, stats=stats)
+            if stats["dest"] != item["dest"]:
+                public_path = "/images/blog/" + Path(stats["dest"]).relative_to(
+                    assets_dir).as_posix()
+                final[item["public_path"]] = public_path
+                item["dest"] = stats["dest"]
+    for item in results:
+        if item["duplicate_of"] in final:
+            item["duplicate_of"] = final[item["duplicate_of"]]
+        if item["public_path"] in final:
+            old, item["public_path"] = item["public_path"], final[item["public_path"]]
+            item["snippet"] = item["snippet"].replace(f'src="{old}"',
+                                                      f'src="{item["public_path"]}"')
+
+    ladders = {
+        Path(item["dest"]).name: item["stats"]["ladder"]
+        for item in pending if item["status"] == "imported" and "ladder" in item["stats"]
+    }
+    if ladders:
+        update_ladder_manifest(assets_dir / post_slug, ladders)
+    previews = {
+        Path(item["dest"]).name: item["stats"]["placeholder"]
+        for item in pending if item["status"] == "imported"
+    }
+    if previews:
+        from placeholders import update_placeholders
+
+        update_placeholders(assets_dir / post_slug, previews)
+    if hash_names:
+        for item, logical in zip(pending, planned):
+            if item["status"] == "imported":
+                item.update(replace_versions(Path(item["dest"]), logical,
+                                             assets_dir, content_dir))
+    return results
+
+
+def _print_batch(results: list[dict], show_stats: bool = False, explain: bool = False) -> None:
+    """Resumen legible del lote más el bloque de snippets listo para pegar."""
+    for item in results:
+        name = Path(item["source"]).name
+        if item["status"] == "imported":
+            dest = Path(item["dest"])
+            try:
+                dest = dest.relative_to(PROJECT_ROOT)
+            except ValueError:
+                pass
+            print(f"✓ {dest} ({item['kb']} KB, {format_encoding(item['stats'])})")
+            if show_stats:
+                print(f"    {format_stats(item['stats'])}")
+            if explain:
+                print(f"    {format_explain(item['stats'])}")
+            normalized = format_normalized(item["stats"])
+            if normalized:
+                print(f"    {normalized}")
+            if item["duplicate_of"]:
+                print(f"    ! casi idéntica a {item['duplicate_of']} "
+                      "(--on-duplicate reuse la reutiliza)")
+            replaced = format_replaced(item)
+            if replaced:
+                print(f"    {replaced}")
+        elif item["status"] == "reused":
+            print(f"= {name}: reutiliza {item['public_path']}")
+        elif item["status"] == "skipped":
+            print(f"- {name}: ya existe, omitida")
+        else:
+            print(f"✗ {name}: {item['error']}")
+
+    snippets = [item["snippet"] for item in results if item["snippet"]]
+    if not snippets:
+        return
+    print("\nCopia esto en tu .mdx:\n")
+    print('import Figure from \'@components/Figure.astro\';\n')
+    print("\n\n".join(snippets))
+
+
+def _parse_widths(raw: str) -> tuple[int, ...]:
+    """'480,750,1200' → (480, 750, 1200), para --ladder."""
+    try:
+        widths = tuple(int(w) for w in raw.split(",") if w.strip())
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"anchos no válidos: {raw!r}")
+    if not widths or min(widths) <= 0:
+        raise argparse.ArgumentTypeError(f"anchos no válidos: {raw!r}")
+    return widths
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Importa imágenes a src/assets/images/blog/<post>/ y genera el <Figure>.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Ejemplos:
+  %(prog)s ~/Descargas/diagrama.png               Modo interactivo (una imagen)
+  %(prog)s --post mi-post ~/capturas/             Importa toda la carpeta
+  %(prog)s --post mi-post "capturas/*.png" --alt "Paso {n}: {name}"
+  %(prog)s --post mi-post capturas/ --on-conflict suffix --json -
+  %(prog)s --post mi-post capturas/ --on-duplicate reuse
+  %(prog)s --post mi-post capturas/ --explain     Por qué cada codificación
+  %(prog)s --post mi-post captura.png --hash-names --on-conflict overwrite
+  %(prog)s --dedupe-report                        Duplicados ya importados
+        """,
+    )
+    parser.add_argument("sources", nargs="*", metavar="imagen",
+                        help="imagen, carpeta o glob (varias solo en modo lote)")
+    parser.add_argument("--post", default=None, metavar="SLUG",
+                        help="slug del artículo destino; activa el modo lote sin preguntas")
+    parser.add_argument("--alt", default="{name}", metavar="PLANTILLA",
+                        help="plantilla del texto alternativo: {name}, {stem}, {n}, {post} "
+                             "(por defecto: {name})")
+    parser.add_argument("--caption", default=None, metavar="PLANTILLA",
+                        help="plantilla del caption (mismos campos que --alt)")
+    parser.add_argument("--on-conflict", choices=CONFLICT_POLICIES, default="skip",
+                        help="qué hacer si el destino ya existe (por defecto: skip)")
+    parser.add_argument("--on-duplicate", choices=DUPLICATE_POLICIES, default="import",
+                        help="qué hacer si la imagen es casi idéntica a otra ya importada: "
+                             "import la convierte igualmente y avisa, reuse usa la existente "
+                             "(por defecto: import)")
+    parser.add_argument("--dedupe-report", action="store_true",
+                        help="lista los grupos de imágenes casi idénticas de "
+                             "src/assets/images/blog y los bytes recuperables")
+    parser.add_argument("--jobs", "-j", type=int, default=None, metavar="N",
+                        help="procesos para convertir (por defecto: núcleos de la CPU)")
+    parser.add_argument("--json", nargs="?", const="-", default=None, metavar="FICHERO",
+                        help="escribe el resultado en JSON (a stdout con '-' o sin valor)")
+    parser.add_argument("--ladder", action="store_const", const=LADDER_WIDTHS, default=None,
+                        help="genera la escalera responsive en WebP y AVIF "
+                             f"({','.join(map(str, LADDER_WIDTHS))} px)")
+    parser.add_argument("--ladder-widths", dest="ladder", type=_parse_widths,
+                        metavar="ANCHOS", help="como --ladder con otros anchos (ej: 640,1280)")
+    parser.add_argument("--max-kb", type=int, default=None, metavar="KB",
+                        help="ajusta la calidad WebP para que cada imagen no pase de KB")
+    parser.add_argument("--timings", action="store_true",
+                        help="muestra el tiempo por etapa (total, media, p95) y lo "
+                             "guarda en .cache/timings/import_image.json")
+    parser.add_argument("--profile", default=None, metavar="FICHERO.prof",
+                        help="ejecuta bajo cProfile y guarda las estadísticas "
+                             "(usa -j 1 para incluir la conversión)")
+    parser.add_argument("--stats", action="store_true",
+                        help="muestra tamaño decodificado, tiempo y pico de memoria por imagen")
+    parser.add_argument("--explain", action="store_true",
+                        help="explica por qué cada imagen va sin pérdida, con paleta o con "
+                             "pérdida y cuánto pesaría con cada una")
+    parser.add_argument("--hash-names", action="store_true",
+                        help="añade al nombre un hash del contenido (<nombre>.<hash>.webp) "
+                             "para poder cachearlas como immutable; al sustituir una imagen "
+                             "se actualizan las referencias de los posts")
+    return parser
+
+
+def main_batch(args: argparse.Namespace) -> None:
+    from image_hashes import DEFAULT_HASH_CACHE
+
+    posts = get_posts(str(CONTENT_DIR), DEFAULT_CACHE_PATH)
+    if args.post not in posts:
+        print(f"Error: no existe el artículo '{args.post}' en src/content/blog/")
+        sys.exit(1)
+
+    sources = expand_sources(args.sources)
+    missing = [str(p) for p in sources if not p.is_file()]
+    if missing:
+        print(f"Error: no existen: {', '.join(missing)}")
+        sys.exit(1)
+    if not sources:
+        print("Error: no se encontraron imágenes que importar.")
+        sys.exit(1)
+
+    results = import_batch(
+        sources, args.post, args.alt, args.caption, args.on_conflict, args.jobs,
+        ladder=args.ladder, max_kb=args.max_kb,
+        on_duplicate=args.on_duplicate, hash_cache=DEFAULT_HASH_CACHE, explain=args.explain,
+        hash_names=args.hash_names,
+    )
+
+    if args.json == "-":
+        json.dump(results, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        _print_batch(results, args.stats, args.explain)
+        if args.json:
+            Path(args.json).write_text(
+                json.dumps(results, ensure_ascii=False, indent=2) + "\n", encoding="utf-8"
+            )
+
+    if any(item["status"] == "error" for item in results):
+        sys.exit(1)
+
+
+def main_interactive(args: argparse.Namespace) -> None:
+    from PIL import Image
+
+    from image_hashes import DEFAULT_HASH_CACHE, HashIndex
+    from placeholders import update_placeholders
+
+    if len(args.sources) != 1:
         print("Uso: python3 scripts/import_image.py <ruta-imagen>")
+        print("     (para varias imágenes usa el modo lote con --post <slug>)")
         sys.exit(1)
 
-    src_path = Path(sys.argv[1])
+    src_path = Path(args.sources[0])
     if not src_path.exists():
         print(f"Error: no existe el archivo '{src_path}'")
         sys.exit(1)
@@ -169,7 +991,7 @@ def main() -> None:
         sys.exit(1)
 
     # Elegir post
-    posts = get_posts(str(CONTENT_DIR))
+    posts = get_posts(str(CONTENT_DIR), DEFAULT_CACHE_PATH)
     if not posts:
         print("Error: no se encontraron posts en src/content/blog/")
         sys.exit(1)
@@ -187,6 +1009,18 @@ def main() -> None:
     kind = "figure"
     caption = input("\nCaption (opcional, Enter para omitir): ").strip() or None
 
+    # ¿Ya está importada (quizá con otro nombre o en otro post)?
+    index = HashIndex(ASSETS_IMAGES_DIR, DEFAULT_HASH_CACHE).refresh()
+    duplicate = find_duplicate(_hash_job(str(src_path)), index, [])
+    if duplicate:
+        print(f"\nEsta imagen es casi idéntica a {duplicate}")
+        answer = input("¿Reutilizarla en vez de importar otra copia? [S/n]: ").strip().lower()
+        if answer in ("", "s", "si", "sí", "y", "yes"):
+            print("\nCopia esto en tu .mdx:\n")
+            print('import Figure from \'@components/Figure.astro\';\n')
+            print(build_snippet(duplicate, alt, kind, caption))
+            return
+
     # Destino
     stem = _slug_from_filename(src_path.name)
     if not stem:
@@ -194,18 +1028,36 @@ def main() -> None:
     dest = ASSETS_IMAGES_DIR / post_slug / f"{stem}.webp"
 
     # Resolver conflicto si existe
-    dest = _resolve_conflict(dest, PROJECT_ROOT)
+    dest = _resolve_conflict(dest, PROJECT_ROOT, hashed=args.hash_names)
     if dest is None:
         print("Cancelado.")
         return
 
     # Convertir y guardar
-    kb = convert_and_save(str(src_path), str(dest))
+    stats: dict = {}
+    kb = convert_and_save(str(src_path), str(dest), stats=stats, ladder=args.ladder,
+                          max_kb=args.max_kb, explain=args.explain, hash_name=args.hash_names)
+    logical, dest = dest, Path(stats["dest"])
+    if "ladder" in stats:
+        update_ladder_manifest(dest.parent, {dest.name: stats["ladder"]})
+    update_placeholders(dest.parent, {dest.name: stats["placeholder"]})
+    replaced = format_replaced(replace_versions(dest, logical)) if args.hash_names else None
     # Ruta pública sintética: Figure.astro la resuelve contra
     # src/assets/images/blog, no es una ruta real servida desde /public.
     public_path = "/images/blog/" + dest.relative_to(ASSETS_IMAGES_DIR).as_posix()
 
-    print(f"\n✓ {dest.relative_to(PROJECT_ROOT)} ({kb} KB)")
+    print(f"\n✓ {dest.relative_to(PROJECT_ROOT)} ({kb} KB, {format_encoding(stats)})")
+    if args.stats:
+        print(f"  {format_stats(stats)}")
+    if args.explain:
+        print(f"  {format_explain(stats)}")
+    normalized = format_normalized(stats)
+    if normalized:
+        print(f"  {normalized}")
+    if replaced:
+        print(f"  {replaced}")
+    if "ladder" in stats:
+        print(f"  escalera: {len(stats['ladder'])} variantes → {LADDER_MANIFEST}")
     print("\nCopia esto en tu .mdx:\n")
     print('import Figure from \'@components/Figure.astro\';\n')
     print(build_snippet(public_path, alt, kind, caption))
@@ -213,5 +1065,48 @@ def main() -> None:
     print("      Añade el import al principio del artículo si no está ya.")
 
 
+def main_dedupe_report(args: argparse.Namespace) -> None:
+    """Grupos de casi-duplicados del árbol y los bytes que se ahorrarían."""
+    from image_hashes import DEFAULT_HASH_CACHE, HashIndex
+
+    index = HashIndex(ASSETS_IMAGES_DIR, DEFAULT_HASH_CACHE).refresh()
+    clusters = index.clusters()
+    if args.json:
+        report = json.dumps(clusters, ensure_ascii=False, indent=2)
+        if args.json == "-":
+            print(report)
+        else:
+            Path(args.json).write_text(report + "\n", encoding="utf-8")
+            print(f"Informe escrito en {args.json}")
+        return
+
+    print(f"=== Duplicados en {ASSETS_IMAGES_DIR.relative_to(PROJECT_ROOT)} "
+          f"({len(index.entries())} imágenes) ===\n")
+    if not clusters:
+        print("Ningún duplicado ✓")
+        return
+    entries = index.entries()
+    for group in clusters:
+        print(f"  {group['keep']} ({entries[group['keep']]['size'] // 1024} KB)")
+        for key in group["copies"]:
+            print(f"    = {key} ({entries[key]['size'] // 1024} KB)")
+    saved = sum(group["saved"] for group in clusters)
+    print(f"\n{len(clusters)} grupos; se ahorrarían {saved // 1024} KB "
+          "reutilizando la primera imagen de cada grupo.")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.dedupe_report:
+        command = main_dedupe_report
+    elif not args.sources:
+        parser.error("falta la imagen a importar")
+    else:
+        command = main_batch if args.post is not None else main_interactive
+    run_instrumented(partial(command, args), "import_image",
+                     timings=args.timings, profile=args.profile)
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,208 @@
+"""
+og_cards.py – Tarjetas Open Graph (1200x630) pre-renderizadas.
+
+src/pages/og/[...id].png.ts dibujaba cada tarjeta con satori + resvg en cada
+astro build. Aquí se dibuja la misma composición con Pillow y la fuente
+JetBrains Mono de src/assets/fonts, y se guarda en .cache/og/<id>.png junto
+con un manifest.json {id: {title, category, version, hash}}. La ruta de Astro
+sirve el PNG cuando el manifiesto coincide con el título, la categoría y la
+versión del dibujo; si no (tarjeta que falta o desactualizada), vuelve a
+satori. Por eso las dos tienen que dibujar lo mismo: un cambio aquí va
+también a la ruta, incrementando OG_VERSION en ambos sitios.
+
+Solo se redibujan las tarjetas cuyo hash (título, categoría, versión)
+cambió; las de posts que ya no existen se borran.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from frontmatter_index import CACHE_DIR, PROJECT_ROOT
+from timings import STAGES, reset_worker
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+OG_DIR = CACHE_DIR / "og"
+OG_MANIFEST = "manifest.json"
+# Incrementar si cambia el dibujo (aquí y en src/pages/og/[...id].png.ts):
+# invalida todas las tarjetas
+OG_VERSION = 2
+OG_WIDTH, OG_HEIGHT = 1200, 630
+OG_FONT = PROJECT_ROOT / "src" / "assets" / "fonts" / "JetBrainsMono-Regular.ttf"
+
+# Paleta y medidas de la tarjeta de satori
+BG = "#0D1117"
+BADGE_BG = "#161B22"
+BORDER = "#30363D"
+TEXT = "#E6EDF3"
+GREEN = "#58D5A2"
+MUTED = "#8B949E"
+ORANGE = "#FF6D00"
+PADDING = 60
+GAP = 20
+# letterSpacing: 0.05em de la etiqueta de categoría
+BADGE_SPACING = 0.05
+LINE_HEIGHT = 1.2
+# Títulos largos (como en satori, por caracteres) van a 36 px en vez de 44
+LONG_TITLE = 60
+TITLE_SIZES = (44, 36)
+TITLE_MAX_LINES = 4
+SITE = "tengoping.com"
+PROMPT = "root@tengoping:~$_"
+# Colores de la paleta del PNG
+OG_COLORS = 64
+
+# (id, título, categoría)
+Card = tuple[str, str, str]
+
+
+def card_hash(card: Card) -> str:
+    """Hash de lo que se dibuja en la tarjeta."""
+    _, title, category = card
+    payload = json.dumps(
+        {"title": title, "category": category,
+         "size": [OG_WIDTH, OG_HEIGHT], "version": OG_VERSION},
+        ensure_ascii=False, sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def render_card(title: str, category: str, font_path: str | Path = OG_FONT) -> Image.Image:
+    """Dibuja la tarjeta (RGB, OG_WIDTH x OG_HEIGHT)."""
+    from PIL import Image, ImageDraw
+
+    from cover_layout import measurer_for
+
+    font = str(font_path)
+    prompt = measurer_for(font, 18)
+    badge = measurer_for(font, 16)
+    title_size = TITLE_SIZES[1] if len(title) > LONG_TITLE else TITLE_SIZES[0]
+    title_metrics = measurer_for(font, title_size)
+    brand = measurer_for(font, 22)
+    max_width = OG_WIDTH - 2 * PADDING
+
+    img = Image.new("RGB", (OG_WIDTH, OG_HEIGHT), BG)
+    draw = ImageDraw.Draw(img)
+
+    # $ cat ./blog/<categoría>/
+    y = PADDING
+    draw.text((PADDING, y), "$", fill=GREEN, font=prompt.font)
+    draw.text((PADDING + prompt.width("$") + 12, y), f"cat ./blog/{category.lower()}/",
+              fill=MUTED, font=prompt.font)
+    y += round(18 * LINE_HEIGHT) + GAP
+
+    # Etiqueta de categoría, letra a letra por el espaciado
+    label = category.upper()
+    spacing = 16 * BADGE_SPACING
+    label_w = badge.font.getlength(label) + spacing * len(label)
+    badge_h = round(16 * LINE_HEIGHT) + 16
+    draw.rectangle([PADDING, y, PADDING + round(label_w) + 32, y + badge_h],
+                   fill=BADGE_BG, outline=BORDER)
+    x = PADDING + 16
+    for ch in label:
+        draw.text((x, y + 8), ch, fill=ORANGE, font=badge.font)
+        x += badge.font.getlength(ch) + spacing
+    y += badge_h + GAP + 12
+
+    # Título en varias líneas
+    for line in title_metrics.wrap(title, max_width, max_lines=TITLE_MAX_LINES):
+        draw.text((PADDING, y), line, fill=TEXT, font=title_metrics.font)
+        y += round(title_size * LINE_HEIGHT)
+
+    # Pie: separador, prompt y dominio
+    footer_y = OG_HEIGHT - PADDING - round(22 * LINE_HEIGHT)
+    draw.line([PADDING, footer_y - 24, OG_WIDTH - PADDING, footer_y - 24], fill=BORDER)
+    draw.text((PADDING, footer_y), PROMPT, fill=GREEN, font=brand.font)
+    draw.text((OG_WIDTH - PADDING - prompt.width(SITE), footer_y + 3), SITE,
+              fill=MUTED, font=prompt.font)
+    return img
+
+
+def _render_job(card: Card, out_dir: str) -> dict:
+    """Dibuja y escribe una tarjeta. Devuelve {"id", "bytes", "timings"}."""
+    from PIL import Image
+
+    from image_codec import encode, write_if_changed
+
+    card_id, title, category = card
+    with STAGES.stage("og.render"):
+        img = render_card(title, category)
+    with STAGES.stage("og.encode"):
+        # Colores planos y texto suavizado caben en 64 colores: un tercio de
+        # lo que pesa el PNG RGB. FASTOCTREE cuantiza en la mitad de tiempo
+        # que el median cut por defecto.
+        img = img.quantize(colors=OG_COLORS, method=Image.Quantize.FASTOCTREE)
+        data = encode(img, "PNG", optimize=True)
+    with STAGES.stage("write"):
+        if write_if_changed(Path(out_dir) / f"{card_id}.png", data):
+            STAGES.add_bytes(len(data))
+    return {"id": card_id, "bytes": len(data), "timings": STAGES.drain()}
+
+
+def load_manifest(out_dir: str | Path = OG_DIR) -> dict[str, dict]:
+    """Devuelve {id: {title, category, version, hash}}; vacío si no existe o está roto."""
+    try:
+        data = json.loads((Path(out_dir) / OG_MANIFEST).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def save_manifest(manifest: dict[str, dict], out_dir: str | Path = OG_DIR) -> None:
+    path = Path(out_dir) / OG_MANIFEST
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(dict(sorted(manifest.items())), ensure_ascii=False, indent=2)
+                   + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def render_cards(cards: list[Card], out_dir: str | Path = OG_DIR, jobs: int | None = None,
+                 force: bool = False, prune: bool = True) -> tuple[list[dict], list[str]]:
+    """Pone al día las tarjetas de cards en out_dir.
+
+    Redibuja las que faltan o cuyo hash cambió (todas con force) y, con
+    prune, borra las de ids que ya no están en cards. Devuelve (resultados de
+    las dibujadas en el orden de cards, ids borrados).
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest = load_manifest(out_dir)
+    hashes = {card[0]: card_hash(card) for card in cards}
+    stale = [
+        card for card in cards
+        if force
+        or manifest.get(card[0], {}).get("hash") != hashes[card[0]]
+        or not (out_dir / f"{card[0]}.png").exists()
+    ]
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(stale) < 2:
+        results = [_render_job(card, str(out_dir)) for card in stale]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        from functools import partial
+
+        with ProcessPoolExecutor(max_workers=min(jobs, len(stale)),
+                                 initializer=reset_worker) as pool:
+            results = list(pool.map(partial(_render_job, out_dir=str(out_dir)), stale))
+    for result in results:
+        STAGES.merge(result.pop("timings"))
+
+    removed = []
+    if prune:
+        for card_id in sorted(set(manifest) - set(hashes)):
+            (out_dir / f"{card_id}.png").unlink(missing_ok=True)
+            del manifest[card_id]
+            removed.append(card_id)
+
+    for card_id, title, category in cards:
+        manifest[card_id] = {"title": title, "category": category, "version": OG_VERSION,
+                             "hash": hashes[card_id]}
+    save_manifest(manifest, out_dir)
+    return results, removed
@@ -0,0 +1,536 @@
+"""
+optimize_images.py – Reoptimiza en bloque las imágenes ya comprometidas.
+
+Las portadas y figuras de src/assets/images se escribieron con los ajustes
+que tenían los scripts en su momento. `optimize` vuelve a codificar cada
+fichero con los ajustes actuales (SETTINGS) y solo sustituye el original si
+el resultado pesa menos y sigue siendo visualmente equivalente (SSIM o PSNR
+por encima del umbral). Las portadas que nombra el image: de algún post no
+se tocan: son de generate-images.py, que las regenera desde el frontmatter.
+
+`normalize` aplica a lo ya importado lo que import_image.py hace ahora al
+importar: girar según EXIF, pasar a sRGB y quitar metadatos.
+
+`placeholders` calcula el marcador de posición (ver placeholders.py) de las
+imágenes que aún no lo tienen en el placeholders.json de su carpeta.
+
+Uso:
+  python3 scripts/optimize_images.py optimize [ruta...] [--jobs N] [--dry-run]
+  python3 scripts/optimize_images.py normalize [ruta...] [--jobs N] [--dry-run]
+  python3 scripts/optimize_images.py placeholders [ruta...] [--jobs N] [--force]
+
+Los ficheros procesados se anotan en .cache/optimize-manifest.json (o
+normalize-manifest.json) con su mtime y tamaño: una segunda pasada sin
+cambios no vuelve a decodificar nada.
+
+optimize y normalize se saltan las figuras importadas con --hash-names
+(<stem>.<hash>.webp): reescribirlas cambiaría sus bytes pero no su nombre, y
+se sirven con caché immutable. Para recodificar una, vuelve a importarla.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Collection
+
+from PIL import Image
+
+from asset_refs import ASSET_SUFFIXES, ladder_variants
+from frontmatter_index import CACHE_DIR, CONTENT_DIR, DEFAULT_CACHE_PATH, load_index
+from image_codec import (
+    analyze, choose_webp, encode, metadata_bytes, normalize, orientation, psnr, ssim, write_atomic,
+)
+from import_image import is_hashed
+from placeholders import file_placeholder, load_placeholders, update_placeholders
+from timings import STAGES, reset_worker, run_instrumented
+
+# ---------------------------------------------------------------------------
+# Constantes de módulo
+# ---------------------------------------------------------------------------
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+IMAGES_DIR = PROJECT_ROOT / "src" / "assets" / "images"
+DEFAULT_MANIFEST = CACHE_DIR / "optimize-manifest.json"
+DEFAULT_NORMALIZE_MANIFEST = CACHE_DIR / "normalize-manifest.json"
+MANIFEST_VERSION = 1
+
+# Ajustes actuales por extensión: los mismos con los que escriben los
+# scripts. La calidad JPEG es la de las portadas (JPEG_QUALITY en
+# generate-images.py, con los PINNED_PARAMS de encode()) y la WebP la de
+# import_image.py, que pasa por choose_webp: se mantiene la elección sin
+# pérdida, con paleta o con pérdida. Si se mejoran, incrementar
+# SETTINGS_VERSION: el manifiesto deja de dar por procesados los ficheros y
+# la siguiente pasada los vuelve a probar.
+SETTINGS_VERSION = 2
+SETTINGS: dict[str, tuple[str, dict]] = {
+    ".jpg": ("JPEG", {"quality": 90}),
+    ".jpeg": ("JPEG", {"quality": 90}),
+    ".webp": ("WEBP", {"quality": 80}),
+    ".png": ("PNG", {"optimize": True}),
+}
+# Las portadas que nombra el image: de los posts son de generate-images.py
+# (ver generated_covers): recodificarlas aquí las cambiaría hasta el próximo
+# --auto --force, que las volvería a dejar como estaban.
+
+# Umbral por defecto de cada métrica para aceptar la nueva versión
+METRICS = {"ssim": ssim, "psnr": psnr}
+DEFAULT_THRESHOLDS = {"ssim": 0.99, "psnr": 40.0}
+
+
+def collect_files(roots: list[Path], suffixes=SETTINGS) -> list[Path]:
+    """Imágenes optimizables (o con otra de suffixes) bajo roots (ficheros o
+    carpetas, recursivo)."""
+    found: list[Path] = []
+    for root in roots:
+        if root.is_file():
+            found.append(root)
+            continue
+        found.extend(
+            p for p in sorted(root.rglob("*"))
+            if p.is_file() and p.suffix.lower() in suffixes
+        )
+    return list(dict.fromkeys(p.resolve() for p in found))
+
+
+def _reencode(img: Image.Image, suffix: str) -> bytes:
+    fmt, params = SETTINGS[suffix]
+    if fmt == "JPEG" and img.mode not in ("RGB", "L", "CMYK"):
+        img = img.convert("RGB")
+    # Conservar perfil de color y EXIF: esta pasada no cambia qué se ve
+    extra = {key: img.info[key] for key in ("icc_profile", "exif") if img.info.get(key)}
+    if fmt == "WEBP":
+        return choose_webp(img, analyze(img), params["quality"], **extra)[0]
+    return encode(img, fmt, **params, **extra)
+
+
+def generated_covers(content_dir: Path = CONTENT_DIR, images_dir: Path = IMAGES_DIR,
+                     cache_path: Path | None = DEFAULT_CACHE_PATH) -> frozenset[Path]:
+    """Portadas que generate-images.py --auto escribe desde el frontmatter.
+
+    Son images_dir/<nombre del image: de cada post>, sin extensión: cuentan
+    en cualquiera de los formatos de --formats.
+    """
+    images_dir = images_dir.resolve()
+    return frozenset(
+        (images_dir / Path(fm["image"]).name).with_suffix("")
+        for _, fm in load_index(content_dir, cache_path).posts() if fm.get("image")
+    )
+
+
+def optimize_file(path: str, metric: str = "ssim", threshold: float | None = None,
+                  dry_run: bool = False, covers: Collection[Path] = ()) -> dict:
+    """Reoptimiza un fichero. Función de módulo para poder usarla en el pool.
+
+    Devuelve {"path", "before", "after", "score", "status", "timings"} con
+    status 'optimized' (sustituido, o sustituible con dry_run), 'larger' (no
+    ahorra bytes), 'degraded' (no pasa el umbral), 'skipped' (animada, con
+    nombre de --hash-names o portada de covers, ver generated_covers) o
+    'error' (con "error").
+    """
+    threshold = DEFAULT_THRESHOLDS[metric] if threshold is None else threshold
+    src = Path(path)
+    before = src.stat().st_size
+    result = {"path": path, "before": before, "after": before, "score": None,
+              "status": "larger"}
+    if is_hashed(src) or src.resolve().with_suffix("") in covers:
+        return {**result, "status": "skipped", "timings": STAGES.drain()}
+    try:
+        with STAGES.stage("decode"):
+            img = Image.open(src)
+            if getattr(img, "n_frames", 1) > 1:
+                result["status"] = "skipped"
+                return {**result, "timings": STAGES.drain()}
+            img.load()
+        with STAGES.stage("encode"):
+            data = _reencode(img, src.suffix.lower())
+        if len(data) < before:
+            with STAGES.stage("compare"):
+                candidate = Image.open(io.BytesIO(data))
+                score = METRICS[metric](img, candidate)
+            result["score"] = round(score, 4)
+            if score < threshold:
+                result["status"] = "degraded"
+            else:
+                result.update(status="optimized", after=len(data))
+                if not dry_run:
+                    with STAGES.stage("write"):
+                        write_atomic(src, data)
+                    STAGES.add_bytes(len(data))
+    except Exception as e:
+        result.update(status="error", error=str(e))
+    return {**result, "timings": STAGES.drain()}
+
+
+def normalize_file(path: str, dry_run: bool = False) -> dict:
+    """Aplica image_codec.normalize a una imagen ya importada.
+
+    Solo recodifica (con SETTINGS) las que traen metadatos, orientación EXIF
+    o CMYK; el resto quedan como 'clean'. Devuelve lo mismo que
+    optimize_file más metadata_bytes, transposed y converted, con status
+    'normalized', 'clean', 'skipped' o 'error'.
+    """
+    src = Path(path)
+    before = src.stat().st_size
+    result = {"path": path, "before": before, "after": before, "status": "clean",
+              "metadata_bytes": 0, "transposed": False, "converted": False}
+    if is_hashed(src):
+        return {**result, "status": "skipped", "timings": STAGES.drain()}
+    try:
+        with STAGES.stage("decode"):
+            img = Image.open(src)
+            if getattr(img, "n_frames", 1) > 1:
+                result["status"] = "skipped"
+                return {**result, "timings": STAGES.drain()}
+            if not (metadata_bytes(img) or orientation(img) != 1 or img.mode == "CMYK"):
+                return {**result, "timings": STAGES.drain()}
+            img.load()
+        with STAGES.stage("normalize"):
+            img, report = normalize(img)
+        with STAGES.stage("encode"):
+            data = _reencode(img, src.suffix.lower())
+        result.update(report, status="normalized", after=len(data))
+        if not dry_run:
+            with STAGES.stage("write"):
+                write_atomic(src, data)
+            STAGES.add_bytes(len(data))
+    except Exception as e:
+        result.update(status="error", error=str(e))
+    return {**result, "timings": STAGES.drain()}
+
+
+def placeholder_file(path: str) -> dict:
+    """Marcador de posición de una imagen, para el pool.
+
+    Devuelve {"path", "status", "placeholder", "timings"} con status
+    'computed', o 'error' (con "error"). Decodifica como generate-images.py
+    (ver file_placeholder): una portada da la misma entrada venga de donde
+    venga.
+    """
+    result = {"path": path, "status": "computed", "placeholder": None}
+    try:
+        with STAGES.stage("placeholder"):
+            result["placeholder"] = file_placeholder(path)
+    except Exception as e:
+        result.update(status="error", error=str(e))
+    return {**result, "timings": STAGES.drain()}
+
+
+def _map(work, paths: list[str], jobs: int | None) -> list[dict]:
+    """work sobre cada ruta, en un pool de procesos si compensa."""
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(paths) < 2:
+        return [work(p) for p in paths]
+    with ProcessPoolExecutor(max_workers=min(jobs, len(paths)),
+                             initializer=reset_worker) as pool:
+        return list(pool.map(work, paths, chunksize=4))
+
+
+# ---------------------------------------------------------------------------
+# Manifiesto
+# ---------------------------------------------------------------------------
+
+
+def _settings_key(metric: str, threshold: float | None) -> str:
+    threshold = DEFAULT_THRESHOLDS[metric] if threshold is None else threshold
+    return f"v{SETTINGS_VERSION}:{metric}:{threshold}"
+
+
+def load_manifest(path: Path, settings_key: str) -> dict[str, dict]:
+    """Entradas del manifiesto, o {} si no existe o es de otros ajustes."""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != MANIFEST_VERSION or data.get("settings") != settings_key:
+        return {}
+    return data.get("entries", {})
+
+
+def save_manifest(path: Path, settings_key: str, entries: dict[str, dict]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = {"version": MANIFEST_VERSION, "settings": settings_key, "entries": entries}
+    write_atomic(path, (json.dumps(data, indent=2, sort_keys=True) + "\n").encode("utf-8"))
+
+
+def _unchanged(path: Path, entry: dict | None) -> bool:
+    if entry is None:
+        return False
+    st = path.stat()
+    return entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size
+
+
+def _process_tree(
+    roots: list[Path],
+    work,
+    key: str,
+    jobs: int | None,
+    dry_run: bool,
+    force: bool,
+    manifest_path: Path | None,
+) -> tuple[list[dict], int]:
+    """Aplica work (optimize_file o normalize_file) a las imágenes de roots
+    en un pool de procesos, saltando las que el manifiesto da por hechas."""
+    entries = load_manifest(manifest_path, key) if manifest_path else {}
+    files = collect_files(roots)
+    pending = [p for p in files if force or not _unchanged(p, entries.get(str(p)))]
+
+    results = _map(partial(work, dry_run=dry_run), [str(p) for p in pending], jobs)
+
+    for result in results:
+        STAGES.merge(result.pop("timings"))
+        if result["status"] == "error":
+            continue
+        st = os.stat(result["path"])
+        entries[result["path"]] = {
+            "mtime_ns": st.st_mtime_ns,
+            "size": st.st_size,
+            "status": result["status"],
+        }
+    if manifest_path and not dry_run and results:
+        save_manifest(manifest_path, key, entries)
+    return results, len(files) - len(pending)
+
+
+def optimize_tree(
+    roots: list[Path],
+    metric: str = "ssim",
+    threshold: float | None = None,
+    jobs: int | None = None,
+    dry_run: bool = False,
+    force: bool = False,
+    manifest_path: Path | None = DEFAULT_MANIFEST,
+    covers: Collection[Path] | None = None,
+) -> tuple[list[dict], int]:
+    """Reoptimiza las imágenes de roots en un pool de procesos.
+
+    Se saltan las que el manifiesto ya da por procesadas (salvo force) y,
+    como 'skipped', las portadas de covers (por defecto generated_covers()).
+    Devuelve (resultados de las procesadas, número de saltadas). Con dry_run
+    no se escribe nada, ni siquiera el manifiesto.
+    """
+    covers = generated_covers() if covers is None else covers
+    work = partial(optimize_file, metric=metric, threshold=threshold, covers=covers)
+    return _process_tree(roots, work, _settings_key(metric, threshold),
+                         jobs, dry_run, force, manifest_path)
+
+
+def normalize_tree(
+    roots: list[Path],
+    jobs: int | None = None,
+    dry_run: bool = False,
+    force: bool = False,
+    manifest_path: Path | None = DEFAULT_NORMALIZE_MANIFEST,
+) -> tuple[list[dict], int]:
+    """Como optimize_tree, pero aplicando normalize_file."""
+    return _process_tree(roots, normalize_file, f"v{SETTINGS_VERSION}:normalize",
+                         jobs, dry_run, force, manifest_path)
+
+
+def placeholders_tree(
+    roots: list[Path],
+    jobs: int | None = None,
+    force: bool = False,
+) -> tuple[list[dict], int]:
+    """Rellena el placeholders.json de cada carpeta bajo roots.
+
+    Solo calcula las imágenes que no tienen entrada (todas con force); las
+    variantes de --ladder no la necesitan. Devuelve (resultados de las
+    calculadas, número de saltadas).
+    """
+    variants = {
+        variant.resolve()
+        for root in roots if root.is_dir()
+        for variant in ladder_variants(root)
+    }
+    files = [p for p in collect_files(roots, ASSET_SUFFIXES) if p not in variants]
+    done = {folder: load_placeholders(folder) for folder in {p.parent for p in files}}
+    pending = [p for p in files if force or p.name not in done[p.parent]]
+
+    results = _map(placeholder_file, [str(p) for p in pending], jobs)
+    by_folder: dict[Path, dict[str, dict]] = {}
+    for result in results:
+        STAGES.merge(result.pop("timings"))
+        if result["status"] == "computed":
+            path = Path(result["path"])
+            by_folder.setdefault(path.parent, {})[path.name] = result["placeholder"]
+    for folder, entries in sorted(by_folder.items()):
+        update_placeholders(folder, entries)
+    return results, len(files) - len(pending)
+
+
+def summarize_by_dir(results: list[dict]) -> dict[str, dict]:
+    """{carpeta: {"files", "changed", "before", "saved"}} ordenado por carpeta.
+
+    changed cuenta los ficheros sustituidos ('optimized' o 'normalized');
+    saved puede ser negativo si normalizar hizo crecer alguno.
+    """
+    summary: dict[str, dict] = {}
+    for result in results:
+        folder = str(Path(result["path"]).parent)
+        row = summary.setdefault(folder, {"files": 0, "changed": 0, "before": 0, "saved": 0})
+        row["files"] += 1
+        row["before"] += result["before"]
+        if result["status"] in ("optimized", "normalized"):
+            row["changed"] += 1
+            row["saved"] += result["before"] - result["after"]
+    return dict(sorted(summary.items()))
+
+
+def _display(folder: str) -> str:
+    try:
+        return str(Path(folder).relative_to(PROJECT_ROOT.resolve()))
+    except ValueError:
+        return folder
+
+
+def _print_summary(title: str, results: list[dict], skipped: int, dry_run: bool) -> None:
+    print(f"=== {title}{' (simulación)' if dry_run else ''} ===\n")
+    for result in results:
+        if result["status"] == "error":
+            print(f"  ✗ {_display(result['path'])}: {result['error']}")
+    summary = summarize_by_dir(results)
+    for folder, row in summary.items():
+        pct = row["saved"] / row["before"] * 100 if row["before"] else 0
+        print(f"  {_display(folder):<60} {row['changed']:>3}/{row['files']:<3} "
+              f"{-row['saved'] / 1024:>+8.1f} KB ({pct:.1f}%)")
+    saved = sum(row["saved"] for row in summary.values())
+    changed = sum(row["changed"] for row in summary.values())
+    print(f"\n  Total: {changed} de {len(results)} sustituidas, {-saved / 1024:+.1f} KB")
+    if skipped:
+        print(f"  {skipped} sin cambios desde la última pasada (--force para repetirlas)")
+
+
+def cmd_optimize(args: argparse.Namespace) -> None:
+    roots = [Path(p) for p in args.paths] or [IMAGES_DIR]
+    results, skipped = optimize_tree(
+        roots, args.metric, args.threshold, args.jobs, args.dry_run, args.force,
+    )
+    _print_summary("Optimización de imágenes", results, skipped, args.dry_run)
+    if any(r["status"] == "error" for r in results):
+        sys.exit(1)
+
+
+def cmd_normalize(args: argparse.Namespace) -> None:
+    roots = [Path(p) for p in args.paths] or [IMAGES_DIR]
+    results, skipped = normalize_tree(roots, args.jobs, args.dry_run, args.force)
+    for result in results:
+        if result["status"] != "normalized":
+            continue
+        notes = [f"-{result['metadata_bytes'] / 1024:.1f} KB de metadatos"]
+        if result["transposed"]:
+            notes.append("girada según EXIF")
+        if result["converted"]:
+            notes.append("convertida a sRGB")
+        print(f"  {_display(result['path'])}: {', '.join(notes)}")
+    _print_summary("Normalización de imágenes", results, skipped, args.dry_run)
+    if any(r["status"] == "error" for r in results):
+        sys.exit(1)
+
+
+def cmd_placeholders(args: argparse.Namespace) -> None:
+    roots = [Path(p) for p in args.paths] or [IMAGES_DIR]
+    results, skipped = placeholders_tree(roots, args.jobs, args.force)
+    print("=== Marcadores de posición ===\n")
+    counts: dict[str, int] = {}
+    for result in results:
+        if result["status"] == "error":
+            print(f"  ✗ {_display(result['path'])}: {result['error']}")
+        else:
+            folder = str(Path(result["path"]).parent)
+            counts[folder] = counts.get(folder, 0) + 1
+    for folder, count in sorted(counts.items()):
+        print(f"  {_display(folder):<60} {count:>4}")
+    print(f"\n  Total: {sum(counts.values())} calculados")
+    if skipped:
+        print(f"  {skipped} ya lo tenían (--force para recalcularlos)")
+    if any(r["status"] == "error" for r in results):
+        sys.exit(1)
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Mantenimiento en bloque de las imágenes de src/assets/images.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Ejemplos:
+  %(prog)s optimize                        Reoptimiza todo src/assets/images
+  %(prog)s optimize --dry-run              Muestra lo que se ahorraría
+  %(prog)s optimize src/assets/images/blog --metric psnr --threshold 42
+  %(prog)s normalize --dry-run             Metadatos y orientación pendientes
+  %(prog)s placeholders                    Marcadores de posición que falten
+        """,
+    )
+    parser.add_argument("--timings", action="store_true",
+                        help="muestra el tiempo por etapa (total, media, p95) y lo "
+                             "guarda en .cache/timings/optimize_images.json")
+    parser.add_argument("--profile", default=None, metavar="FICHERO.prof",
+                        help="ejecuta bajo cProfile y guarda las estadísticas "
+                             "(usa -j 1 para incluir el trabajo de los workers)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    optimize = commands.add_parser(
+        "optimize", help="recodifica con los ajustes actuales si pesa menos y se ve igual",
+    )
+    optimize.add_argument("paths", nargs="*", metavar="ruta",
+                          help="ficheros o carpetas (por defecto: src/assets/images)")
+    optimize.add_argument("--metric", choices=sorted(METRICS), default="ssim",
+                          help="métrica de equivalencia visual (por defecto: ssim)")
+    optimize.add_argument("--threshold", type=float, default=None, metavar="VALOR",
+                          help="mínimo aceptable de la métrica (por defecto: "
+                               f"ssim {DEFAULT_THRESHOLDS['ssim']}, "
+                               f"psnr {DEFAULT_THRESHOLDS['psnr']} dB)")
+    optimize.add_argument("--jobs", "-j", type=int, default=None, metavar="N",
+                          help="procesos (por defecto: núcleos de la CPU)")
+    optimize.add_argument("--dry-run", action="store_true",
+                          help="no escribe nada; solo informa del ahorro")
+    optimize.add_argument("--force", action="store_true",
+                          help="ignora el manifiesto y vuelve a probar todos los ficheros")
+    optimize.set_defaults(func=cmd_optimize)
+
+    normalize_cmd = commands.add_parser(
+        "normalize", help="gira según EXIF, pasa a sRGB y quita metadatos (EXIF, XMP, ICC)",
+    )
+    normalize_cmd.add_argument("paths", nargs="*", metavar="ruta",
+                               help="ficheros o carpetas (por defecto: src/assets/images)")
+    normalize_cmd.add_argument("--jobs", "-j", type=int, default=None, metavar="N",
+                               help="procesos (por defecto: núcleos de la CPU)")
+    normalize_cmd.add_argument("--dry-run", action="store_true",
+                               help="no escribe nada; solo informa")
+    normalize_cmd.add_argument("--force", action="store_true",
+                               help="ignora el manifiesto y vuelve a revisar todos los ficheros")
+    normalize_cmd.set_defaults(func=cmd_normalize)
+
+    placeholders_cmd = commands.add_parser(
+        "placeholders", help="calcula el color dominante, el blurhash y la miniatura "
+                             "(placeholders.json) de las imágenes que no los tengan",
+    )
+    placeholders_cmd.add_argument("paths", nargs="*", metavar="ruta",
+                                  help="ficheros o carpetas (por defecto: src/assets/images)")
+    placeholders_cmd.add_argument("--jobs", "-j", type=int, default=None, metavar="N",
+                                  help="procesos (por defecto: núcleos de la CPU)")
+    placeholders_cmd.add_argument("--force", action="store_true",
+                                  help="recalcula también las que ya tienen entrada")
+    placeholders_cmd.set_defaults(func=cmd_placeholders)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    run_instrumented(partial(args.func, args), "optimize_images",
+                     timings=args.timings, profile=args.profile)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+placeholders.py – Marcadores de posición (LQIP) de portadas y figuras.
+
+Mientras llega la imagen real, Figure.astro y las portadas pintan lo que hay
+en el placeholders.json de su carpeta, {fichero: {width, height, color,
+blurhash, lqip}}:
+
+  color     color dominante (#rrggbb), el fondo mientras no hay nada más
+  blurhash  la imagen en 28 caracteres (https://blurha.sh), para quien
+            quiera decodificarla en el cliente
+  lqip      la imagen a PLACEHOLDER_SIZE px como WebP en data URI (~100
+            bytes), que CSS puede usar directamente como fondo
+
+Las imágenes con transparencia llevan "alpha": true y no llevan lqip: el
+fondo se quedaría a la vista tras la imagen ya cargada, así que no se pinta.
+
+import_image.py lo calcula sobre la imagen que ya tiene decodificada en
+memoria; `optimize_images.py placeholders` rellena los que falten en
+src/assets/images. Las portadas salen de file_placeholder() tanto en
+generate-images.py como en el relleno: la misma portada da siempre la misma
+entrada, y regenerarla sin cambios no toca el placeholders.json.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import math
+from pathlib import Path
+
+from PIL import Image
+
+from image_codec import encode, write_if_changed
+
+PLACEHOLDERS_MANIFEST = "placeholders.json"
+# Componentes (horizontales, verticales) del blurhash: 4x3 da 28 caracteres
+BLURHASH_COMPONENTS = (4, 3)
+# Lado mayor de la miniatura sobre la que se calcula el blurhash
+BLURHASH_SIZE = 32
+# Lado mayor del WebP del data URI y su calidad: se ve borroso a propósito
+PLACEHOLDER_SIZE = 16
+PLACEHOLDER_QUALITY = 40
+# Colores a los que se cuantiza la miniatura para elegir el dominante
+DOMINANT_COLORS = 8
+
+_BASE83 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+
+
+def _thumbnail(img: Image.Image, size: int) -> Image.Image:
+    """img reducida a size px de lado mayor (sin ampliar), en RGB."""
+    scale = size / max(img.size)
+    thumb_size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+    return img.resize(thumb_size, Image.BOX).convert("RGB")
+
+
+def _base83(value: int, length: int) -> str:
+    return "".join(_BASE83[value // 83 ** (length - i) % 83] for i in range(1, length + 1))
+
+
+def _to_linear(value: int) -> float:
+    v = value / 255
+    return v / 12.92 if v <= 0.04045 else ((v + 0.055) / 1.055) ** 2.4
+
+
+# sRGB de 8 bits → lineal, precalculado
+_LINEAR = [_to_linear(v) for v in range(256)]
+
+
+def _to_srgb(value: float) -> int:
+    v = min(1.0, max(0.0, value))
+    if v <= 0.0031308:
+        return int(v * 12.92 * 255 + 0.5)
+    return int((1.055 * v ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def blurhash(img: Image.Image, components: tuple[int, int] = BLURHASH_COMPONENTS) -> str:
+    """Blurhash de img según el algoritmo de referencia (woltapp/blurhash)."""
+    small = _thumbnail(img, BLURHASH_SIZE)
+    width, height = small.size
+    linear = [_LINEAR[v] for v in small.tobytes()]
+    cx, cy = components
+
+    # La base cos(x)·cos(y) es separable: primero cada fila contra cada
+    # componente horizontal, luego esas sumas contra cada vertical.
+    row_sums = []
+    for i in range(cx):
+        cos_x = [math.cos(math.pi * i * x / width) for x in range(width)]
+        sums = []
+        for y in range(height):
+            r = g = b = 0.0
+            row = iter(linear[y * width * 3:(y + 1) * width * 3])
+            for basis, pr, pg, pb in zip(cos_x, row, row, row):
+                r += basis * pr
+                g += basis * pg
+                b += basis * pb
+            sums.append((r, g, b))
+        row_sums.append(sums)
+
+    factors = []
+    for j in range(cy):
+        cos_y = [math.cos(math.pi * j * y / height) for y in range(height)]
+        for i in range(cx):
+            scale = (1 if i == j == 0 else 2) / (width * height)
+            factors.append(tuple(
+                scale * sum(basis * row[c] for basis, row in zip(cos_y, row_sums[i]))
+                for c in range(3)
+            ))
+
+    dc, ac = factors[0], factors[1:]
+    result = _base83((cx - 1) + (cy - 1) * 9, 1)
+    if ac:
+        actual_max = max(abs(v) for factor in ac for v in factor)
+        quantised_max = max(0, min(82, int(actual_max * 166 - 0.5)))
+        max_value = (quantised_max + 1) / 166
+        result += _base83(quantised_max, 1)
+    else:
+        max_value = 1.0
+        result += _base83(0, 1)
+    result += _base83((_to_srgb(dc[0]) << 16) + (_to_srgb(dc[1]) << 8) + _to_srgb(dc[2]), 4)
+    for factor in ac:
+        r, g, b = (
+            max(0, min(18, int(math.copysign(abs(v / max_value) ** 0.5, v) * 9 + 9.5)))
+            for v in factor
+        )
+        result += _base83(r * 19 * 19 + g * 19 + b, 2)
+    return result
+
+
+def dominant_color(img: Image.Image) -> str:
+    """Color más frecuente de img (#rrggbb) tras cuantizarla a DOMINANT_COLORS."""
+    quantized = _thumbnail(img, 64).quantize(DOMINANT_COLORS, method=Image.Quantize.FASTOCTREE)
+    _, index = max(quantized.getcolors())
+    r, g, b = quantized.getpalette()[index * 3:index * 3 + 3]
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+def lqip(img: Image.Image) -> str:
+    """img a PLACEHOLDER_SIZE px de lado mayor como WebP en data URI."""
+    data = encode(_thumbnail(img, PLACEHOLDER_SIZE), "WEBP", quality=PLACEHOLDER_QUALITY)
+    return "data:image/webp;base64," + base64.b64encode(data).decode("ascii")
+
+
+def has_alpha(img: Image.Image) -> bool:
+    """Si img tiene algún píxel no opaco."""
+    if img.mode not in ("RGBA", "LA", "PA") and "transparency" not in img.info:
+        return False
+    return img.convert("RGBA").getchannel("A").getextrema()[0] < 255
+
+
+def placeholder(img: Image.Image) -> dict:
+    """{width, height, color, blurhash, lqip} de img (ver docstring del módulo).
+
+    Con transparencia, {width, height, color, blurhash, alpha} sin lqip.
+    """
+    entry = {
+        "width": img.width,
+        "height": img.height,
+        "color": dominant_color(img),
+        "blurhash": blurhash(img),
+    }
+    if has_alpha(img):
+        entry["alpha"] = True
+    else:
+        entry["lqip"] = lqip(img)
+    return entry
+
+
+def file_placeholder(path: str | Path) -> dict:
+    """placeholder() del fichero path, decodificado a resolución completa.
+
+    No se usa draft(): un JPEG reducido por DCT da otra miniatura que el
+    mismo JPEG entero.
+    """
+    with Image.open(path) as img:
+        img.load()
+        return placeholder(img)
+
+
+# ---------------------------------------------------------------------------
+# placeholders.json
+# ---------------------------------------------------------------------------
+
+
+def load_placeholders(folder: str | Path) -> dict[str, dict]:
+    """{fichero: placeholder} de folder; vacío si no hay o está roto."""
+    try:
+        data = json.loads((Path(folder) / PLACEHOLDERS_MANIFEST).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _save(folder: Path, entries: dict[str, dict]) -> None:
+    path = folder / PLACEHOLDERS_MANIFEST
+    if not entries:
+        path.unlink(missing_ok=True)
+        return
+    text = json.dumps(dict(sorted(entries.items())), ensure_ascii=False, indent=2) + "\n"
+    write_if_changed(path, text.encode("utf-8"))
+
+
+def update_placeholders(folder: str | Path, entries: dict[str, dict]) -> None:
+    """Fusiona {fichero: placeholder} en el placeholders.json de folder."""
+    folder = Path(folder)
+    _save(folder, {**load_placeholders(folder), **entries})
+
+
+def drop_placeholders(folder: str | Path, names: list[str]) -> None:
+    """Quita names del placeholders.json de folder (y lo borra si queda vacío)."""
+    folder = Path(folder)
+    entries = load_placeholders(folder)
+    if any(name in entries for name in names):
+        _save(folder, {k: v for k, v in entries.items() if k not in names})
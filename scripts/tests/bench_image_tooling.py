@@ -0,0 +1,196 @@
+# scripts/tests/bench_image_tooling.py
+"""Benchmarks de generate-images.py e import_image.py con contenido sintético.
+
+No se ejecutan con la suite normal (el nombre no empieza por test_). Uso:
+
+  python -m pytest scripts/tests/bench_image_tooling.py -q
+  python -m pytest scripts/tests/bench_image_tooling.py --bench-posts 100,1000,10000
+  python -m pytest scripts/tests/bench_image_tooling.py --bench-save
+  python -m pytest scripts/tests/bench_image_tooling.py --bench-compare
+
+--bench-save y --bench-compare usan .cache/bench-baseline.json salvo que se
+indique otro fichero; la comparación falla si alguna métrica empeora más de
+--bench-threshold (25% por defecto).
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from PIL import Image, ImageFilter
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import frontmatter_index
+import import_image
+
+_SCRIPT = Path(__file__).parent.parent / "generate-images.py"
+_spec = importlib.util.spec_from_file_location("generate_images", _SCRIPT)
+generate_images = importlib.util.module_from_spec(_spec)
+sys.modules["generate_images"] = generate_images
+_spec.loader.exec_module(generate_images)
+
+CATEGORIES = list(generate_images.CAT_COLORS)
+# Cuerpo de relleno: los posts reales rondan los 10-20 KB
+BODY = ("Párrafo de relleno con `código` y [enlaces](/blog/otro/).\n\n" * 200)
+
+
+def _best_of(fn, repeat=3):
+    """Mejor tiempo de repeat ejecuciones (menos ruido que la media)."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def make_content(base: Path, n: int) -> Path:
+    """Crea n posts sintéticos con frontmatter completo en base/blog."""
+    content = base / "blog"
+    content.mkdir(parents=True)
+    for i in range(n):
+        category = CATEGORIES[i % len(CATEGORIES)]
+        (content / f"post-{i:05d}.md").write_text(
+            "---\n"
+            f"title: 'Cómo configurar el servicio número {i} en Linux'\n"
+            f"description: 'Descripción sintética del post {i} con longitud suficiente "
+            "para pasar la validación del esquema de contenido.'\n"
+            "author: 'antonio'\n"
+            "pubDate: 2026-01-01T10:00:00\n"
+            f"category: '{category}'\n"
+            f"tags: ['Linux', 'Bench', 'Tag{i % 7}']\n"
+            f"image: '../../assets/images/bench-{i:05d}.jpg'\n"
+            "draft: false\n"
+            "---\n\n" + BODY,
+            encoding="utf-8",
+        )
+    return content
+
+
+def make_photo(path: Path, width: int, height: int, fmt: str) -> None:
+    """Imagen sintética con textura (el color plano comprime de forma irreal)."""
+    noise = Image.effect_noise((width // 4, height // 4), 40).resize((width, height))
+    img = Image.merge("RGB", (noise, noise.transpose(Image.FLIP_LEFT_RIGHT),
+                              Image.linear_gradient("L").resize((width, height))))
+    img.filter(ImageFilter.SMOOTH).save(path, fmt)
+
+
+@pytest.fixture
+def sandbox(tmp_path, monkeypatch):
+    """Redirige las rutas de generate-images.py a una carpeta temporal."""
+    out = tmp_path / "images"
+    out.mkdir()
+    monkeypatch.setattr(generate_images, "OUT_DIR", str(out))
+    monkeypatch.setattr(generate_images, "FRONTMATTER_CACHE", tmp_path / "index.json")
+    monkeypatch.setattr(generate_images, "COVERS_MANIFEST", str(tmp_path / "covers.json"))
+    return tmp_path
+
+
+def _args(**overrides):
+    args = argparse.Namespace(category=None, force=False, changed=False, jobs=None, max_kb=None,
+                              prune=False, formats=generate_images.DEFAULT_FORMATS)
+    for key, value in overrides.items():
+        setattr(args, key, value)
+    return args
+
+
+def _quiet(fn, *args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn(*args)
+
+
+# ---------------------------------------------------------------------------
+# Frontmatter
+# ---------------------------------------------------------------------------
+
+def test_bench_parse_frontmatter(tmp_path, bench, bench_sizes):
+    for n in bench_sizes:
+        content = make_content(tmp_path / str(n), n)
+        files = sorted(content.iterdir())
+
+        bench.record(f"parse_frontmatter[{n}]",
+                     _best_of(lambda: [frontmatter_index.parse_frontmatter(f) for f in files]))
+
+        cache = tmp_path / f"index-{n}.json"
+        frontmatter_index.load_index(content, cache)
+        bench.record(f"frontmatter_index_warm[{n}]",
+                     _best_of(lambda: frontmatter_index.load_index(content, cache)))
+
+
+# ---------------------------------------------------------------------------
+# generate-images.py
+# ---------------------------------------------------------------------------
+
+def test_bench_cmd_check(sandbox, monkeypatch, bench, bench_sizes):
+    for n in bench_sizes:
+        content = make_content(sandbox / f"check-{n}", n)
+        monkeypatch.setattr(generate_images, "CONTENT_DIR", str(content))
+        bench.record(f"cmd_check[{n}]",
+                     _best_of(lambda: _quiet(generate_images.cmd_check, _args())))
+
+
+def test_bench_cmd_auto(sandbox, monkeypatch, bench, bench_sizes):
+    """Render completo con el tamaño menor; con el resto, solo la pasada sin cambios."""
+    for n in bench_sizes:
+        content = make_content(sandbox / f"auto-{n}", n)
+        monkeypatch.setattr(generate_images, "CONTENT_DIR", str(content))
+        if n == min(bench_sizes):
+            bench.record(f"cmd_auto_render[{n}]",
+                         _best_of(lambda: _quiet(generate_images.cmd_auto, _args(force=True)),
+                                  repeat=1))
+        else:
+            # Portadas vacías: basta con que existan para --changed
+            for i in range(n):
+                (Path(generate_images.OUT_DIR) / f"bench-{i:05d}.jpg").touch()
+        bench.record(f"cmd_auto_noop[{n}]",
+                     _best_of(lambda: _quiet(generate_images.cmd_auto, _args())))
+
+
+def test_bench_generate_image(sandbox, bench):
+    generate_images.generate_image("warmup.jpg", "WARMUP", "x", "Linux", ["└── x"])
+    n = 20
+
+    def run():
+        for i in range(n):
+            generate_images.generate_image(f"bench-{i}.jpg", f"TITULO {i}", "subtítulo de prueba",
+                                           CATEGORIES[i % len(CATEGORIES)],
+                                           ["├── uno", "├── dos", "└── tres"])
+
+    bench.record("generate_image[mean]", _best_of(run) / n)
+
+
+def test_bench_startup(bench):
+    """Arranque en frío de los comandos que no necesitan Pillow."""
+    scripts = Path(__file__).parent.parent
+
+    def run(*argv):
+        subprocess.run([sys.executable, *argv], cwd=scripts, check=True,
+                       stdout=subprocess.DEVNULL)
+
+    bench.record("startup_list", _best_of(lambda: run("generate-images.py", "--list"), repeat=5))
+    bench.record("startup_import_image",
+                 _best_of(lambda: run("-c", "import import_image"), repeat=5))
+
+
+# ---------------------------------------------------------------------------
+# import_image.py
+# ---------------------------------------------------------------------------
+
+@pytest.mark.parametrize("width,height,fmt", [
+    (1200, 800, "JPEG"),
+    (4000, 3000, "JPEG"),
+    (8000, 4500, "JPEG"),
+    (4000, 3000, "PNG"),
+])
+def test_bench_convert_and_save(tmp_path, bench, width, height, fmt):
+    src = tmp_path / f"src.{fmt.lower()}"
+    make_photo(src, width, height, fmt)
+    dest = tmp_path / "out.webp"
+
+    bench.record(f"convert_and_save[{width}x{height}.{fmt.lower()}]",
+                 _best_of(lambda: import_image.convert_and_save(str(src), str(dest))))
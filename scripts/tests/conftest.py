@@ -0,0 +1,90 @@
+# scripts/tests/conftest.py
+"""Opciones de la suite de benchmarks (scripts/tests/bench_image_tooling.py).
+
+Los benchmarks no se recogen en una ejecución normal de pytest: hay que
+pasar el fichero explícitamente. Ver la cabecera de bench_image_tooling.py.
+"""
+import json
+from pathlib import Path
+
+import pytest
+
+DEFAULT_BASELINE = Path(__file__).parent.parent.parent / ".cache" / "bench-baseline.json"
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("bench", "benchmarks de las herramientas de imágenes")
+    group.addoption("--bench-posts", default="100,1000",
+                    help="tamaños del contenido sintético (por defecto: 100,1000)")
+    group.addoption("--bench-save", nargs="?", const=str(DEFAULT_BASELINE), default=None,
+                    metavar="FICHERO", help="guarda los resultados como línea base JSON")
+    group.addoption("--bench-compare", nargs="?", const=str(DEFAULT_BASELINE), default=None,
+                    metavar="FICHERO", help="compara con una línea base y falla si hay regresión")
+    group.addoption("--bench-threshold", type=float, default=0.25,
+                    help="regresión máxima tolerada (0.25 = 25%% más lento)")
+
+
+class BenchRecorder:
+    """Acumula {métrica: segundos} durante la sesión."""
+
+    def __init__(self):
+        self.results = {}
+
+    def record(self, name, seconds):
+        self.results[name] = round(seconds, 6)
+
+
+_RECORDER = BenchRecorder()
+
+
+@pytest.fixture(scope="session")
+def bench():
+    return _RECORDER
+
+
+@pytest.fixture(scope="session")
+def bench_sizes(request):
+    return [int(n) for n in request.config.getoption("--bench-posts").split(",") if n]
+
+
+def compare_results(baseline, results, threshold):
+    """Devuelve [(métrica, antes, ahora)] de las métricas que empeoran más de threshold."""
+    regressions = []
+    for name, now in sorted(results.items()):
+        before = baseline.get(name)
+        if before and now > before * (1 + threshold):
+            regressions.append((name, before, now))
+    return regressions
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if not _RECORDER.results:
+        return
+    config = session.config
+    reporter = config.pluginmanager.get_plugin("terminalreporter")
+    write = reporter.write_line if reporter else print
+
+    write("")
+    write("=== Benchmarks ===")
+    for name, seconds in sorted(_RECORDER.results.items()):
+        write(f"  {name:<45} {seconds * 1000:10.2f} ms")
+
+    save = config.getoption("--bench-save")
+    if save:
+        path = Path(save)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(_RECORDER.results, indent=2, sort_keys=True) + "\n")
+        write(f"Línea base guardada en {path}")
+
+    compare = config.getoption("--bench-compare")
+    if compare:
+        baseline = json.loads(Path(compare).read_text())
+        threshold = config.getoption("--bench-threshold")
+        regressions = compare_results(baseline, _RECORDER.results, threshold)
+        for name, before, now in regressions:
+            write(f"  REGRESIÓN {name}: {before * 1000:.2f} ms → {now * 1000:.2f} ms "
+                  f"(+{(now / before - 1) * 100:.0f}%)")
+        if regressions:
+            session.exitstatus = pytest.ExitCode.TESTS_FAILED
+        else:
+            write(f"Sin regresiones (umbral {threshold:.0%}) ✓")
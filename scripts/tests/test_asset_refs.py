@@ -0,0 +1,107 @@
+# scripts/tests/test_asset_refs.py
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import asset_refs
+
+
+def _assets(tmp_path: Path) -> Path:
+    assets = tmp_path / "blog"
+    (assets / "post").mkdir(parents=True)
+    for name in ("usada.webp", "usada-480w.webp", "usada-480w.avif", "sobra.webp"):
+        (assets / "post" / name).write_bytes(b"x" * 100)
+    (assets / "post" / "ladder.json").write_text(json.dumps({
+        "usada.webp": [
+            {"file": "usada.webp"}, {"file": "usada-480w.webp"}, {"file": "usada-480w.avif"},
+        ],
+    }))
+    return assets
+
+
+REFS = [
+    ("post.mdx", [["/images/blog/post/usada.webp", 10], ["/images/blog/post/falta.webp", 20]]),
+]
+
+
+def test_missing_reports_post_and_line(tmp_path):
+    graph = asset_refs.AssetGraph(REFS, _assets(tmp_path))
+
+    assert graph.missing() == [("/images/blog/post/falta.webp", "post.mdx", 20)]
+
+
+def test_ladder_variants_follow_their_base(tmp_path):
+    """Las variantes de una imagen referenciada no son huérfanas."""
+    graph = asset_refs.AssetGraph(REFS, _assets(tmp_path))
+
+    assert graph.orphans() == ["/images/blog/post/sobra.webp"]
+
+
+def test_unreferenced_base_orphans_its_variants(tmp_path):
+    graph = asset_refs.AssetGraph([], _assets(tmp_path))
+
+    assert len(graph.orphans()) == 4
+
+
+def test_prune_removes_orphans_and_updates_ladder(tmp_path):
+    assets = _assets(tmp_path)
+    (assets / "vacia").mkdir()
+    (assets / "vacia" / "sola.webp").write_bytes(b"x" * 50)
+    (assets / "post" / "placeholders.json").write_text(json.dumps({
+        "usada.webp": {"color": "#000000"}, "sobra.webp": {"color": "#ffffff"},
+    }))
+
+    removed, freed = asset_refs.prune(asset_refs.AssetGraph(REFS, assets))
+
+    assert {p.name for p in removed} == {"sobra.webp", "sola.webp"}
+    assert freed == 150
+    assert not (assets / "vacia").exists()
+    assert (assets / "post" / "usada-480w.avif").exists()
+    assert "usada.webp" in json.loads((assets / "post" / "ladder.json").read_text())
+    assert list(json.loads((assets / "post" / "placeholders.json").read_text())) == [
+        "usada.webp",
+    ]
+
+
+def test_rewrite_refs_changes_posts_but_not_code_blocks(tmp_path):
+    old, new = "/images/blog/post/a.webp", "/images/blog/post/a.1234abcd.webp"
+    (tmp_path / "uno.mdx").write_text(
+        f'<Figure src="{old}" alt="a" />\n```\n{old}\n```\n![a]({old})\n', encoding="utf-8")
+    (tmp_path / "otro.md").write_text("/images/blog/post/b.webp\n", encoding="utf-8")
+
+    changed = asset_refs.rewrite_refs({old: new}, tmp_path)
+
+    assert changed == [tmp_path / "uno.mdx"]
+    assert (tmp_path / "uno.mdx").read_text(encoding="utf-8") == (
+        f'<Figure src="{new}" alt="a" />\n```\n{old}\n```\n![a]({new})\n')
+
+
+def test_post_weights_sums_folder_body_refs_and_cover(tmp_path):
+    assets = _assets(tmp_path)
+    (assets / "otro").mkdir()
+    (assets / "otro" / "prestada.webp").write_bytes(b"x" * 1000)
+    cover = tmp_path / "post.jpg"
+    cover.write_bytes(b"x" * 500)
+    refs = REFS + [("ligero.md", [])]
+    refs[0] = ("post.mdx", REFS[0][1] + [["/images/blog/otro/prestada.webp", 30]])
+    graph = asset_refs.AssetGraph(refs, assets)
+
+    heavy, light = asset_refs.post_weights(graph, {"post.mdx": cover, "ligero.md": None})
+
+    assert heavy["post"] == "post.mdx"
+    assert heavy["bytes"] == 4 * 100 + 1000 + 500
+    assert heavy["count"] == 6
+    assert heavy["files"][:2] == [("/images/blog/otro/prestada.webp", 1000), ("post.jpg", 500)]
+    assert light == {"post": "ligero.md", "bytes": 0, "count": 0, "files": []}
+
+
+def test_rewrite_refs_leaves_inline_code_and_external_urls(tmp_path):
+    old, new = "/images/blog/post/a.webp", "/images/blog/post/a.1234abcd.webp"
+    (tmp_path / "uno.mdx").write_text(
+        f"![a]({old}) `{old}` https://otro.sitio{old}\n", encoding="utf-8")
+
+    asset_refs.rewrite_refs({old: new}, tmp_path)
+
+    assert (tmp_path / "uno.mdx").read_text(encoding="utf-8") == (
+        f"![a]({new}) `{old}` https://otro.sitio{old}\n")
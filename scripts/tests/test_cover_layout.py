@@ -0,0 +1,82 @@
+# scripts/tests/test_cover_layout.py
+import sys
+from pathlib import Path
+
+import pytest
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import cover_layout
+
+FONT = "/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf"
+FONT_BOLD = "/usr/share/fonts/truetype/dejavu/DejaVuSansMono-Bold.ttf"
+
+pytestmark = pytest.mark.skipif(not Path(FONT_BOLD).exists(), reason="sin fuentes DejaVu")
+
+
+@pytest.mark.parametrize("text", [
+    "CERTIFICADOS SSL GRATIS",
+    "Cómo funciona la validación ACME",
+    "j",
+    "  espacios  ",
+])
+def test_width_matches_textbbox(text):
+    """El ancho memorizado coincide con el que mide ImageDraw."""
+    measurer = cover_layout.measurer_for(FONT_BOLD, 36)
+    draw = ImageDraw.Draw(Image.new("RGB", (1, 1)))
+    bbox = draw.textbbox((0, 0), text, font=measurer.font)
+
+    assert measurer.width(text) == bbox[2] - bbox[0]
+
+
+def test_truncate_keeps_text_that_fits():
+    measurer = cover_layout.measurer_for(FONT, 18)
+
+    assert measurer.truncate("corto", 500) == "corto"
+
+
+def test_truncate_cuts_by_word_and_fits():
+    measurer = cover_layout.measurer_for(FONT, 18)
+    text = "Cómo funciona la validación ACME, cuándo usar HTTP-01 o DNS-01 y renovar"
+
+    cut = measurer.truncate(text, 300)
+
+    assert cut.endswith(cover_layout.ELLIPSIS)
+    assert measurer.width(cut) <= 300
+    assert text.startswith(cut[:-1])
+    assert not cut[:-1].endswith((" ", ","))
+
+
+def test_truncate_single_long_word():
+    measurer = cover_layout.measurer_for(FONT, 18)
+
+    cut = measurer.truncate("x" * 200, 100)
+
+    assert cut.endswith(cover_layout.ELLIPSIS)
+    assert measurer.width(cut) <= 100
+
+
+def test_wrap_respects_width_and_max_lines():
+    measurer = cover_layout.measurer_for(FONT, 18)
+    text = " ".join(["palabra"] * 40)
+
+    lines = measurer.wrap(text, 250, max_lines=3)
+
+    assert len(lines) == 3
+    assert all(measurer.width(line) <= 250 for line in lines)
+    assert lines[-1].endswith(cover_layout.ELLIPSIS)
+
+
+def test_fit_size_picks_largest_that_fits():
+    sizes = (36, 30, 24)
+    short = cover_layout.fit_size("SSH", FONT_BOLD, sizes, 660)
+    long_title = "CONFIGURACION AVANZADA DE SERVIDORES"
+    fitted = cover_layout.fit_size(long_title, FONT_BOLD, sizes, 660)
+
+    assert short == 36
+    assert fitted < 36
+    assert cover_layout.measurer_for(FONT_BOLD, fitted).width(long_title) <= 660
+
+
+def test_fit_size_falls_back_to_smallest():
+    assert cover_layout.fit_size("X" * 200, FONT_BOLD, (36, 24), 100) == 24
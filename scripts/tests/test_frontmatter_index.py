@@ -0,0 +1,179 @@
+# scripts/tests/test_frontmatter_index.py
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import frontmatter_index
+
+
+def _post(path: Path, title: str, body: str = "Cuerpo del post.\n") -> None:
+    path.write_text(
+        f"---\ntitle: '{title}'\ntags: ['Linux', \"SSH\"]\ndraft: false\n---\n\n{body}",
+        encoding="utf-8",
+    )
+
+
+# ---------------------------------------------------------------------------
+# parse_frontmatter
+# ---------------------------------------------------------------------------
+
+def test_parse_frontmatter_fields(tmp_path):
+    """Quita comillas, parsea tags inline y booleanos."""
+    post = tmp_path / "a.md"
+    _post(post, "Hola: mundo")
+
+    fm = frontmatter_index.parse_frontmatter(post)
+
+    assert fm == {"title": "Hola: mundo", "tags": ["Linux", "SSH"], "draft": False}
+
+
+def test_parse_frontmatter_without_block(tmp_path):
+    """Un fichero sin frontmatter devuelve dict vacío."""
+    post = tmp_path / "a.md"
+    post.write_text("# Solo cuerpo\n", encoding="utf-8")
+
+    assert frontmatter_index.parse_frontmatter(post) == {}
+
+
+def test_read_block_stops_at_closing_delimiter(tmp_path):
+    """No lee más allá del --- de cierre (el cuerpo puede no ser UTF-8 válido)."""
+    post = tmp_path / "a.md"
+    post.write_bytes(b"---\ntitle: x\n---\n" + b"\xff\xfe" * 10)
+
+    assert frontmatter_index.read_frontmatter_block(post) == "title: x\n"
+
+
+# ---------------------------------------------------------------------------
+# FrontmatterIndex
+# ---------------------------------------------------------------------------
+
+def test_index_lists_posts_sorted(tmp_path):
+    content = tmp_path / "blog"
+    content.mkdir()
+    _post(content / "b.mdx", "B")
+    _post(content / "a.md", "A")
+    (content / "notas.txt").write_text("x")
+
+    index = frontmatter_index.load_index(content, cache_path=None)
+
+    assert [name for name, _ in index.posts()] == ["a.md", "b.mdx"]
+    assert index.slugs() == ["a", "b"]
+
+
+def test_index_cache_rereads_only_changed_posts(tmp_path):
+    """Con la caché en disco, una segunda pasada solo relee lo que cambió."""
+    content = tmp_path / "blog"
+    content.mkdir()
+    cache = tmp_path / "cache" / "index.json"
+    for name in ("a.md", "b.md", "c.md"):
+        _post(content / name, name)
+
+    first = frontmatter_index.load_index(content, cache)
+    assert first.misses == 3
+    assert cache.exists()
+
+    second = frontmatter_index.load_index(content, cache)
+    assert second.misses == 0
+
+    _post(content / "b.md", "Título nuevo y más largo")
+    third = frontmatter_index.load_index(content, cache)
+    assert third.misses == 1
+    assert dict(third.posts())["b.md"]["title"] == "Título nuevo y más largo"
+
+
+def test_index_drops_deleted_posts(tmp_path):
+    content = tmp_path / "blog"
+    content.mkdir()
+    cache = tmp_path / "index.json"
+    _post(content / "a.md", "A")
+    _post(content / "b.md", "B")
+    frontmatter_index.load_index(content, cache)
+
+    os.remove(content / "a.md")
+    index = frontmatter_index.load_index(content, cache)
+
+    assert index.slugs() == ["b"]
+
+
+def test_index_ignores_cache_from_other_dir(tmp_path):
+    """Una caché generada para otra carpeta no se reutiliza."""
+    cache = tmp_path / "index.json"
+    for name in ("uno", "dos"):
+        (tmp_path / name).mkdir()
+        _post(tmp_path / name / "a.md", name)
+
+    frontmatter_index.load_index(tmp_path / "uno", cache)
+    index = frontmatter_index.load_index(tmp_path / "dos", cache)
+
+    assert index.misses == 1
+    assert dict(index.posts())["a.md"]["title"] == "dos"
+
+
+# ---------------------------------------------------------------------------
+# Imágenes del cuerpo
+# ---------------------------------------------------------------------------
+
+FIGURE_BODY = (
+    "Texto.\n"
+    "<Figure\n"
+    '  src="/images/blog/a/uno.webp"\n'
+    '  alt="x"\n'
+    "/>\n"
+    "![captura](/images/blog/a/dos.png)\n"
+    "```mdx\n"
+    '<Figure src="/images/blog/ejemplo/no-cuenta.webp" />\n'
+    "```\n"
+)
+
+
+def test_scan_body_refs_lines_and_fences(tmp_path):
+    """Devuelve ruta y línea; lo que hay dentro de ``` no cuenta."""
+    post = tmp_path / "a.mdx"
+    _post(post, "A", FIGURE_BODY)
+
+    assert frontmatter_index.scan_body_refs(post) == [
+        ["/images/blog/a/uno.webp", 9],
+        ["/images/blog/a/dos.png", 12],
+    ]
+
+
+def test_scan_body_refs_skips_external_urls_and_inline_code(tmp_path):
+    post = tmp_path / "a.mdx"
+    _post(post, "A", (
+        "![externa](https://otro.sitio/images/blog/x.png)\n"
+        "Se referencia como `/images/blog/a/ejemplo.webp` o ``src=\"/images/blog/a/b.webp\"``.\n"
+        "![real](/images/blog/a/real.webp) y texto /images/blog/a/suelta.webp\n"
+    ))
+
+    assert frontmatter_index.scan_body_refs(post) == [["/images/blog/a/real.webp", 9]]
+
+
+def test_index_refs_are_cached(tmp_path):
+    """Con refs=True se indexan una vez; una entrada sin refs se relee."""
+    content = tmp_path / "blog"
+    content.mkdir()
+    _post(content / "a.mdx", "A", FIGURE_BODY)
+    cache = tmp_path / "index.json"
+
+    frontmatter_index.load_index(content, cache)
+    first = frontmatter_index.load_index(content, cache, refs=True)
+    second = frontmatter_index.load_index(content, cache, refs=True)
+
+    assert first.misses == 1
+    assert second.misses == 0
+    assert [ref for _, ref in second.refs()[0][1]] == [9, 12]
+
+
+def test_index_parallel_scan_matches_serial(tmp_path, monkeypatch):
+    content = tmp_path / "blog"
+    content.mkdir()
+    for i in range(6):
+        _post(content / f"p{i}.mdx", f"P{i}", FIGURE_BODY)
+    monkeypatch.setattr(frontmatter_index, "PARALLEL_MIN_POSTS", 2)
+
+    serial = frontmatter_index.load_index(content, None, refs=True, jobs=1)
+    parallel = frontmatter_index.load_index(content, None, refs=True, jobs=2)
+
+    assert parallel.refs() == serial.refs()
+    assert parallel.posts() == serial.posts()
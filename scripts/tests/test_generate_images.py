@@ -0,0 +1,556 @@
+# scripts/tests/test_generate_images.py
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import cover_layout
+
+# generate-images.py lleva guion: se carga por ruta en vez de con import
+_SCRIPT = Path(__file__).parent.parent / "generate-images.py"
+_spec = importlib.util.spec_from_file_location("generate_images", _SCRIPT)
+generate_images = importlib.util.module_from_spec(_spec)
+sys.modules["generate_images"] = generate_images  # necesario para el pool de procesos
+_spec.loader.exec_module(generate_images)
+
+
+@pytest.fixture
+def out_dir(tmp_path, tmp_path_factory, monkeypatch):
+    """Redirige OUT_DIR (y el manifiesto de portadas) a carpetas temporales."""
+    monkeypatch.setattr(generate_images, "OUT_DIR", str(tmp_path))
+    monkeypatch.setattr(generate_images, "COVERS_MANIFEST",
+                        str(tmp_path_factory.mktemp("cache") / "covers-manifest.json"))
+    return tmp_path
+
+
+def _article(filename, category="Linux"):
+    return (filename, "TITULO", "subtítulo de prueba", category,
+            ["├── uno", "└── dos"])
+
+
+# ---------------------------------------------------------------------------
+# render_many
+# ---------------------------------------------------------------------------
+
+def test_render_many_keeps_order(out_dir):
+    """Devuelve las rutas en el mismo orden que los artículos."""
+    articles = [_article(f"img-{i}.jpg") for i in range(3)]
+
+    results = generate_images.render_many(articles, jobs=1)
+
+    assert [Path(r["path"]).name for r in results] == ["img-0.jpg", "img-1.jpg", "img-2.jpg"]
+
+
+def test_render_many_parallel_matches_serial(out_dir):
+    """El render en paralelo produce los mismos bytes que en serie."""
+    articles = [_article("a.jpg", "Redes"), _article("b.jpg", "Seguridad")]
+
+    serial = [Path(r["path"]).read_bytes()
+              for r in generate_images.render_many(articles, jobs=1)]
+    parallel = [Path(r["path"]).read_bytes()
+                for r in generate_images.render_many(articles, jobs=2)]
+
+    assert serial == parallel
+
+
+def test_render_many_leaves_no_temp_files(out_dir):
+    """Tras generar solo quedan las portadas y los placeholders: el
+    manifiesto va a .cache, fuera del árbol versionado."""
+    generate_images.render_many([_article("x.jpg")], jobs=1)
+
+    assert sorted(p.name for p in out_dir.iterdir()) == ["placeholders.json", "x.jpg"]
+    assert os.path.exists(generate_images.COVERS_MANIFEST)
+
+
+def test_render_many_with_budget(out_dir):
+    """Con max_kb la portada cabe en el presupuesto y se informa la calidad."""
+    [free] = generate_images.render_many([_article("a.jpg")], jobs=1)
+    budget = free["bytes"] // 1024 - 2
+
+    [result] = generate_images.render_many([_article("b.jpg")], jobs=1, max_kb=budget)
+
+    assert free["quality"] == generate_images.JPEG_QUALITY
+    assert result["bytes"] <= budget * 1024
+    assert result["quality"] < generate_images.JPEG_QUALITY
+    assert Path(result["path"]).stat().st_size == result["bytes"]
+
+
+# ---------------------------------------------------------------------------
+# CoverRenderer
+# ---------------------------------------------------------------------------
+
+def test_renderer_caches_base_per_accent():
+    """La base pre-dibujada se reutiliza para el mismo color de acento."""
+    renderer = generate_images.CoverRenderer()
+
+    renderer.render("A", "b", "Redes", ["└── c"])
+    renderer.render("D", "e", "Redes", ["└── f"])
+    renderer.render("G", "h", "Seguridad", ["└── i"])
+
+    assert len(renderer._bases) == 2
+
+
+def test_renderer_does_not_modify_base():
+    """Dibujar una portada no ensucia la base cacheada."""
+    renderer = generate_images.CoverRenderer()
+    accent = generate_images.CAT_COLORS["Linux"]
+    before = renderer.base(accent).tobytes()
+
+    renderer.render("TITULO", "subtítulo", "Linux", ["└── item"])
+
+    assert renderer.base(accent).tobytes() == before
+
+
+def test_renderer_fits_long_title_and_subtitle():
+    """Un título largo baja de tamaño y el subtítulo se recorta a su ancho."""
+    renderer = generate_images.CoverRenderer()
+    title = "CONFIGURACION AVANZADA DE SERVIDORES DE CORREO"
+    subtitle = "Una descripción muy larga que no cabe en una sola línea de la ventana " * 2
+
+    img = renderer.render(title, subtitle, "Linux", ["└── item"])
+
+    assert img.size == (generate_images.WIDTH, generate_images.HEIGHT)
+    size = cover_layout.fit_size(title, generate_images.FONT_BOLD_PATH,
+                                 generate_images.TITLE_SIZES, generate_images.TEXT_MAX_WIDTH)
+    assert size < generate_images.TITLE_SIZES[0]
+
+
+def test_generate_image_matches_renderer(out_dir):
+    """generate_image guarda lo mismo que devuelve el renderer."""
+    path = generate_images.generate_image(*_article("x.jpg"))
+
+    assert Path(path) == out_dir / "x.jpg"
+    assert Image.open(path).size == (generate_images.WIDTH, generate_images.HEIGHT)
+
+
+# ---------------------------------------------------------------------------
+# --formats
+# ---------------------------------------------------------------------------
+
+def _has_avif():
+    from PIL import features
+    return features.check("avif")
+
+
+@pytest.mark.skipif(not _has_avif(), reason="Pillow sin AVIF")
+def test_render_many_writes_every_format(out_dir):
+    formats = ("avif", "webp", "jpg")
+    article = _article("multi.jpg")
+
+    [result] = generate_images.render_many([article], jobs=1, formats=formats)
+
+    assert [f["format"] for f in result["files"]] == list(formats)
+    assert result["path"] == str(out_dir / "multi.avif")
+    for fmt, pil_format in (("avif", "AVIF"), ("webp", "WEBP"), ("jpg", "JPEG")):
+        with Image.open(out_dir / f"multi.{fmt}") as img:
+            assert img.format == pil_format
+            assert img.size == (generate_images.WIDTH, generate_images.HEIGHT)
+    assert not generate_images.is_stale(article, generate_images.load_manifest(),
+                                         formats=formats)
+    placeholders = json.loads((out_dir / "placeholders.json").read_text())
+    assert sorted(placeholders) == ["multi.avif", "multi.jpg", "multi.webp"]
+    assert all(entry["width"] == generate_images.WIDTH for entry in placeholders.values())
+
+
+def test_cover_placeholders_match_the_backfill(out_dir):
+    """render_many y `optimize_images.py placeholders --force` escriben las
+    mismas entradas: regenerar una portada no reescribe el placeholders.json."""
+    import optimize_images
+
+    generate_images.render_many([_article("x.jpg"), _article("y.jpg", "Redes")], jobs=1)
+    rendered = (out_dir / "placeholders.json").read_bytes()
+
+    optimize_images.placeholders_tree([out_dir], jobs=1, force=True)
+
+    assert (out_dir / "placeholders.json").read_bytes() == rendered
+
+
+def test_rerender_is_byte_identical_and_not_rewritten(out_dir):
+    """--force sobre portadas al día da los mismos bytes y no toca los ficheros."""
+    formats = ("jpg", "webp", "avif") if _has_avif() else ("jpg", "webp")
+    article = _article("estable.jpg")
+    [first] = generate_images.render_many([article], jobs=1, formats=formats)
+    hashes = {f["format"]: hashlib.sha256(Path(f["path"]).read_bytes()).hexdigest()
+              for f in first["files"]}
+    for f in first["files"]:
+        os.utime(f["path"], ns=(1_000_000_000, 1_000_000_000))
+
+    [second] = generate_images.render_many([article], jobs=2, formats=formats)
+
+    assert all(f["written"] for f in first["files"])
+    assert not any(f["written"] for f in second["files"])
+    for f in second["files"]:
+        assert hashlib.sha256(Path(f["path"]).read_bytes()).hexdigest() == hashes[f["format"]]
+        assert Path(f["path"]).stat().st_mtime_ns == 1_000_000_000
+    assert generate_images.format_unchanged(second) == " (sin cambios)"
+
+
+def test_webp_cover_is_lossless_copy_of_canvas(out_dir):
+    """El WebP sale del lienzo en memoria, no de un JPEG intermedio."""
+    article = _article("sin-perdida.jpg")
+    canvas = generate_images.get_renderer().render(*article[1:])
+
+    generate_images.render_many([article], jobs=1, formats=("webp",))
+
+    with Image.open(out_dir / "sin-perdida.webp") as img:
+        assert img.convert("RGB").tobytes() == canvas.tobytes()
+
+
+def test_is_stale_when_a_format_is_missing(out_dir):
+    formats = ("webp", "jpg")
+    article = _article("a.jpg")
+    generate_images.render_many([article], jobs=1, formats=formats)
+    manifest = generate_images.load_manifest()
+    (out_dir / "a.webp").unlink()
+
+    assert generate_images.is_stale(article, manifest, formats=formats)
+    # Con otro juego de formatos cambia el hash
+    assert generate_images.is_stale(article, manifest, formats=("jpg",))
+
+
+def test_parse_formats():
+    assert generate_images.parse_formats("AVIF, webp,.jpg,webp") == ("avif", "webp", "jpg")
+    with pytest.raises(argparse.ArgumentTypeError):
+        generate_images.parse_formats("avif,gif")
+    with pytest.raises(argparse.ArgumentTypeError):
+        generate_images.parse_formats(",")
+
+
+# ---------------------------------------------------------------------------
+# Manifiesto incremental
+# ---------------------------------------------------------------------------
+
+def test_render_many_records_hashes(out_dir):
+    """Cada portada generada queda registrada en el manifiesto."""
+    article = _article("a.jpg")
+
+    generate_images.render_many([article], jobs=1)
+
+    manifest = generate_images.load_manifest()
+    assert manifest == {"a.jpg": generate_images.render_hash(article)}
+
+
+def test_is_stale_detects_changed_inputs(out_dir):
+    """Un cambio en título, categoría o versión del renderer invalida la entrada."""
+    article = _article("a.jpg")
+    generate_images.render_many([article], jobs=1)
+    manifest = generate_images.load_manifest()
+
+    assert not generate_images.is_stale(article, manifest)
+    assert generate_images.is_stale(("a.jpg", "OTRO") + article[2:], manifest)
+    assert generate_images.is_stale(_article("a.jpg", "Redes"), manifest)
+
+
+def test_is_stale_when_file_missing(out_dir):
+    """Si la imagen se borró del disco, hay que regenerarla aunque el hash cuadre."""
+    article = _article("a.jpg")
+    generate_images.render_many([article], jobs=1)
+    manifest = generate_images.load_manifest()
+    (out_dir / "a.jpg").unlink()
+
+    assert generate_images.is_stale(article, manifest)
+
+
+def test_render_hash_depends_on_renderer_version(monkeypatch):
+    article = _article("a.jpg")
+    before = generate_images.render_hash(article)
+    monkeypatch.setattr(generate_images, "RENDERER_VERSION",
+                        generate_images.RENDERER_VERSION + 1)
+
+    assert generate_images.render_hash(article) != before
+
+
+# ---------------------------------------------------------------------------
+# --check
+# ---------------------------------------------------------------------------
+
+def test_check_reports_body_images_and_prunes(tmp_path, monkeypatch, capsys):
+    content = tmp_path / "content"
+    content.mkdir()
+    out = tmp_path / "images"
+    (out / "blog" / "post").mkdir(parents=True)
+    (out / "post.jpg").write_bytes(b"x")
+    (out / "post.avif").write_bytes(b"x")  # otro formato de la misma portada
+    (out / "vieja.webp").write_bytes(b"x")
+    (out / "blog" / "post" / "usada.webp").write_bytes(b"x")
+    (out / "blog" / "post" / "sobra.webp").write_bytes(b"x")
+    (content / "post.mdx").write_text(
+        "---\ntitle: 'Post'\nimage: '../../assets/images/post.jpg'\n---\n\n"
+        '<Figure\n  src="/images/blog/post/usada.webp"\n/>\n'
+        '<Figure src="/images/blog/post/falta.webp" />\n',
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(generate_images, "OUT_DIR", str(out))
+    monkeypatch.setattr(generate_images, "CONTENT_DIR", str(content))
+    monkeypatch.setattr(generate_images, "FRONTMATTER_CACHE", None)
+
+    generate_images.cmd_check(argparse.Namespace(jobs=1, prune=True))
+
+    printed = capsys.readouterr().out
+    assert "post.mdx:9  /images/blog/post/falta.webp" in printed
+    assert "/images/blog/post/sobra.webp" in printed
+    assert "? vieja.webp" in printed
+    assert "? post.avif" not in printed
+    assert not (out / "blog" / "post" / "sobra.webp").exists()
+    assert (out / "blog" / "post" / "usada.webp").exists()
+
+
+# ---------------------------------------------------------------------------
+# --weights
+# ---------------------------------------------------------------------------
+
+@pytest.fixture
+def weights_env(tmp_path, monkeypatch):
+    content = tmp_path / "content"
+    content.mkdir()
+    out = tmp_path / "images"
+    for slug, size in (("pesado", 3000), ("ligero", 100)):
+        (out / "blog" / slug).mkdir(parents=True)
+        (out / "blog" / slug / "figura.webp").write_bytes(b"x" * size)
+        (out / f"{slug}.jpg").write_bytes(b"x" * 200)
+        (content / f"{slug}.mdx").write_text(
+            f"---\ntitle: '{slug}'\nimage: '../../assets/images/{slug}.jpg'\n---\n\n"
+            f'<Figure src="/images/blog/{slug}/figura.webp" />\n',
+            encoding="utf-8",
+        )
+    monkeypatch.setattr(generate_images, "OUT_DIR", str(out))
+    monkeypatch.setattr(generate_images, "CONTENT_DIR", str(content))
+    monkeypatch.setattr(generate_images, "FRONTMATTER_CACHE", None)
+    return out
+
+
+def _weights_args(files=(), budget=None):
+    return argparse.Namespace(jobs=1, files=list(files), budget=budget)
+
+
+def test_weights_ranks_posts_and_fails_over_budget(weights_env, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        generate_images.cmd_weights(_weights_args(budget=2))
+
+    printed = capsys.readouterr().out
+    assert exit_info.value.code == 1
+    assert printed.index("pesado.mdx") < printed.index("ligero.mdx")
+    assert "pesado.mdx  ✗ supera 2 KB" in printed
+    assert "ligero.mdx  ✗" not in printed
+
+
+def test_weights_only_checks_posts_touched_by_files(weights_env, capsys):
+    """Desde lint-staged: solo cuentan los posts de los ficheros preparados."""
+    generate_images.cmd_weights(_weights_args(
+        [weights_env / "blog" / "ligero" / "figura.webp"], budget=2))
+
+    printed = capsys.readouterr().out
+    assert "ligero.mdx" in printed and "pesado.mdx" not in printed
+    assert "Todos dentro del presupuesto de 2 KB" in printed
+
+    generate_images.cmd_weights(_weights_args([weights_env / "pesado.jpg"]))
+    assert "pesado.mdx" in capsys.readouterr().out
+
+
+# ---------------------------------------------------------------------------
+# --watch
+# ---------------------------------------------------------------------------
+
+def _watch_args(**overrides):
+    args = dict(category=None, max_kb=None, formats=generate_images.DEFAULT_FORMATS,
+                interval=0.1, debounce=0.3)
+    args.update(overrides)
+    return argparse.Namespace(**args)
+
+
+def _write_post(content, name, title, mtime_ns):
+    path = content / name
+    path.write_text(
+        f"---\ntitle: '{title}'\ndescription: 'desc'\ncategory: 'Linux'\n"
+        f"tags: ['a']\nimage: '../../assets/images/{Path(name).stem}.jpg'\n---\n",
+        encoding="utf-8",
+    )
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def watch_env(out_dir, tmp_path, monkeypatch):
+    content = tmp_path / "blog"
+    content.mkdir()
+    monkeypatch.setattr(generate_images, "CONTENT_DIR", str(content))
+    monkeypatch.setattr(generate_images, "FRONTMATTER_CACHE", None)
+    return content
+
+
+def test_watch_debounces_burst_of_saves(watch_env, capsys):
+    """Tres guardados seguidos del mismo post producen un solo render."""
+    _write_post(watch_env, "a.md", "Primero", 1_000)
+    _write_post(watch_env, "b.md", "Otro", 1_000)
+    clock = {"now": 0.0}
+    edits = {1: "Cambio uno", 2: "Cambio dos", 3: "Cambio tres"}
+
+    def fake_sleep(seconds):
+        clock["now"] += seconds
+        poll = round(clock["now"] / seconds)
+        if poll in edits:
+            _write_post(watch_env, "a.md", edits[poll], 1_000 + poll)
+
+    generate_images.cmd_watch(_watch_args(), max_polls=10, sleep=fake_sleep,
+                              clock=lambda: clock["now"])
+
+    out = capsys.readouterr().out
+    # Render inicial de a y b, y después un único render de a
+    assert out.count("OK a.jpg") == 2
+    assert out.count("OK b.jpg") == 1
+    assert "CAMBIO TRES" in out
+
+
+def test_watch_skips_unchanged_covers(watch_env, capsys):
+    """Tocar un post sin cambiar lo que se dibuja no regenera nada."""
+    _write_post(watch_env, "a.md", "Igual", 1_000)
+    clock = {"now": 0.0}
+
+    def fake_sleep(seconds):
+        clock["now"] += seconds
+        if round(clock["now"] / seconds) == 1:
+            _write_post(watch_env, "a.md", "Igual", 2_000)
+
+    generate_images.cmd_watch(_watch_args(), max_polls=6, sleep=fake_sleep,
+                              clock=lambda: clock["now"])
+
+    out = capsys.readouterr().out
+    assert out.count("OK a.jpg") == 1
+    assert "sin cambios en las portadas" in out
+
+
+# ---------------------------------------------------------------------------
+# --og
+# ---------------------------------------------------------------------------
+
+def test_collect_og_cards_skips_drafts(watch_env):
+    _write_post(watch_env, "a.md", "Publicado", 1_000)
+    (watch_env / "b.md").write_text("---\ntitle: 'Borrador'\ndraft: true\n---\n",
+                                    encoding="utf-8")
+    index = generate_images.load_index(str(watch_env), None)
+
+    cards = generate_images.collect_og_cards(index)
+
+    assert cards == [("a", "Publicado", "Linux")]
+
+
+# ---------------------------------------------------------------------------
+# Vista previa (--serve)
+# ---------------------------------------------------------------------------
+
+def test_render_cover_bytes_matches_saved_cover(out_dir):
+    article = _article("bytes.jpg")
+    [result] = generate_images.render_many([article], jobs=1)
+
+    rendered = generate_images.render_cover_bytes(article)
+
+    assert rendered["data"] == Path(result["path"]).read_bytes()
+    assert rendered["bytes"] == result["bytes"]
+
+
+def test_preview_caches_until_mtime_changes(watch_env, out_dir):
+    _write_post(watch_env, "a.md", "Primero", 1_000)
+    preview = generate_images.CoverPreview(str(watch_env))
+
+    key, data = preview.cover("a")
+    assert preview.cover("a") == (key, data)
+    assert (preview.misses, preview.hits) == (1, 1)
+
+    _write_post(watch_env, "a.md", "Segundo", 2_000)
+    new_key, new_data = preview.cover("a")
+
+    assert new_key != key and new_data != data
+    assert preview.misses == 2
+    assert key not in preview._covers  # la versión anterior se descarta
+    assert not list(out_dir.glob("*.jpg"))  # nada se escribe en OUT_DIR
+
+
+def test_preview_lru_evicts_least_recent(watch_env):
+    for name in ("a", "b", "c"):
+        _write_post(watch_env, f"{name}.md", name.upper() * 3, 1_000)
+    preview = generate_images.CoverPreview(str(watch_env), capacity=2)
+
+    preview.cover("a")
+    preview.cover("b")
+    preview.cover("a")  # a pasa a ser la más reciente
+    preview.cover("c")  # expulsa b
+
+    assert preview.cover("a") is not None and preview.hits == 2
+    preview.cover("b")
+    assert preview.misses == 4
+
+
+def test_preview_unknown_post(watch_env):
+    assert generate_images.CoverPreview(str(watch_env)).cover("no-existe") is None
+
+
+def test_preview_server_serves_covers(watch_env):
+    import threading
+    import urllib.error
+    import urllib.request
+    from http.server import HTTPServer
+
+    _write_post(watch_env, "a.md", "Servido", 1_000)
+    preview = generate_images.CoverPreview(str(watch_env))
+    server = HTTPServer(("127.0.0.1", 0), generate_images.make_preview_handler(preview))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        with urllib.request.urlopen(f"{base}/cover/a.jpg") as resp:
+            assert resp.headers["Content-Type"] == "image/jpeg"
+            etag = resp.headers["ETag"]
+            assert resp.read()[:3] == b"\xff\xd8\xff"
+        with pytest.raises(urllib.error.HTTPError) as exc:
+            urllib.request.urlopen(urllib.request.Request(
+                f"{base}/cover/a.jpg", headers={"If-None-Match": etag}))
+        assert exc.value.code == 304
+        with pytest.raises(urllib.error.HTTPError) as exc:
+            urllib.request.urlopen(f"{base}/cover/otro.jpg")
+        assert exc.value.code == 404
+        with urllib.request.urlopen(f"{base}/") as resp:
+            assert b"/cover/a.jpg" in resp.read()
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert preview.misses == 1
+
+
+# ---------------------------------------------------------------------------
+# Arranque sin Pillow
+# ---------------------------------------------------------------------------
+
+# sys.modules["PIL"] = None hace fallar cualquier import de Pillow
+_NO_PIL = "import sys; sys.modules['PIL'] = None; "
+
+
+@pytest.mark.parametrize("argv", [["--list"], ["--check"], ["--weights"]])
+def test_metadata_commands_do_not_import_pillow(argv):
+    """--list, --check y --weights no cargan Pillow: arrancan rápido y funcionan sin él."""
+    code = _NO_PIL + (
+        "import runpy; sys.argv = ['generate-images.py'] + sys.argv[1:]; "
+        "runpy.run_path('generate-images.py', run_name='__main__')"
+    )
+    result = subprocess.run([sys.executable, "-c", code, *argv], cwd=_SCRIPT.parent,
+                            capture_output=True, text=True)
+
+    assert "PIL" not in result.stderr
+    assert result.returncode in (0, 1)  # --check sale con 1 si hay problemas
+
+
+def test_import_image_helpers_do_not_import_pillow():
+    code = _NO_PIL + (
+        "import import_image; "
+        "assert import_image.get_posts(str(import_image.CONTENT_DIR)); "
+        "print(import_image.build_snippet('/images/blog/a/b.webp', 'alt', 'figure'))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=_SCRIPT.parent,
+                            capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
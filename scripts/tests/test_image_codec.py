@@ -0,0 +1,267 @@
+# scripts/tests/test_image_codec.py
+import io
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from PIL import Image, ImageCms, ImageFilter, features
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import image_codec
+
+
+def _noisy(width: int = 400, height: int = 300) -> Image.Image:
+    """Imagen con ruido: su peso depende mucho de la calidad."""
+    return Image.effect_noise((width, height), 50).filter(ImageFilter.GaussianBlur(1)).convert("RGB")
+
+
+# ---------------------------------------------------------------------------
+# encode_to_budget
+# ---------------------------------------------------------------------------
+
+def test_encode_to_budget_fits_at_max_quality():
+    """Si la calidad máxima ya cabe, no se baja."""
+    img = _noisy()
+
+    data, quality = image_codec.encode_to_budget(img, "WEBP", max_kb=10_000, quality_max=80)
+
+    assert quality == 80
+    assert data == image_codec.encode(img, "WEBP", quality=80)
+
+
+def test_encode_to_budget_picks_highest_quality_that_fits():
+    img = _noisy()
+    full = len(image_codec.encode(img, "JPEG", quality=90))
+    max_kb = full // 2 // 1024
+
+    data, quality = image_codec.encode_to_budget(img, "JPEG", max_kb, quality_max=90)
+
+    assert len(data) <= max_kb * 1024
+    assert image_codec.QUALITY_FLOOR <= quality < 90
+    # Una calidad más no cabría
+    assert len(image_codec.encode(img, "JPEG", quality=quality + 1)) > max_kb * 1024
+
+
+def test_encode_to_budget_stops_at_floor():
+    """Con un presupuesto imposible devuelve el suelo de calidad."""
+    data, quality = image_codec.encode_to_budget(_noisy(), "JPEG", max_kb=1, quality_max=90,
+                                                 quality_floor=60)
+
+    assert quality == 60
+    assert len(data) > 1024
+
+
+# ---------------------------------------------------------------------------
+# write_atomic
+# ---------------------------------------------------------------------------
+
+def test_write_atomic_leaves_no_temp_files(tmp_path):
+    image_codec.write_atomic(tmp_path / "x.jpg", b"datos")
+
+    assert [p.name for p in tmp_path.iterdir()] == ["x.jpg"]
+    assert (tmp_path / "x.jpg").read_bytes() == b"datos"
+
+
+def test_write_atomic_keeps_previous_file_on_error(tmp_path):
+    """Si la escritura falla, el fichero anterior queda intacto."""
+    dest = tmp_path / "x.jpg"
+    dest.write_bytes(b"original")
+
+    with pytest.raises(TypeError):
+        image_codec.write_atomic(dest, "no son bytes")
+
+    assert dest.read_bytes() == b"original"
+    assert [p.name for p in tmp_path.iterdir()] == ["x.jpg"]
+
+
+def test_write_if_changed_keeps_identical_file(tmp_path):
+    """Mismos bytes: no se reescribe y el mtime no se mueve."""
+    dest = tmp_path / "x.webp"
+    assert image_codec.write_if_changed(dest, b"datos")
+    os.utime(dest, ns=(1_000_000_000, 1_000_000_000))
+
+    assert not image_codec.write_if_changed(dest, b"datos")
+    assert dest.stat().st_mtime_ns == 1_000_000_000
+
+    assert image_codec.write_if_changed(dest, b"otros")
+    assert dest.read_bytes() == b"otros"
+
+
+# ---------------------------------------------------------------------------
+# encode: salida reproducible
+# ---------------------------------------------------------------------------
+
+@pytest.mark.parametrize("fmt", ["PNG", "AVIF"])
+def test_encode_does_not_embed_metadata(fmt):
+    """PNG y AVIF copiarían el ICC y el EXIF de img.info si no se les quita."""
+    if fmt == "AVIF" and not features.check("avif"):
+        pytest.skip("Pillow sin AVIF")
+    img = _phone_photo()
+    img.load()
+
+    with Image.open(io.BytesIO(image_codec.encode(img, fmt))) as out:
+        assert not out.info.get("icc_profile") and not out.info.get("exif")
+
+    icc = img.info["icc_profile"]
+    with Image.open(io.BytesIO(image_codec.encode(img, fmt, icc_profile=icc))) as out:
+        assert out.info["icc_profile"] == icc
+
+
+@pytest.mark.skipif(not features.check("avif"), reason="Pillow sin AVIF")
+def test_encode_avif_single_thread_whatever_the_cpu():
+    """Con varios hilos los bytes del AVIF dependen de la máquina."""
+    img = _photo()
+
+    data = image_codec.encode(img, "AVIF", quality=60)
+
+    assert data == image_codec.encode(img, "AVIF", quality=60, max_threads=1)
+    assert data == image_codec.encode(img.copy(), "AVIF", quality=60)
+
+
+# ---------------------------------------------------------------------------
+# Métricas
+# ---------------------------------------------------------------------------
+
+def test_metrics_identical_images():
+    img = _noisy()
+
+    assert image_codec.ssim(img, img) == pytest.approx(1.0)
+    assert image_codec.psnr(img, img) == float("inf")
+
+
+def test_metrics_drop_with_quality():
+    """Más compresión → menor SSIM y PSNR."""
+    img = _noisy()
+    decoded = {
+        q: Image.open(io.BytesIO(image_codec.encode(img, "JPEG", quality=q)))
+        for q in (95, 30)
+    }
+
+    assert image_codec.ssim(img, decoded[95]) > image_codec.ssim(img, decoded[30])
+    assert image_codec.psnr(img, decoded[95]) > image_codec.psnr(img, decoded[30]) > 20
+
+
+# ---------------------------------------------------------------------------
+# normalize
+# ---------------------------------------------------------------------------
+
+def _phone_photo() -> Image.Image:
+    """JPEG apaisado con Orientation=6 (foto vertical), GPS y perfil sRGB."""
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    exif[0x010F] = "Teléfono"
+    exif[0x8825] = {1: "N", 2: (40.0, 25.0, 0.0)}
+    icc = ImageCms.ImageCmsProfile(ImageCms.createProfile("sRGB")).tobytes()
+    buf = io.BytesIO()
+    _noisy(120, 80).save(buf, "JPEG", exif=exif.tobytes(), icc_profile=icc)
+    return Image.open(io.BytesIO(buf.getvalue()))
+
+
+def test_normalize_transposes_and_strips_metadata():
+    img = _phone_photo()
+    expected = len(img.info["exif"]) + len(img.info["icc_profile"])
+
+    out, report = image_codec.normalize(img)
+
+    assert out.size == (80, 120)
+    assert report == {"metadata_bytes": expected, "transposed": True, "converted": False}
+    assert "exif" not in out.info and "icc_profile" not in out.info
+    assert image_codec.orientation(out) == 1
+
+
+def test_normalize_keeps_transparency():
+    img = Image.new("P", (10, 10))
+    img.info["transparency"] = 0
+
+    out, report = image_codec.normalize(img)
+
+    assert out.info == {"transparency": 0}
+    assert report["metadata_bytes"] == 0
+
+
+# ---------------------------------------------------------------------------
+# analyze / choose_webp
+# ---------------------------------------------------------------------------
+
+def _photo() -> Image.Image:
+    """Ruido de color suavizado: miles de colores y pocos bordes."""
+    channels = [Image.effect_noise((400, 300), 60).filter(ImageFilter.GaussianBlur(2))
+                for _ in range(3)]
+    return Image.merge("RGB", channels)
+
+
+def _screenshot(colors: int = 5) -> Image.Image:
+    """Terminal sintética: fondo plano y texto suavizado en pocos colores."""
+    from PIL import ImageDraw
+
+    img = Image.new("RGB", (600, 300), "#1e1e1e")
+    draw = ImageDraw.Draw(img)
+    palette = ["#d4d4d4", "#569cd6", "#ce9178", "#6a9955", "#c586c0"][:colors]
+    for i in range(16):
+        draw.text((10, 5 + i * 18), f"root@host:~$ journalctl -u nginx {i * 37}",
+                  fill=palette[i % len(palette)])
+    return img
+
+
+def test_analyze_counts_colors_edges_and_alpha():
+    flat = image_codec.analyze(Image.new("RGB", (50, 50), "red"))
+    assert flat == {"colors": 1, "edges": 0.0, "alpha": False}
+
+    assert image_codec.analyze(_photo())["colors"] is None
+    assert image_codec.analyze(_screenshot())["edges"] >= image_codec.SCREENSHOT_EDGES
+    assert image_codec.analyze(Image.new("RGBA", (10, 10), (0, 0, 0, 0)))["alpha"]
+    assert not image_codec.analyze(Image.new("RGBA", (10, 10), (0, 0, 0, 255)))["alpha"]
+    # Colores contados antes de redimensionar: no se recuentan
+    assert image_codec.analyze(_photo(), colors=12)["colors"] == 12
+    assert image_codec.count_colors(_screenshot().quantize(8)) <= 8
+
+
+def test_choose_webp_few_colors_is_lossless():
+    img = Image.new("RGB", (200, 100), "white")
+    img.paste((0, 0, 0), (20, 20, 180, 80))
+
+    data, info = image_codec.choose_webp(img, image_codec.analyze(img), 80)
+
+    assert info["encoding"] == "lossless" and info["quality"] is None
+    assert Image.open(io.BytesIO(data)).convert("RGB").tobytes() == img.tobytes()
+
+
+def test_choose_webp_resized_few_colors_uses_palette():
+    img = Image.new("RGB", (200, 100), "white")
+
+    _, info = image_codec.choose_webp(img, image_codec.analyze(img), 80, exact=False)
+
+    assert info["encoding"] == "palette"
+
+
+def test_choose_webp_screenshot_beats_lossy():
+    img = _screenshot()
+    features = image_codec.analyze(img)
+
+    data, info = image_codec.choose_webp(img, features, 80, explain=True)
+
+    assert info["encoding"] in ("lossless", "palette")
+    assert set(info["candidates"]) == set(image_codec.WEBP_ENCODINGS)
+    assert len(data) == info["candidates"][info["encoding"]]
+    assert len(data) < info["candidates"]["lossy"]
+
+
+def test_choose_webp_photo_is_lossy():
+    img = _photo()
+
+    data, info = image_codec.choose_webp(img, image_codec.analyze(img), 80)
+
+    assert info["encoding"] == "lossy" and info["quality"] == 80
+    assert list(info["candidates"]) == ["lossy"]  # sin explain no prueba el resto
+
+
+def test_choose_webp_falls_back_to_lossy_when_lossless_is_heavier():
+    """Si la clasificación se equivoca, la red de seguridad elige con pérdida."""
+    img = _photo()
+    wrong = {"colors": 200, "edges": 0.5, "alpha": False}
+
+    _, info = image_codec.choose_webp(img, wrong, 80)
+
+    assert info["encoding"] == "lossy"
+    assert "con pérdida" in info["reason"]
@@ -0,0 +1,98 @@
+# scripts/tests/test_image_hashes.py
+import json
+import sys
+from pathlib import Path
+
+from PIL import Image, ImageFilter
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import image_hashes
+
+
+def _photo(size=(400, 300)) -> Image.Image:
+    """Imagen con estructura (ruido suavizado), distinta en cada llamada."""
+    noise = Image.effect_noise((size[0] // 20, size[1] // 20), 80)
+    return noise.resize(size, Image.BICUBIC).filter(ImageFilter.GaussianBlur(3)).convert("RGB")
+
+
+def test_dhash_survives_resize_and_recompression(tmp_path):
+    img = _photo()
+    img.resize((200, 150)).save(tmp_path / "copia.jpg", quality=60)
+
+    h1 = image_hashes.dhash(img)
+    h2, width, height = image_hashes.hash_file(tmp_path / "copia.jpg")
+
+    assert (width, height) == (200, 150)
+    assert image_hashes.distance(h1, h2) <= image_hashes.MAX_DISTANCE
+
+
+def test_dhash_separates_different_images():
+    assert image_hashes.distance(image_hashes.dhash(_photo()),
+                                 image_hashes.dhash(_photo())) > image_hashes.MAX_DISTANCE
+
+
+def test_similar_requires_same_aspect():
+    a = {"hash": image_hashes.hash_hex(2 ** 64 - 1), "width": 400, "height": 300}
+    b = dict(a, height=200)
+
+    assert image_hashes.similar(a, dict(a, width=800, height=600))
+    assert not image_hashes.similar(a, b)
+
+
+def test_low_information_hashes_never_match():
+    """Dos hashes casi vacíos (capturas oscuras, imágenes planas) no casan."""
+    a = {"hash": image_hashes.hash_hex(0b1011), "width": 400, "height": 300}
+    b = dict(a, hash=image_hashes.hash_hex(0b1001))
+
+    assert image_hashes.distance(0b1011, 0b1001) <= image_hashes.MAX_DISTANCE
+    assert not image_hashes.similar(a, b)
+    assert image_hashes.dhash(Image.new("RGB", (400, 300), (13, 17, 23))) == 0
+
+
+def test_confirm_compares_thumbnails(tmp_path):
+    img = _photo()
+    img.save(tmp_path / "a.png")
+    img.resize((200, 150)).save(tmp_path / "copia.jpg", quality=60)
+    _photo().save(tmp_path / "otra.png")
+
+    assert image_hashes.confirm(tmp_path / "a.png", tmp_path / "copia.jpg")
+    assert not image_hashes.confirm(tmp_path / "a.png", tmp_path / "otra.png")
+
+
+def _tree(tmp_path: Path) -> Path:
+    assets = tmp_path / "blog"
+    (assets / "uno").mkdir(parents=True)
+    (assets / "dos").mkdir()
+    img = _photo()
+    img.save(assets / "uno" / "captura.webp")
+    img.resize((200, 150)).save(assets / "dos" / "captura-2.webp")
+    img.resize((200, 150)).save(assets / "uno" / "captura-480w.webp")
+    _photo().save(assets / "dos" / "otra.webp")
+    (assets / "uno" / "ladder.json").write_text(json.dumps({
+        "captura.webp": [{"file": "captura.webp"}, {"file": "captura-480w.webp"}],
+    }))
+    return assets
+
+
+def test_index_is_incremental_and_skips_ladder_variants(tmp_path):
+    assets = _tree(tmp_path)
+    cache = tmp_path / "hashes.json"
+
+    first = image_hashes.HashIndex(assets, cache).refresh()
+    second = image_hashes.HashIndex(assets, cache).refresh()
+
+    assert sorted(first.entries()) == ["dos/captura-2.webp", "dos/otra.webp", "uno/captura.webp"]
+    assert first.misses == 3
+    assert second.misses == 0
+
+
+def test_clusters_keep_largest_and_count_savings(tmp_path):
+    assets = _tree(tmp_path)
+    index = image_hashes.HashIndex(assets).refresh()
+
+    clusters = index.clusters()
+
+    assert len(clusters) == 1
+    assert clusters[0]["keep"] == "uno/captura.webp"
+    assert clusters[0]["copies"] == ["dos/captura-2.webp"]
+    assert clusters[0]["saved"] == (assets / "dos" / "captura-2.webp").stat().st_size
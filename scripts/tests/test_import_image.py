@@ -1,10 +1,14 @@
 # scripts/tests/test_import_image.py
+import hashlib
+import json
 import os
+import random
+import re
 import sys
 from pathlib import Path
 
 import pytest
-from PIL import Image
+from PIL import Image, ImageDraw, ImageFilter
 
 # Añadir scripts/ al path para poder importar import_image
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -152,3 +156,443 @@ def test_build_snippet_invalid_kind():
     """kind desconocido lanza ValueError."""
     with pytest.raises(ValueError, match="kind desconocido"):
         import_image.build_snippet("/img.webp", "alt", kind="gallery")
+
+
+# ---------------------------------------------------------------------------
+# Modo lote
+# ---------------------------------------------------------------------------
+
+def test_expand_sources_dir_glob_and_file(tmp_path):
+    """Carpetas y globs se expanden ordenados; los repetidos se quitan."""
+    shots = tmp_path / "capturas"
+    shots.mkdir()
+    _make_image(shots / "b.png", 10, 10)
+    _make_image(shots / "a.png", 10, 10)
+    (shots / "notas.txt").write_text("x")
+
+    result = import_image.expand_sources(
+        [str(shots), str(shots / "*.png"), str(shots / "a.png")]
+    )
+
+    assert result == [shots / "a.png", shots / "b.png"]
+
+
+def test_plan_destination_policies(tmp_path):
+    dest = tmp_path / "foto.webp"
+    dest.write_bytes(b"x")
+
+    assert import_image.plan_destination(dest, "skip", set()) is None
+    assert import_image.plan_destination(dest, "overwrite", set()) == dest
+    assert import_image.plan_destination(dest, "suffix", set()) == tmp_path / "foto-2.webp"
+
+
+def test_plan_destination_avoids_names_taken_in_batch(tmp_path):
+    """Dos imágenes del mismo lote nunca acaban en el mismo destino."""
+    dest = tmp_path / "foto.webp"
+
+    assert import_image.plan_destination(dest, "suffix", {dest}) == tmp_path / "foto-2.webp"
+    assert import_image.plan_destination(dest, "overwrite", {dest}) is None
+
+
+def test_plan_destination_invalid_policy(tmp_path):
+    with pytest.raises(ValueError, match="política desconocida"):
+        import_image.plan_destination(tmp_path / "x.webp", "preguntar", set())
+
+
+def test_import_batch_converts_and_builds_snippets(tmp_path):
+    """Importa todas las imágenes y genera un <Figure> por cada una."""
+    srcs = []
+    for name in ("Paso Uno.png", "paso_dos.jpg"):
+        _make_image(tmp_path / name, 300, 200, "JPEG" if name.endswith("jpg") else "PNG")
+        srcs.append(tmp_path / name)
+    assets = tmp_path / "assets"
+
+    results = import_image.import_batch(
+        srcs, "mi-post", alt_template="Paso {n}: {name}", jobs=2, assets_dir=assets,
+    )
+
+    assert [r["status"] for r in results] == ["imported", "imported"]
+    assert (assets / "mi-post" / "paso-uno.webp").exists()
+    assert results[1]["snippet"] == (
+        '<Figure src="/images/blog/mi-post/paso-dos.webp" alt="Paso 2: paso dos" />'
+    )
+    placeholders = json.loads((assets / "mi-post" / "placeholders.json").read_text())
+    assert sorted(placeholders) == ["paso-dos.webp", "paso-uno.webp"]
+    assert placeholders["paso-uno.webp"]["color"] == "#6496c8"
+    assert placeholders["paso-uno.webp"]["width"] == 300
+
+
+def test_import_batch_skips_existing_and_reports_errors(tmp_path):
+    good = tmp_path / "bien.png"
+    bad = tmp_path / "rota.png"
+    _make_image(good, 50, 50)
+    bad.write_bytes(b"no es una imagen")
+    assets = tmp_path / "assets"
+    (assets / "mi-post").mkdir(parents=True)
+    (assets / "mi-post" / "bien.webp").write_bytes(b"anterior")
+
+    results = import_image.import_batch([good, bad], "mi-post", jobs=1, assets_dir=assets)
+
+    assert results[0]["status"] == "skipped"
+    assert (assets / "mi-post" / "bien.webp").read_bytes() == b"anterior"
+    assert results[1]["status"] == "error"
+    assert results[1]["snippet"] is None
+
+
+# ---------------------------------------------------------------------------
+# Nombres con hash
+# ---------------------------------------------------------------------------
+
+def _hash_env(tmp_path):
+    assets = tmp_path / "assets"
+    content = tmp_path / "content"
+    content.mkdir()
+    post = content / "mi-post.mdx"
+    post.write_text('<Figure src="/images/blog/mi-post/captura.webp" alt="a" />\n',
+                    encoding="utf-8")
+    return assets, content, post
+
+
+def test_import_batch_hash_names_replaces_and_rewrites_refs(tmp_path):
+    """Sustituir una imagen cambia su nombre y las referencias del post."""
+    assets, content, post = _hash_env(tmp_path)
+    src = tmp_path / "captura.png"
+    _make_image(src, 300, 200)
+    import_image.import_batch([src], "mi-post", jobs=1, assets_dir=assets)
+
+    [first] = import_image.import_batch([src], "mi-post", jobs=1, assets_dir=assets,
+                                        policy="overwrite", hash_names=True,
+                                        content_dir=content, ladder=(100,))
+    name = Path(first["dest"]).name
+    assert re.fullmatch(r"captura\.[0-9a-f]{8}\.webp", name)
+    assert first["snippet"] == f'<Figure src="/images/blog/mi-post/{name}" alt="captura" />'
+    assert first["replaced"] == ["/images/blog/mi-post/captura.webp"]
+    assert first["rewritten"] == ["mi-post.mdx"]
+    assert f"/images/blog/mi-post/{name}" in post.read_text(encoding="utf-8")
+
+    _make_image(src, 400, 200)
+    [second] = import_image.import_batch([src], "mi-post", jobs=1, assets_dir=assets,
+                                         policy="overwrite", hash_names=True,
+                                         content_dir=content)
+    assert second["replaced"] == [f"/images/blog/mi-post/{name}"]
+    assert f'src="{second["public_path"]}"' in post.read_text(encoding="utf-8")
+    # La versión anterior se va con su escalera y su entrada del ladder.json
+    assert sorted(p.name for p in (assets / "mi-post").iterdir()) == [
+        Path(second["dest"]).name, "placeholders.json",
+    ]
+    assert list(json.loads((assets / "mi-post" / "placeholders.json").read_text())) == [
+        Path(second["dest"]).name,
+    ]
+
+
+def test_import_batch_hash_names_same_content_keeps_name(tmp_path):
+    assets, content, post = _hash_env(tmp_path)
+    src = tmp_path / "captura.png"
+    _make_image(src, 300, 200)
+    kwargs = {"jobs": 1, "assets_dir": assets, "hash_names": True, "content_dir": content}
+
+    [first] = import_image.import_batch([src], "mi-post", **kwargs)
+    [skipped] = import_image.import_batch([src], "mi-post", **kwargs)
+    [again] = import_image.import_batch([src], "mi-post", policy="overwrite", **kwargs)
+
+    assert skipped["status"] == "skipped"
+    assert again["dest"] == first["dest"]
+    assert again["replaced"] == [] and again["stats"]["written"] is False
+
+
+def test_hash_names_ignore_date_stamped_files(tmp_path):
+    """Un captura.20240115.webp escrito a mano no es una versión de captura."""
+    assets, content, post = _hash_env(tmp_path)
+    (assets / "mi-post").mkdir(parents=True)
+    dated = assets / "mi-post" / "captura.20240115.webp"
+    _make_image(dated, 300, 200)
+    src = tmp_path / "captura.png"
+    _make_image(src, 400, 200)
+
+    [result] = import_image.import_batch([src], "mi-post", jobs=1, assets_dir=assets,
+                                         hash_names=True, content_dir=content)
+
+    assert not import_image.is_hashed(dated)
+    assert import_image.is_hashed(Path(result["dest"]))
+    assert result["status"] == "imported" and result["replaced"] == []
+    assert dated.exists()
+
+
+# ---------------------------------------------------------------------------
+# Decodificación reducida
+# ---------------------------------------------------------------------------
+
+def test_convert_and_save_keeps_screenshot_lossless(tmp_path):
+    """Una captura de pocos colores no pasa por el WebP con pérdida."""
+    src = tmp_path / "captura.png"
+    img = Image.new("RGB", (400, 200), "#0d1117")
+    img.paste((88, 213, 162), (20, 20, 380, 40))
+    img.save(src)
+    dest = tmp_path / "out.webp"
+    stats: dict = {}
+
+    import_image.convert_and_save(str(src), str(dest), stats=stats, explain=True)
+
+    assert stats["encoding"] == "lossless"
+    assert set(stats["candidates"]) == {"lossless", "palette", "lossy"}
+    assert Image.open(dest).convert("RGB").tobytes() == img.tobytes()
+    assert import_image.format_encoding(stats) == "sin pérdida"
+    assert "sin pérdida" in import_image.format_explain(stats)
+
+
+def test_convert_and_save_classifies_the_resized_image(tmp_path, monkeypatch):
+    """analyze ve la imagen ya reducida, pero con los colores del original:
+    LANCZOS inventaría miles y la captura pasaría por foto."""
+    import image_codec
+
+    src = tmp_path / "ancha.png"
+    img = Image.new("RGB", (3200, 1600), "#0d1117")
+    for x in range(0, 3200, 8):
+        img.paste(((x * 7) % 256, 213, 162), (x, 0, x + 3, 1600))
+    img.save(src)
+    seen = []
+    analyze = image_codec.analyze
+    monkeypatch.setattr(image_codec, "analyze",
+                        lambda im, colors=None: seen.append(im.size) or analyze(im, colors))
+    stats: dict = {}
+
+    import_image.convert_and_save(str(src), str(tmp_path / "ancha.webp"), stats=stats)
+
+    assert seen == [(1600, 800)]
+    assert stats["colors"] == image_codec.count_colors(img)
+    assert stats["encoding"] == "palette"
+
+
+def test_convert_and_save_decodes_large_jpeg_reduced(tmp_path):
+    """Un JPEG de 8000px se decodifica a escala reducida, nunca menor que el destino."""
+    src = tmp_path / "panorama.jpg"
+    dest = tmp_path / "panorama.webp"
+    _make_image(src, 8000, 4500, "JPEG")
+    stats = {}
+
+    import_image.convert_and_save(str(src), str(dest), stats=stats)
+
+    assert stats["src_size"] == [8000, 4500]
+    assert stats["decoded_size"] == [2000, 1125]  # escala DCT 1/4
+    assert Image.open(dest).size == (1600, 900)
+    assert "1/4" in import_image.format_stats(stats)
+
+
+def test_convert_and_save_large_png_stats(tmp_path):
+    """Las fuentes no JPEG se decodifican completas pero acaban igual de tamaño."""
+    src = tmp_path / "captura.png"
+    dest = tmp_path / "captura.webp"
+    _make_image(src, 4000, 2000)
+    stats = {}
+
+    import_image.convert_and_save(str(src), str(dest), stats=stats)
+
+    assert stats["decoded_size"] == [4000, 2000]
+    assert stats["seconds"] >= 0
+    assert Image.open(dest).size == (1600, 800)
+
+
+def test_peak_rss_is_per_image(tmp_path):
+    """Un pico anterior del mismo proceso (otra imagen del worker) no cuenta."""
+    src = tmp_path / "pequena.png"
+    _make_image(src, 200, 100)
+    ballast = bytearray(300 * 1024 * 1024)
+    ballast[::4096] = b"\1" * len(ballast[::4096])  # que cuente como residente
+    del ballast
+    stats = {}
+
+    import_image.convert_and_save(str(src), str(tmp_path / "pequena.webp"), stats=stats)
+
+    if stats["peak_rss_scope"] != "imagen":
+        pytest.skip("sin /proc/self/clear_refs")
+    assert stats["peak_rss_mb"] < 300
+    assert "pico del proceso" not in import_image.format_stats(stats)
+
+
+# ---------------------------------------------------------------------------
+# Escalera responsive
+# ---------------------------------------------------------------------------
+
+def test_convert_and_save_ladder_variants(tmp_path):
+    """Genera cada ancho menor en WebP y AVIF; el WebP superior es el propio dest."""
+    src = tmp_path / "grande.png"
+    dest = tmp_path / "post" / "grande.webp"
+    _make_image(src, 2000, 1000)
+    stats = {}
+
+    import_image.convert_and_save(str(src), str(dest), stats=stats, ladder=(480, 750, 1200))
+
+    files = [(v["file"], v["width"], v["format"]) for v in stats["ladder"]]
+    assert files[:2] == [("grande.webp", 1600, "webp"), ("grande-1600w.avif", 1600, "avif")]
+    assert ("grande-480w.webp", 480, "webp") in files
+    assert len(files) == 8
+    assert Image.open(tmp_path / "post" / "grande-750w.avif").size == (750, 375)
+
+
+def test_convert_and_save_twice_is_byte_identical(tmp_path):
+    """Reimportar la misma imagen da los mismos bytes y no reescribe nada."""
+    src = tmp_path / "captura.png"
+    dest = tmp_path / "post" / "captura.webp"
+    _make_image(src, 1000, 500)
+    import_image.convert_and_save(str(src), str(dest), ladder=(480,))
+    files = sorted(dest.parent.iterdir())
+    before = {p.name: (hashlib.sha256(p.read_bytes()).hexdigest(), p.stat().st_mtime_ns)
+              for p in files}
+    stats = {}
+
+    import_image.convert_and_save(str(src), str(dest), stats=stats, ladder=(480,))
+
+    assert stats["written"] is False
+    assert not any(v["written"] for v in stats["ladder"])
+    after = {p.name: (hashlib.sha256(p.read_bytes()).hexdigest(), p.stat().st_mtime_ns)
+             for p in sorted(dest.parent.iterdir())}
+    assert after == before
+
+
+def test_ladder_skips_widths_above_image(tmp_path):
+    """Una imagen de 600px no se amplía a 750/1200/1600."""
+    src = tmp_path / "pequena.png"
+    dest = tmp_path / "pequena.webp"
+    _make_image(src, 600, 300)
+    stats = {}
+
+    import_image.convert_and_save(str(src), str(dest), stats=stats,
+                                  ladder=import_image.LADDER_WIDTHS)
+
+    assert sorted({v["width"] for v in stats["ladder"]}) == [480, 600]
+
+
+def test_import_batch_writes_ladder_manifest(tmp_path):
+    src = tmp_path / "captura.png"
+    _make_image(src, 1000, 500)
+    assets = tmp_path / "assets"
+
+    import_image.import_batch([src], "mi-post", jobs=1, assets_dir=assets, ladder=(480,))
+
+    manifest = json.loads((assets / "mi-post" / "ladder.json").read_text())
+    assert [v["file"] for v in manifest["captura.webp"]] == [
+        "captura.webp", "captura-1000w.avif", "captura-480w.webp", "captura-480w.avif",
+    ]
+    assert "written" not in manifest["captura.webp"][1]
+
+
+# ---------------------------------------------------------------------------
+# Presupuesto de KB
+# ---------------------------------------------------------------------------
+
+def _make_noisy_image(path: Path, width: int, height: int) -> None:
+    """Imagen con ruido: su peso depende mucho de la calidad."""
+    noise = Image.effect_noise((width, height), 60).filter(ImageFilter.GaussianBlur(2))
+    noise.convert("RGB").save(path, "PNG")
+
+
+def test_convert_and_save_max_kb_fits_budget(tmp_path):
+    src = tmp_path / "ruido.png"
+    _make_noisy_image(src, 800, 600)
+    free_stats, budget_stats = {}, {}
+    free_kb = import_image.convert_and_save(str(src), str(tmp_path / "libre.webp"),
+                                            stats=free_stats)
+    budget = free_kb * 3 // 4
+
+    kb = import_image.convert_and_save(str(src), str(tmp_path / "ajustada.webp"),
+                                       stats=budget_stats, max_kb=budget)
+
+    assert (tmp_path / "ajustada.webp").stat().st_size <= budget * 1024
+    assert kb <= budget
+    assert free_stats["quality"] == import_image.WEBP_QUALITY
+    assert budget_stats["quality"] < import_image.WEBP_QUALITY
+
+
+# ---------------------------------------------------------------------------
+# Casi-duplicados
+# ---------------------------------------------------------------------------
+
+def _make_photo(path: Path, size=(400, 300)) -> None:
+    """Imagen con estructura: el color plano da siempre el mismo dHash."""
+    noise = Image.effect_noise((size[0] // 20, size[1] // 20), 80)
+    noise.resize(size, Image.BICUBIC).filter(ImageFilter.GaussianBlur(3)).convert("RGB").save(path)
+
+
+def test_import_batch_flags_duplicate_of_existing(tmp_path):
+    original = tmp_path / "original.png"
+    _make_photo(original)
+    assets = tmp_path / "assets"
+    import_image.import_batch([original], "post-a", jobs=1, assets_dir=assets)
+    copy = tmp_path / "Captura de pantalla.jpg"
+    Image.open(original).resize((200, 150)).save(copy, quality=70)
+
+    results = import_image.import_batch([copy], "post-b", jobs=1, assets_dir=assets)
+
+    assert results[0]["status"] == "imported"
+    assert results[0]["duplicate_of"] == "/images/blog/post-a/original.webp"
+
+
+def _make_terminal(path: Path, seed: int, size=(1600, 900)) -> None:
+    """Captura de terminal: texto claro y fino sobre fondo casi negro."""
+    rnd = random.Random(seed)
+    img = Image.new("RGB", size, (13, 17, 23))
+    draw = ImageDraw.Draw(img)
+    for y in range(20, size[1] - 20, 24):
+        line = "".join(rnd.choice("abcdefghijklmnopqrstuvwxyz$/-_. ")
+                       for _ in range(rnd.randint(10, 150)))
+        draw.text((16, y), line, fill=rnd.choice([(201, 209, 217), (126, 231, 135)]))
+    img.save(path)
+
+
+def test_import_batch_does_not_match_dark_screenshots(tmp_path):
+    """Dos capturas oscuras distintas no son duplicadas (el dHash de 8x8
+    daba casi 0 en las dos)."""
+    first, second = tmp_path / "journalctl.png", tmp_path / "htop.png"
+    _make_terminal(first, 1)
+    _make_terminal(second, 2)
+    assets = tmp_path / "assets"
+
+    batch = import_image.import_batch([first, second], "post-a", jobs=1, assets_dir=assets,
+                                      on_duplicate="reuse")
+    _make_terminal(tmp_path / "tail.png", 3)
+    later = import_image.import_batch([tmp_path / "tail.png"], "post-b", jobs=1,
+                                      assets_dir=assets, on_duplicate="reuse")
+
+    assert [r["status"] for r in batch + later] == ["imported"] * 3
+    assert [r["duplicate_of"] for r in batch + later] == [None] * 3
+
+
+def test_import_batch_reuses_duplicate(tmp_path):
+    original = tmp_path / "original.png"
+    _make_photo(original)
+    copy = tmp_path / "copia.png"
+    Image.open(original).save(copy)
+    assets = tmp_path / "assets"
+
+    results = import_image.import_batch([original, copy], "post", jobs=1, assets_dir=assets,
+                                        on_duplicate="reuse")
+
+    assert [r["status"] for r in results] == ["imported", "reused"]
+    assert results[1]["public_path"] == "/images/blog/post/original.webp"
+    assert 'src="/images/blog/post/original.webp"' in results[1]["snippet"]
+    assert not (assets / "post" / "copia.webp").exists()
+
+
+# ---------------------------------------------------------------------------
+# Normalización
+# ---------------------------------------------------------------------------
+
+def test_convert_and_save_rotates_and_strips_exif(tmp_path):
+    """Una foto de móvil girada sale vertical y sin EXIF (ni GPS)."""
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    exif[0x8825] = {1: "N", 2: (40.0, 25.0, 0.0)}
+    src = tmp_path / "movil.jpg"
+    Image.new("RGB", (2400, 1800), (10, 120, 200)).save(src, exif=exif.tobytes())
+    dest = tmp_path / "movil.webp"
+    stats = {}
+
+    import_image.convert_and_save(str(src), str(dest), stats=stats)
+
+    with Image.open(dest) as out:
+        assert out.size == (1600, 2133)
+        assert "exif" not in out.info
+    assert stats["src_size"] == [1800, 2400]
+    assert stats["transposed"] is True
+    assert stats["metadata_bytes"] > 0
+    assert "metadatos" in import_image.format_normalized(stats)
@@ -0,0 +1,87 @@
+# scripts/tests/test_og_cards.py
+import sys
+from pathlib import Path
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import og_cards
+
+pytestmark = pytest.mark.skipif(not og_cards.OG_FONT.exists(), reason="sin JetBrains Mono")
+
+
+def _cards(*titles, category="Linux"):
+    return [(f"post-{i}", title, category) for i, title in enumerate(titles)]
+
+
+def test_render_card_size():
+    img = og_cards.render_card("Título de prueba", "Linux")
+
+    assert img.size == (og_cards.OG_WIDTH, og_cards.OG_HEIGHT)
+    assert img.mode == "RGB"
+
+
+def test_card_hash_depends_on_drawn_inputs():
+    [card] = _cards("Uno")
+
+    assert og_cards.card_hash(card) == og_cards.card_hash(card)
+    assert og_cards.card_hash(card) != og_cards.card_hash((card[0], "Dos", *card[2:]))
+    assert og_cards.card_hash(card) != og_cards.card_hash((card[0], "Uno", "Redes"))
+    # El id no se dibuja: renombrar el post no cambia el hash
+    assert og_cards.card_hash(card) == og_cards.card_hash(("otro", *card[1:]))
+
+
+def test_render_cards_writes_png_and_manifest(tmp_path):
+    results, removed = og_cards.render_cards(_cards("Uno", "Dos"), tmp_path, jobs=1)
+
+    assert [r["id"] for r in results] == ["post-0", "post-1"]
+    assert removed == []
+    with Image.open(tmp_path / "post-0.png") as img:
+        assert img.format == "PNG"
+        assert img.size == (og_cards.OG_WIDTH, og_cards.OG_HEIGHT)
+    manifest = og_cards.load_manifest(tmp_path)
+    assert manifest["post-1"]["title"] == "Dos"
+    assert manifest["post-1"]["category"] == "Linux"
+    assert manifest["post-1"]["version"] == og_cards.OG_VERSION
+
+
+def test_render_cards_only_redraws_changed(tmp_path):
+    og_cards.render_cards(_cards("Uno", "Dos"), tmp_path, jobs=1)
+
+    assert og_cards.render_cards(_cards("Uno", "Dos"), tmp_path, jobs=1)[0] == []
+    results, _ = og_cards.render_cards(_cards("Uno", "Cambiado"), tmp_path, jobs=1)
+    assert [r["id"] for r in results] == ["post-1"]
+    results, _ = og_cards.render_cards(_cards("Uno", "Cambiado"), tmp_path, jobs=1, force=True)
+    assert len(results) == 2
+
+
+def test_render_cards_redraws_missing_file(tmp_path):
+    og_cards.render_cards(_cards("Uno"), tmp_path, jobs=1)
+    (tmp_path / "post-0.png").unlink()
+
+    results, _ = og_cards.render_cards(_cards("Uno"), tmp_path, jobs=1)
+
+    assert [r["id"] for r in results] == ["post-0"]
+
+
+def test_render_cards_prunes_removed_posts(tmp_path):
+    og_cards.render_cards(_cards("Uno", "Dos"), tmp_path, jobs=1)
+
+    _, kept = og_cards.render_cards(_cards("Uno"), tmp_path, jobs=1, prune=False)
+    assert kept == [] and (tmp_path / "post-1.png").exists()
+
+    _, removed = og_cards.render_cards(_cards("Uno"), tmp_path, jobs=1)
+    assert removed == ["post-1"]
+    assert not (tmp_path / "post-1.png").exists()
+    assert list(og_cards.load_manifest(tmp_path)) == ["post-0"]
+
+
+def test_render_cards_parallel_matches_serial(tmp_path):
+    cards = _cards("Uno", "Dos", "Tres")
+    og_cards.render_cards(cards, tmp_path / "serie", jobs=1)
+    og_cards.render_cards(cards, tmp_path / "pool", jobs=2)
+
+    for card_id, *_ in cards:
+        png = f"{card_id}.png"
+        assert (tmp_path / "serie" / png).read_bytes() == (tmp_path / "pool" / png).read_bytes()
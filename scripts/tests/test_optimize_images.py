@@ -0,0 +1,189 @@
+# scripts/tests/test_optimize_images.py
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+from PIL import Image, ImageFilter
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import optimize_images
+
+
+def _tree(tmp_path: Path) -> Path:
+    """Una portada JPEG sin optimizar y una figura en una subcarpeta."""
+    root = tmp_path / "images"
+    (root / "blog" / "post").mkdir(parents=True)
+    img = Image.effect_noise((200, 150), 40).filter(ImageFilter.GaussianBlur(2)).convert("RGB")
+    img.resize((800, 600)).save(root / "portada.jpg", quality=95)
+    img.save(root / "blog" / "post" / "figura.png")
+    return root
+
+
+def test_optimize_tree_replaces_smaller_equivalent_files(tmp_path):
+    root = _tree(tmp_path)
+    before = (root / "portada.jpg").stat().st_size
+
+    results, skipped = optimize_images.optimize_tree(
+        [root], jobs=1, manifest_path=tmp_path / "manifest.json",
+    )
+
+    by_name = {Path(r["path"]).name: r for r in results}
+    assert skipped == 0
+    assert by_name["portada.jpg"]["status"] == "optimized"
+    assert by_name["portada.jpg"]["score"] >= optimize_images.DEFAULT_THRESHOLDS["ssim"]
+    assert (root / "portada.jpg").stat().st_size == by_name["portada.jpg"]["after"] < before
+
+
+def test_optimize_tree_rerun_is_noop(tmp_path):
+    root = _tree(tmp_path)
+    manifest = tmp_path / "manifest.json"
+    optimize_images.optimize_tree([root], jobs=1, manifest_path=manifest)
+
+    results, skipped = optimize_images.optimize_tree([root], jobs=1, manifest_path=manifest)
+
+    assert results == []
+    assert skipped == 2
+
+
+def test_optimize_rejects_below_threshold(tmp_path):
+    """Con un umbral inalcanzable no se toca ningún fichero."""
+    root = _tree(tmp_path)
+    original = (root / "portada.jpg").read_bytes()
+
+    result = optimize_images.optimize_file(str(root / "portada.jpg"), "psnr", threshold=1000)
+
+    assert result["status"] == "degraded"
+    assert (root / "portada.jpg").read_bytes() == original
+
+
+def test_dry_run_writes_nothing(tmp_path):
+    root = _tree(tmp_path)
+    manifest = tmp_path / "manifest.json"
+    mtime = os.stat(root / "portada.jpg").st_mtime_ns
+
+    results, _ = optimize_images.optimize_tree([root], jobs=1, dry_run=True,
+                                               manifest_path=manifest)
+
+    assert any(r["status"] == "optimized" for r in results)
+    assert os.stat(root / "portada.jpg").st_mtime_ns == mtime
+    assert not manifest.exists()
+
+
+def test_hashed_names_are_never_rewritten(tmp_path):
+    """Un <stem>.<hash>.webp reescrito dejaría de coincidir con su hash."""
+    root = _tree(tmp_path)
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    with Image.open(root / "blog" / "post" / "figura.png") as img:
+        img.save(root / "blog" / "post" / "tmp.webp", quality=100, exif=exif.tobytes())
+    data = (root / "blog" / "post" / "tmp.webp").read_bytes()
+    hashed = root / "blog" / "post" / f"figura.{hashlib.sha256(data).hexdigest()[:8]}.webp"
+    (root / "blog" / "post" / "tmp.webp").rename(hashed)
+
+    optimized, _ = optimize_images.optimize_tree([hashed], jobs=1, manifest_path=None)
+    normalized, _ = optimize_images.normalize_tree([hashed], jobs=1, manifest_path=None)
+
+    assert [r["status"] for r in optimized + normalized] == ["skipped", "skipped"]
+    assert hashed.read_bytes() == data
+
+
+def test_date_stamped_names_are_not_hashes(tmp_path):
+    """foto.20240115.webp parece un <stem>.<hash>.webp pero no lo es."""
+    root = _tree(tmp_path)
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    dated = root / "blog" / "post" / "foto.20240115.webp"
+    with Image.open(root / "blog" / "post" / "figura.png") as img:
+        img.save(dated, quality=100, exif=exif.tobytes())
+
+    [normalized], _ = optimize_images.normalize_tree([dated], jobs=1, manifest_path=None)
+
+    assert normalized["status"] == "normalized"
+    assert normalized["transposed"] is True
+
+
+def test_generated_covers_are_left_to_generate_images(tmp_path):
+    """Las portadas salen del image: de los posts, no de un fichero local."""
+    root = _tree(tmp_path)
+    original = (root / "portada.jpg").read_bytes()
+    content = tmp_path / "blog"
+    content.mkdir()
+    (content / "post.mdx").write_text(
+        "---\ntitle: 'Post'\nimage: '../../assets/images/portada.jpg'\n---\n", encoding="utf-8")
+    covers = optimize_images.generated_covers(content, root, cache_path=None)
+
+    results, _ = optimize_images.optimize_tree([root], jobs=1, manifest_path=None, covers=covers)
+
+    by_name = {Path(r["path"]).name: r["status"] for r in results}
+    assert by_name["portada.jpg"] == "skipped"
+    assert (root / "portada.jpg").read_bytes() == original
+
+
+def test_webp_keeps_lossless_choice(tmp_path):
+    """Una captura de pocos colores sigue sin pérdida tras optimize."""
+    img = Image.new("RGB", (400, 300), "#0d1117")
+    img.paste((88, 213, 162), (20, 20, 380, 40))
+    path = tmp_path / "captura.webp"
+    img.save(path, quality=100)
+    with Image.open(path) as before:
+        pixels = before.convert("RGB").tobytes()
+
+    result = optimize_images.optimize_file(str(path))
+
+    assert result["status"] == "optimized"
+    with Image.open(path) as saved:
+        assert saved.convert("RGB").tobytes() == pixels
+
+
+def test_summarize_by_dir():
+    results = [
+        {"path": "/a/x.jpg", "before": 100, "after": 60, "status": "optimized"},
+        {"path": "/a/y.jpg", "before": 50, "after": 50, "status": "larger"},
+        {"path": "/a/b/z.webp", "before": 30, "after": 20, "status": "optimized"},
+    ]
+
+    summary = optimize_images.summarize_by_dir(results)
+
+    assert summary["/a"] == {"files": 2, "changed": 1, "before": 150, "saved": 40}
+    assert summary["/a/b"]["saved"] == 10
+
+
+def test_normalize_tree_strips_only_dirty_files(tmp_path):
+    root = _tree(tmp_path)
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    Image.open(root / "portada.jpg").save(root / "movil.jpg", exif=exif.tobytes())
+
+    results, _ = optimize_images.normalize_tree([root], jobs=1,
+                                                manifest_path=tmp_path / "manifest.json")
+
+    by_name = {Path(r["path"]).name: r for r in results}
+    assert by_name["movil.jpg"]["status"] == "normalized"
+    assert by_name["movil.jpg"]["transposed"] is True
+    assert by_name["portada.jpg"]["status"] == "clean"
+    with Image.open(root / "movil.jpg") as img:
+        assert img.size == (600, 800)
+        assert "exif" not in img.info
+
+
+def test_placeholders_tree_fills_missing_entries(tmp_path):
+    root = _tree(tmp_path)
+    (root / "blog" / "post" / "figura-480w.webp").write_bytes(b"variante")
+    (root / "blog" / "post" / "ladder.json").write_text(json.dumps(
+        {"figura.png": [{"file": "figura.png"}, {"file": "figura-480w.webp"}]}))
+
+    results, skipped = optimize_images.placeholders_tree([root], jobs=2)
+
+    assert sorted(Path(r["path"]).name for r in results) == ["figura.png", "portada.jpg"]
+    assert skipped == 0
+    cover = json.loads((root / "placeholders.json").read_text())["portada.jpg"]
+    # Decodificado reducido, pero con el tamaño real de la imagen
+    assert (cover["width"], cover["height"]) == (800, 600)
+    assert list(json.loads((root / "blog" / "post" / "placeholders.json").read_text())) == [
+        "figura.png",
+    ]
+
+    assert optimize_images.placeholders_tree([root], jobs=1) == ([], 2)
+    assert len(optimize_images.placeholders_tree([root], jobs=1, force=True)[0]) == 2
@@ -0,0 +1,84 @@
+# scripts/tests/test_placeholders.py
+import base64
+import io
+import sys
+from pathlib import Path
+
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import placeholders
+
+
+def _gradient(width: int = 300, height: int = 200) -> Image.Image:
+    """Degradado horizontal de rojo a azul."""
+    row = Image.linear_gradient("L").rotate(90).resize((width, height))
+    return Image.merge("RGB", [row.transpose(Image.FLIP_LEFT_RIGHT), Image.new("L", row.size),
+                               row])
+
+
+def test_blurhash_matches_reference_encoder():
+    """Valores de referencia de woltapp/blurhash sobre la misma miniatura."""
+    img = Image.effect_mandelbrot((300, 200), (-2, -1.5, 1, 1.5), 100).convert("RGB")
+
+    assert placeholders.blurhash(img) == "L01yLPt7M{ayt7j[ayayM{RjWBxu"
+
+
+def test_blurhash_size_and_components():
+    bh = placeholders.blurhash(_gradient())
+
+    assert len(bh) == 4 + 2 + 2 * (4 * 3 - 1) == 28
+    assert bh[0] == "L"  # 4x3: (4 - 1) + (3 - 1) * 9 = 21 en base 83
+    assert len(placeholders.blurhash(_gradient(), components=(1, 1))) == 6
+
+
+def test_dominant_color_picks_the_largest_area():
+    img = Image.new("RGB", (100, 100), "#ff0000")
+    img.paste((0, 0, 255), (0, 0, 30, 100))
+
+    assert placeholders.dominant_color(img) == "#ff0000"
+
+
+def test_lqip_is_tiny_webp_data_uri():
+    uri = placeholders.lqip(_gradient(1600, 900))
+
+    prefix = "data:image/webp;base64,"
+    assert uri.startswith(prefix)
+    with Image.open(io.BytesIO(base64.b64decode(uri[len(prefix):]))) as img:
+        assert img.format == "WEBP"
+        assert img.size == (16, 9)
+
+
+def test_placeholder_handles_palette_and_alpha():
+    img = _gradient().convert("RGBA").quantize(16)
+
+    entry = placeholders.placeholder(img)
+
+    assert entry["width"] == 300 and entry["height"] == 200
+    assert entry["color"].startswith("#") and len(entry["blurhash"]) == 28
+    assert "alpha" not in entry and entry["lqip"]
+
+
+def test_transparent_images_get_no_lqip():
+    """El fondo se vería a través de la imagen ya cargada."""
+    img = _gradient().convert("RGBA")
+    img.putalpha(128)
+
+    entry = placeholders.placeholder(img)
+
+    assert entry["alpha"] is True
+    assert "lqip" not in entry
+    assert placeholders.has_alpha(img.convert("RGB")) is False
+
+
+def test_update_and_drop_placeholders(tmp_path):
+    placeholders.update_placeholders(tmp_path, {"b.webp": {"color": "#000000"}})
+    placeholders.update_placeholders(tmp_path, {"a.webp": {"color": "#ffffff"}})
+
+    assert list(placeholders.load_placeholders(tmp_path)) == ["a.webp", "b.webp"]
+
+    placeholders.drop_placeholders(tmp_path, ["a.webp"])
+    assert list(placeholders.load_placeholders(tmp_path)) == ["b.webp"]
+
+    placeholders.drop_placeholders(tmp_path, ["b.webp"])
+    assert not (tmp_path / placeholders.PLACEHOLDERS_MANIFEST).exists()
@@ -0,0 +1,66 @@
+# scripts/tests/test_timings.py
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import timings
+
+
+def test_summary_count_mean_p95():
+    t = timings.Timings()
+    for ms in range(1, 21):  # 1..20 ms
+        t.add("encode", ms / 1000)
+    t.add_bytes(1500)
+
+    summary = t.summary()
+
+    stage = summary["stages"]["encode"]
+    assert stage["count"] == 20
+    assert stage["total"] == 0.21
+    assert stage["mean"] == 0.0105
+    assert stage["p95"] == 0.019
+    assert summary["bytes_written"] == 1500
+
+
+def test_stage_context_manager_records_sample():
+    t = timings.Timings()
+
+    with t.stage("draw"):
+        pass
+    with t.stage("draw"):
+        pass
+
+    assert len(t.samples["draw"]) == 2
+
+
+def test_drain_and_merge_between_processes():
+    """drain() vacía el worker; merge() suma sus muestras en el principal."""
+    worker, main = timings.Timings(), timings.Timings()
+    worker.add("encode", 0.5)
+    worker.add_bytes(10)
+    main.add("encode", 0.25)
+
+    main.merge(worker.drain())
+
+    assert worker.samples == {} and worker.bytes_written == 0
+    assert main.samples["encode"] == [0.25, 0.5]
+    assert main.bytes_written == 10
+
+
+def test_write_json(tmp_path):
+    t = timings.Timings()
+    t.add("total", 1.0)
+
+    path = t.write_json(tmp_path / "sub" / "t.json")
+
+    assert json.loads(path.read_text())["stages"]["total"]["count"] == 1
+
+
+def test_run_instrumented_writes_profile(tmp_path, capsys):
+    out = tmp_path / "run.prof"
+
+    timings.run_instrumented(lambda: sum(range(1000)), "prueba", profile=str(out))
+
+    assert out.exists()
+    assert "Perfil cProfile" in capsys.readouterr().out
@@ -0,0 +1,138 @@
+"""
+timings.py – Medición por etapas y perfilado para los scripts de imágenes.
+
+Cada módulo envuelve sus etapas con `STAGES.stage("nombre")`. La medición
+está siempre activa (un perf_counter por etapa), así que puede quedarse en
+CI; --timings solo decide si se imprime el resumen y se guarda el JSON.
+Los workers de un pool devuelven sus muestras con drain() y el proceso
+principal las suma con merge().
+"""
+
+from __future__ import annotations
+
+import cProfile
+import json
+import math
+import time
+from pathlib import Path
+from typing import Callable, TextIO
+
+SCRIPT_DIR = Path(__file__).parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+TIMINGS_DIR = PROJECT_ROOT / ".cache" / "timings"
+
+
+class _Stage:
+    """Context manager ligero que suma una muestra al salir."""
+
+    __slots__ = ("_timings", "_name", "_start")
+
+    def __init__(self, timings: Timings, name: str) -> None:
+        self._timings = timings
+        self._name = name
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc) -> None:
+        self._timings.add(self._name, time.perf_counter() - self._start)
+
+
+class Timings:
+    """Muestras de duración por etapa más los bytes escritos."""
+
+    def __init__(self) -> None:
+        self.samples: dict[str, list[float]] = {}
+        self.bytes_written = 0
+
+    def stage(self, name: str) -> _Stage:
+        return _Stage(self, name)
+
+    def add(self, name: str, seconds: float) -> None:
+        self.samples.setdefault(name, []).append(seconds)
+
+    def add_bytes(self, n: int) -> None:
+        self.bytes_written += n
+
+    def drain(self) -> dict:
+        """Devuelve las muestras acumuladas y las vacía (para enviar desde un worker)."""
+        data = {"samples": self.samples, "bytes_written": self.bytes_written}
+        self.samples = {}
+        self.bytes_written = 0
+        return data
+
+    def merge(self, data: dict) -> None:
+        """Suma las muestras devueltas por drain() en otro proceso."""
+        for name, values in data["samples"].items():
+            self.samples.setdefault(name, []).extend(values)
+        self.bytes_written += data["bytes_written"]
+
+    def summary(self) -> dict:
+        """{"stages": {etapa: {count, total, mean, p95}}, "bytes_written": n}."""
+        stages = {}
+        for name, values in self.samples.items():
+            ordered = sorted(values)
+            p95 = ordered[max(0, math.ceil(0.95 * len(ordered)) - 1)]
+            stages[name] = {
+                "count": len(values),
+                "total": round(sum(values), 6),
+                "mean": round(sum(values) / len(values), 6),
+                "p95": round(p95, 6),
+            }
+        return {"stages": stages, "bytes_written": self.bytes_written}
+
+    def report(self, out: TextIO | None = None) -> None:
+        """Imprime la tabla de etapas (en ms) ordenada por tiempo total."""
+        summary = self.summary()
+        rows = sorted(summary["stages"].items(), key=lambda kv: -kv[1]["total"])
+        print("\n=== Tiempos por etapa ===", file=out)
+        print(f"  {'etapa':<22} {'n':>6} {'total ms':>10} {'media ms':>10} {'p95 ms':>10}",
+              file=out)
+        for name, s in rows:
+            print(f"  {name:<22} {s['count']:>6} {s['total'] * 1000:>10.1f} "
+                  f"{s['mean'] * 1000:>10.2f} {s['p95'] * 1000:>10.2f}", file=out)
+        print(f"  bytes escritos: {summary['bytes_written']:,}".replace(",", "."), file=out)
+
+    def write_json(self, path: str | Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.summary(), indent=2, sort_keys=True) + "\n",
+                        encoding="utf-8")
+        return path
+
+
+# Instancia del proceso: la comparten todos los módulos de scripts/
+STAGES = Timings()
+
+
+def reset_worker() -> None:
+    """Initializer de los pools: un worker creado con fork hereda las muestras
+    del proceso principal y las devolvería duplicadas."""
+    STAGES.drain()
+
+
+def run_instrumented(fn: Callable[[], None], name: str, timings: bool = False,
+                     profile: str | None = None) -> None:
+    """Ejecuta fn midiendo la etapa "total"; opcionalmente bajo cProfile.
+
+    Con timings imprime el resumen y lo guarda en .cache/timings/<name>.json.
+    Con profile vuelca las estadísticas de cProfile en ese fichero (se leen
+    con `python -m pstats` o snakeviz). Solo se perfila el proceso principal.
+    """
+    try:
+        with STAGES.stage("total"):
+            if profile:
+                profiler = cProfile.Profile()
+                try:
+                    profiler.runcall(fn)
+                finally:
+                    profiler.dump_stats(profile)
+            else:
+                fn()
+    finally:
+        if timings:
+            STAGES.report()
+            path = STAGES.write_json(TIMINGS_DIR / f"{name}.json")
+            print(f"  JSON: {path}")
+        if profile:
+            print(f"  Perfil cProfile: {profile}")
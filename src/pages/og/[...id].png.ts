@@ -3,9 +3,44 @@ import { getCollection } from 'astro:content';
 import satori from 'satori';
 import { Resvg } from '@resvg/resvg-js';
 import { readFile } from 'node:fs/promises';
-import { resolve } from 'node:path';
+import { join, resolve } from 'node:path';
+
+// Tarjetas pre-renderizadas por `python3 scripts/generate-images.py --og`.
+// Solo se usan si el manifiesto coincide con el título, la categoría y la
+// versión del dibujo actuales; si falta o está desactualizada, se genera con
+// satori como siempre. scripts/og_cards.py dibuja lo mismo que esta ruta: si
+// cambia el diseño, cambia en los dos e incrementa OG_VERSION en ambos.
+const PRERENDERED_DIR = resolve('.cache/og');
+const OG_VERSION = 2;
+
+type PrerenderedEntry = { title: string; category: string; version?: number };
 
 let fontData: ArrayBuffer | null = null;
+let prerendered: Promise<Record<string, PrerenderedEntry>> | null = null;
+
+function loadPrerendered(): Promise<Record<string, PrerenderedEntry>> {
+  prerendered ??= readFile(join(PRERENDERED_DIR, 'manifest.json'), 'utf-8')
+    .then((text) => JSON.parse(text) as Record<string, PrerenderedEntry>)
+    .catch(() => ({}));
+  return prerendered;
+}
+
+async function readPrerendered(id: string, title: string, category: string) {
+  const entry = (await loadPrerendered())[id];
+  if (
+    !entry ||
+    entry.title !== title ||
+    entry.category !== category ||
+    entry.version !== OG_VERSION
+  ) {
+    return null;
+  }
+  try {
+    return await readFile(join(PRERENDERED_DIR, `${id}.png`));
+  } catch {
+    return null;
+  }
+}
 
 async function loadFont(): Promise<ArrayBuffer> {
   if (fontData) return fontData;
@@ -23,8 +58,15 @@ export const getStaticPaths = (async () => {
   }));
 }) satisfies GetStaticPaths;
 
-export const GET: APIRoute = async ({ props }) => {
+export const GET: APIRoute = async ({ params, props }) => {
   const { title, category } = props as { title: string; category: string };
+  const cached = await readPrerendered(params.id as string, title, category);
+  if (cached) {
+    return new Response(new Uint8Array(cached), {
+      headers: { 'Content-Type': 'image/png' },
+    });
+  }
+
   const font = await loadFont();
 
   const svg = await satori(
@@ -0,0 +1,35 @@
+// Escaleras responsive que escribe scripts/import_image.py --ladder: un
+// ladder.json por carpeta de post, {imagen: variantes de mayor a menor}. El
+// peldaño WebP superior es la propia imagen.
+export interface LadderVariant {
+  file: string;
+  width: number;
+  height: number;
+  format: 'webp' | 'avif';
+  bytes: number;
+}
+
+const manifests = import.meta.glob<Record<string, LadderVariant[]>>(
+  '/src/assets/images/blog/**/ladder.json',
+  { eager: true, import: 'default' }
+);
+
+// Por ruta en el proyecto: "/src/assets/images/blog/<post>/<archivo>"
+export function ladderFor(assetPath: string): LadderVariant[] | undefined {
+  const slash = assetPath.lastIndexOf('/');
+  return manifests[`${assetPath.slice(0, slash)}/ladder.json`]?.[
+    assetPath.slice(slash + 1)
+  ];
+}
+
+// srcset de un formato con las URL ya resueltas de cada variante
+export function ladderSrcset(
+  variants: LadderVariant[],
+  format: LadderVariant['format'],
+  urls: Record<string, string>
+): string {
+  return variants
+    .filter((variant) => variant.format === format && urls[variant.file])
+    .map((variant) => `${urls[variant.file]} ${variant.width}w`)
+    .join(', ');
+}
@@ -0,0 +1,48 @@
+import type { ImageMetadata } from 'astro';
+
+// Marcadores de posición que escribe scripts/placeholders.py (import_image,
+// generate-images y `optimize_images.py placeholders`): un placeholders.json
+// por carpeta de src/assets/images, {archivo: Placeholder}. Las imágenes con
+// transparencia traen alpha y no traen lqip.
+export interface Placeholder {
+  width: number;
+  height: number;
+  color: string;
+  blurhash: string;
+  lqip?: string;
+  alpha?: true;
+}
+
+const sidecars = import.meta.glob<Record<string, Placeholder>>(
+  '/src/assets/images/**/placeholders.json',
+  { eager: true, import: 'default' }
+);
+
+// Por ruta en el proyecto: "/src/assets/images/blog/<post>/<archivo>"
+export function placeholderFor(assetPath: string): Placeholder | undefined {
+  const slash = assetPath.lastIndexOf('/');
+  return sidecars[`${assetPath.slice(0, slash)}/placeholders.json`]?.[
+    assetPath.slice(slash + 1)
+  ];
+}
+
+// Portadas (image: del frontmatter, en src/assets/images). Astro guarda la
+// ruta original en fsPath; si no está, se deduce de la URL: /@fs/.../<archivo>
+// en dev, /_astro/<nombre>.<hash>.<ext> en build.
+export function coverPlaceholder(image: ImageMetadata): Placeholder | undefined {
+  const covers = sidecars['/src/assets/images/placeholders.json'] ?? {};
+  const path = (image as ImageMetadata & { fsPath?: string }).fsPath ?? image.src;
+  const name = path.split('?')[0].split('/').at(-1) ?? '';
+  return covers[name] ?? covers[name.replace(/\.[\w-]{8}(\.\w+)$/, '$1')];
+}
+
+// style en línea: color dominante y miniatura borrosa de fondo hasta que
+// llega la imagen, que la tapa. Una imagen con transparencia no la taparía:
+// esas se quedan sin fondo.
+export function placeholderStyle(placeholder?: Placeholder): string | undefined {
+  if (!placeholder?.lqip || placeholder.alpha) return undefined;
+  return (
+    `background-color:${placeholder.color};` +
+    `background-image:url(${placeholder.lqip});background-size:cover`
+  );
+}